@@ -3,16 +3,15 @@ import os
 import logging
 import time
 import numpy as np
-import sounddevice as sd
-import soundfile as sf
 import threading
-from groq import Groq
-from gtts import gTTS
-from langdetect import detect, LangDetectException
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
-from pydub import AudioSegment
-from pydub.playback import play
+from providers import LazyProvider
+from metrics import external_call
+
+# sounddevice, soundfile, groq, gTTS, langdetect and pydub are imported inside
+# the functions that use them: importing this module must stay fast and must
+# work on hosts without audio devices (sounddevice fails to import there).
 
 # Configure logging
 logging.basicConfig(
@@ -39,8 +38,13 @@ class BasicSecurity:
             logging.error(f"Decryption error: {str(e)}")
             return None
 
-# Initialize Groq client (ensure 'api_key' is defined in your .env)
-client = Groq(api_key=os.getenv("api_key"))
+def build_groq_client():
+    from groq import Groq
+    # Ensure 'api_key' is defined in your .env
+    return Groq(api_key=os.getenv("api_key"))
+
+# Groq client, built on the first transcription
+client = LazyProvider("groq", build_groq_client)
 security = BasicSecurity()
 
 def text_to_speech_in_memory(encrypted_text, lang_code="en"):
@@ -51,9 +55,11 @@ def text_to_speech_in_memory(encrypted_text, lang_code="en"):
         decrypted_text = security.decrypt_text(encrypted_text)
         if not decrypted_text:
             return None
+        from gtts import gTTS
         tts = gTTS(text=decrypted_text, lang=lang_code)
         audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
+        with external_call("gtts"):
+            tts.write_to_fp(audio_buffer)
         audio_buffer.seek(0)
         return audio_buffer
     except Exception as e:
@@ -65,9 +71,11 @@ def text_to_speech_plain(text, lang_code="en"):
     Convert plain text to speech in memory using gTTS.
     """
     try:
+        from gtts import gTTS
         tts = gTTS(text=text, lang=lang_code)
         audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
+        with external_call("gtts"):
+            tts.write_to_fp(audio_buffer)
         audio_buffer.seek(0)
         return audio_buffer
     except Exception as e:
@@ -80,6 +88,8 @@ def play_audio_from_buffer(audio_buffer):
     This implementation uses pydub to decode the MP3 and sounddevice to play the raw audio.
     """
     try:
+        import sounddevice as sd
+        from pydub import AudioSegment
         # Decode the MP3 audio from the in-memory buffer
         audio_segment = AudioSegment.from_file(audio_buffer, format="mp3")
         # Get raw audio samples as a NumPy array
@@ -99,13 +109,15 @@ def transcribe_audio_bytes(audio_bytes, expected_lang_code="en"):
     Returns the encrypted transcription.
     """
     try:
-        transcription = client.audio.transcriptions.create(
-            file=("audio_input.wav", audio_bytes),
-            model="whisper-large-v3",
-            response_format="verbose_json",
-            language=expected_lang_code
-        )
+        with external_call("whisper"):
+            transcription = client.audio.transcriptions.create(
+                file=("audio_input.wav", audio_bytes),
+                model="whisper-large-v3",
+                response_format="verbose_json",
+                language=expected_lang_code
+            )
         transcribed_text = transcription.text.strip()
+        from langdetect import detect, LangDetectException
         try:
             detected_lang = detect(transcribed_text)
             logging.info(f"Detected language: {detected_lang}")
@@ -127,6 +139,8 @@ def record_until_silence(
     Records audio in-memory until silence (for silence_period seconds) is detected.
     This is provided for backward compatibility.
     """
+    import sounddevice as sd
+    import soundfile as sf
     logging.info("Starting recording with silence detection...")
     recorded_frames = []
     silent_time = 0.0
@@ -177,6 +191,7 @@ def start_recording(sample_rate=44100, channels=1, chunk_duration=0.5):
     
     def recording_loop(handle):
         try:
+            import sounddevice as sd
             stream = sd.InputStream(
                 samplerate=handle["sample_rate"],
                 channels=handle["channels"],
@@ -208,6 +223,7 @@ def stop_recording(recording_handle):
     if not recorded_frames:
         logging.error("No audio recorded.")
         return None
+    import soundfile as sf
     recorded_data = np.concatenate(recorded_frames, axis=0)
     wav_buffer = io.BytesIO()
     sf.write(wav_buffer, recorded_data, recording_handle["sample_rate"], format='WAV')
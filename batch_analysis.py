@@ -0,0 +1,269 @@
+"""
+Offline analysis of recorded interviews: runs the gaze, head pose and phone
+analyzers over video files as fast as the CPU allows and writes the per-frame
+signals plus the event timeline (JSON, or Parquet through pandas + pyarrow).
+
+Frames are decoded on a dedicated thread, phone detection runs on batches of
+frames while the landmark analyzers work through the same batch, and with
+--jobs several videos are analyzed in parallel processes.
+
+Examples (from the repository root):
+    python batch_analysis.py recordings/candidate.mp4
+    python batch_analysis.py recordings --output analysis --jobs 4
+    python batch_analysis.py recordings --format parquet --stride 2 --profile fast
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import cv2
+from vision_session import VisionSession
+from mobile_detection import get_model, run_inference_batch
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+BATCH_SIZE = 16             # Frames per YOLO call
+DECODE_QUEUE_SIZE = 64      # Decoded frames buffered ahead of the analyzers
+CALIBRATION_SECONDS = 5.0   # Head pose calibration period at the start of a recording, as in main.py
+EVENT_SECONDS = 3.0         # Minimum duration of a misalignment to count as an event, as in main.py
+
+# Signal values that are not events
+DEFAULTS = {"gaze": "Looking Center", "head": "Looking at Screen", "mobile": False}
+
+class FrameReader:
+    """
+    Decodes a video file on a background thread into a bounded queue.
+    Iterating yields (frame index, timestamp in seconds, frame) for every
+    `stride`-th frame; skipped frames are grabbed but not decoded.
+    """
+    def __init__(self, path, stride=1, queue_size=DECODE_QUEUE_SIZE):
+        self.path = path
+        self.stride = stride
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.decoded = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="frame-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        index = 0
+        try:
+            while not self._stopped:
+                if not self.cap.grab():
+                    break
+                if index % self.stride == 0:
+                    ret, frame = self.cap.retrieve()
+                    if not ret:
+                        break
+                    timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                    if timestamp <= 0 and index and self.fps:
+                        timestamp = index / self.fps  # Some containers report no position
+                    self.decoded += 1
+                    self._queue.put((index, timestamp, frame))
+                index += 1
+        finally:
+            self.cap.release()
+            self._queue.put(None)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            yield item
+
+    def batches(self, size):
+        batch = []
+        for item in self:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def close(self):
+        self._stopped = True
+        # Unblock the reader if it is waiting on a full queue
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def analyze_video(path, batch_size=BATCH_SIZE, stride=1, profile=None):
+    """
+    Runs every analyzer over one video. Returns {"video", "fps", "frames",
+    "analyzed", "elapsed_s", "calibrated_angles", "signals", "events"}, with
+    one signals entry per analyzed frame.
+    """
+    session = VisionSession(tracking=True, detection_scale="auto", inference_profile=profile)
+    reader = FrameReader(path, stride)
+    phone_enabled = get_model() is not None
+    calibrated_angles = None
+    signals = []
+    started = time.perf_counter()
+    try:
+        # One YOLO batch runs on this thread while the landmark analyzers
+        # (dlib, which holds the GIL less) work through the same frames
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for batch in reader.batches(batch_size):
+                frames = [frame for _, _, frame in batch]
+                phone_future = executor.submit(run_inference_batch, frames, profile) if phone_enabled else None
+
+                rows = []
+                for index, timestamp, frame in batch:
+                    context = session.stage.process(frame)
+                    _, gaze = session.gaze.process(frame, context)
+                    if calibrated_angles is None:
+                        # Calibration: head pose returns raw angles until they are taken
+                        _, angles = session.head.process(frame, None, context)
+                        if timestamp >= CALIBRATION_SECONDS and isinstance(angles, tuple) and len(angles) == 3:
+                            calibrated_angles = tuple(float(angle) for angle in angles)
+                        head = None
+                    else:
+                        _, head = session.head.process(frame, calibrated_angles, context)
+                    rows.append({
+                        "frame": index,
+                        "timestamp": round(timestamp, 3),
+                        "faces": len(context.faces),
+                        "gaze": gaze,
+                        "head": head,
+                    })
+
+                detections = phone_future.result() if phone_future is not None else [None] * len(rows)
+                for row, detection in zip(rows, detections):
+                    if detection is None:
+                        row.update(mobile=False, mobile_boxes=0, mobile_confidence=0.0)
+                        continue
+                    boxes, confidences = detection
+                    row["mobile"] = session.phone.update(len(boxes) > 0)
+                    row["mobile_boxes"] = len(boxes)
+                    row["mobile_confidence"] = round(float(confidences.max()), 3) if len(confidences) else 0.0
+                signals.extend(rows)
+    finally:
+        reader.close()
+
+    return {
+        "video": path,
+        "fps": reader.fps,
+        "frames": reader.frame_count,
+        "analyzed": len(signals),
+        "elapsed_s": round(time.perf_counter() - started, 3),
+        "calibrated_angles": calibrated_angles,
+        "signals": signals,
+        "events": build_timeline(signals),
+    }
+
+def build_timeline(signals, min_seconds=EVENT_SECONDS):
+    """
+    Event timeline from per-frame signals: every uninterrupted run of the same
+    non-default gaze, head or phone value lasting at least `min_seconds`.
+    Frames where head pose was still calibrating end a head run.
+    """
+    events = []
+    for signal, event_type in (("gaze", "eye"), ("head", "head"), ("mobile", "mobile")):
+        run = None
+        for row in signals + [None]:
+            value = row[signal] if row is not None else None
+            if run is not None and value != run["value"]:
+                if run["end"] - run["start"] >= min_seconds:
+                    events.append({
+                        "event_type": event_type,
+                        "direction": run["value"] if event_type != "mobile" else None,
+                        "start": run["start"],
+                        "end": run["end"],
+                        "duration": round(run["end"] - run["start"], 3),
+                        "frames": run["frames"],
+                    })
+                run = None
+            if row is None or value is None or value == DEFAULTS[signal]:
+                continue
+            if run is None:
+                run = {"value": value, "start": row["timestamp"], "end": row["timestamp"], "frames": 0}
+            run["end"] = row["timestamp"]
+            run["frames"] += 1
+    return sorted(events, key=lambda event: (event["start"], event["event_type"]))
+
+def write_result(result, output, fmt):
+    """Writes one video's analysis into `output`. Returns the written paths."""
+    os.makedirs(output, exist_ok=True)
+    stem = os.path.join(output, os.path.splitext(os.path.basename(result["video"]))[0])
+    if fmt == "json":
+        path = f"{stem}.analysis.json"
+        with open(path, "w") as f:
+            json.dump(result, f)
+        return [path]
+
+    import pandas as pd
+    try:
+        import pyarrow  # noqa: F401 (pandas' Parquet engine)
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from None
+    paths = [f"{stem}.signals.parquet", f"{stem}.events.parquet"]
+    pd.DataFrame(result["signals"]).to_parquet(paths[0], index=False)
+    events = pd.DataFrame(result["events"], columns=["event_type", "direction", "start", "end", "duration", "frames"])
+    events.to_parquet(paths[1], index=False)
+    summary = {key: value for key, value in result.items() if key not in ("signals", "events")}
+    with open(f"{stem}.summary.json", "w") as f:
+        json.dump(summary, f)
+    return paths + [f"{stem}.summary.json"]
+
+def find_videos(inputs):
+    videos = []
+    for item in inputs:
+        if os.path.isdir(item):
+            videos.extend(sorted(path for path in glob.glob(os.path.join(item, "*"))
+                                 if path.lower().endswith(VIDEO_EXTENSIONS)))
+        else:
+            videos.append(item)
+    return videos
+
+def process_video(path, output, fmt, batch_size, stride, profile):
+    """analyze_video() + write_result(); runs in a worker process with --jobs."""
+    result = analyze_video(path, batch_size, stride, profile)
+    return result, write_result(result, output, fmt)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Video files or directories of recordings")
+    parser.add_argument("--output", default="analysis", help="Directory for the results")
+    parser.add_argument("--format", choices=["json", "parquet"], default="json")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Frames per phone detection batch")
+    parser.add_argument("--stride", type=int, default=1, help="Analyze every Nth frame")
+    parser.add_argument("--profile", default=None, help="Phone detection inference profile")
+    parser.add_argument("--jobs", type=int, default=1, help="Videos analyzed in parallel processes")
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No videos found")
+        return 1
+
+    failed = 0
+    options = (args.output, args.format, args.batch_size, args.stride, args.profile)
+    with ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else ThreadPoolExecutor(max_workers=1) as pool:
+        futures = {pool.submit(process_video, video, *options): video for video in videos}
+        for future, video in futures.items():
+            try:
+                result, paths = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error analyzing {video}: {str(e)}")
+                continue
+            fps = result["analyzed"] / result["elapsed_s"] if result["elapsed_s"] else 0.0
+            print(f"{video}: {result['analyzed']} frames in {result['elapsed_s']:.1f} s ({fps:.1f} fps), "
+                  f"{len(result['events'])} events -> {', '.join(paths)}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Accuracy versus speed of analyzer configurations on the labeled screenshot
+corpus. Labels come from the screenshot names main.py writes
+(head_<direction>_<ts>, eye_<direction>_<ts>, mobile_detected_<ts>):
+
+    head screenshots   -> head pose direction
+    eye screenshots    -> gaze direction
+    mobile screenshots -> phone present; head and eye screenshots are
+                          counted as phone-free (an assumption: a phone
+                          may be in view without having been flagged)
+
+The labels are what the original pipeline decided when it took the
+screenshot, so the scores measure agreement with that reference setup and
+are meant for comparing configurations, not as absolute accuracy.
+
+Head pose is calibrated per session on that session's calibration
+screenshots (the median of their angles), or on all of its screenshots
+when it has none, and evaluated without temporal smoothing because the
+screenshots are independent frames.
+
+A configuration is "name:key=value,..." with keys
+    backend     face detector backend (dlib, haar, lbp, dnn; default: FACE_DETECTOR_BACKEND)
+    scale       face detection scale (a float or "auto")
+    profile     phone detection inference profile (fast, balanced, accurate)
+    conf        phone detection confidence threshold
+    head.<key>  head pose threshold (see head_pose.HEAD_THRESHOLDS)
+    gaze.<key>  gaze threshold (see eye_movement.GAZE_THRESHOLDS)
+
+The table lists every configuration by cost per frame; configurations on
+the Pareto front (no other is both as accurate and as cheap) are starred.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_accuracy
+    python -m benchmarks.bench_accuracy --config reference: \\
+        --config small:scale=0.5,profile=fast --config loose:head.yaw=20,conf=0.7
+    python -m benchmarks.bench_accuracy --limit 200 --save accuracy.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+import cv2
+import numpy as np
+from evidence_store import parse_evidence_name, session_for_directory
+from face_detectors import create_face_detector
+from face_landmarks import LandmarkStage
+from eye_movement import GazeAnalyzer
+from head_pose import HeadPoseAnalyzer
+from mobile_detection import get_model, run_inference
+from benchmarks.corpus import CORPUS_GLOB, list_corpus
+
+# Swept when no --config is given
+DEFAULT_CONFIGS = [
+    "reference:",
+    "auto_scale:scale=auto",
+    "half_scale:scale=0.5",
+    "haar:backend=haar",
+    "dnn:backend=dnn",
+    "fast_phone:profile=fast",
+    "balanced_phone:profile=balanced",
+    "fast_all:scale=auto,profile=fast",
+]
+
+def parse_config(spec):
+    """"name:key=value,..." -> (name, options dict)."""
+    name, _, options = spec.partition(":")
+    config = {"backend": None, "scale": 1.0, "profile": None, "conf": None, "head": {}, "gaze": {}}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if key.startswith(("head.", "gaze.")):
+            group, _, threshold = key.partition(".")
+            config[group][threshold] = float(value)
+        elif key == "scale":
+            config["scale"] = value if value == "auto" else float(value)
+        elif key == "conf":
+            config["conf"] = float(value)
+        elif key in ("backend", "profile"):
+            config[key] = value
+        else:
+            raise ValueError(f"Unknown configuration key '{key}' in '{spec}'")
+    if "horizontal_parts" in config["gaze"]:
+        config["gaze"]["horizontal_parts"] = int(config["gaze"]["horizontal_parts"])
+    return name or "reference", config
+
+def build_dataset(pattern=CORPUS_GLOB, limit=None):
+    """Labeled samples {path, session, event_type, direction, frame} from the screenshot names."""
+    samples = []
+    for path in list_corpus(pattern):
+        parsed = parse_evidence_name(path)
+        if parsed is None:
+            continue
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        event_type, direction, _ = parsed
+        samples.append({
+            "path": path,
+            "session": session_for_directory(os.path.dirname(path)),
+            "event_type": event_type,
+            "direction": direction,
+            "frame": frame,
+        })
+        if limit is not None and len(samples) >= limit:
+            break
+    return samples
+
+def calibrate(head, samples):
+    """Per session, the median (pitch, yaw, roll) of its calibration screenshots (or all of them)."""
+    by_session = defaultdict(list)
+    for sample in samples:
+        by_session[sample["session"]].append(sample)
+    calibration = {}
+    for session, session_samples in by_session.items():
+        neutral = [sample for sample in session_samples if sample["event_type"] == "calibration"] or session_samples
+        angles = []
+        for sample in neutral:
+            head.reset()
+            _, value = head.process(sample["frame"], None)
+            if isinstance(value, tuple):
+                angles.append(value)
+        if angles:
+            calibration[session] = tuple(float(angle) for angle in np.median(angles, axis=0))
+    return calibration
+
+def evaluate(config, samples):
+    """Runs one configuration over the samples. Returns its scores and costs."""
+    # No fallback: a backend whose model files are missing is skipped, not scored as dlib
+    face_detector = create_face_detector(config["backend"]) if config["backend"] else None
+    stage = LandmarkStage(face_detector, detection_scale=config["scale"])
+    gaze = GazeAnalyzer(stage, config["gaze"])
+    head = HeadPoseAnalyzer(stage, history_size=1, thresholds=config["head"])
+    phone_enabled = get_model() is not None
+    calibration = calibrate(head, samples)
+
+    correct = defaultdict(int)
+    total = defaultdict(int)
+    phone = {"tp": 0, "fp": 0, "fn": 0}
+    timings = defaultdict(list)
+    for sample in samples:
+        if sample["event_type"] == "calibration":
+            continue
+        frame = sample["frame"]
+
+        start = time.perf_counter()
+        context = stage.process(frame)
+        context.landmarks
+        landmarks_done = time.perf_counter()
+        _, gaze_direction = gaze.process(frame, context)
+        gaze_done = time.perf_counter()
+        head.reset()
+        angles = calibration.get(sample["session"])
+        _, head_direction = head.process(frame, angles, context) if angles is not None else (None, None)
+        head_done = time.perf_counter()
+        detected = phone_enabled and len(run_inference(frame, config["profile"], config["conf"])[0]) > 0
+        phone_done = time.perf_counter()
+
+        timings["landmarks"].append((landmarks_done - start) * 1000)
+        timings["gaze"].append((gaze_done - landmarks_done) * 1000)
+        timings["head"].append((head_done - gaze_done) * 1000)
+        timings["mobile"].append((phone_done - head_done) * 1000)
+        timings["total"].append((phone_done - start) * 1000)
+
+        if sample["event_type"] == "eye":
+            total["gaze"] += 1
+            correct["gaze"] += gaze_direction == sample["direction"]
+        elif sample["event_type"] == "head" and angles is not None:
+            total["head"] += 1
+            correct["head"] += head_direction == sample["direction"]
+        if phone_enabled:
+            labeled = sample["event_type"] == "mobile"
+            if detected and labeled:
+                phone["tp"] += 1
+            elif detected:
+                phone["fp"] += 1
+            elif labeled:
+                phone["fn"] += 1
+
+    scores = {task: correct[task] / total[task] for task in ("gaze", "head") if total[task]}
+    if phone_enabled and phone["tp"] + phone["fp"] + phone["fn"]:
+        scores["mobile"] = 2 * phone["tp"] / (2 * phone["tp"] + phone["fp"] + phone["fn"])  # F1
+    return {
+        "scores": scores,
+        "accuracy": float(np.mean(list(scores.values()))) if scores else 0.0,
+        "samples": dict(total, mobile=len(timings["total"]) if phone_enabled else 0),
+        "ms_per_frame": {name: float(np.mean(values)) for name, values in timings.items()},
+    }
+
+def pareto_front(results):
+    """Names of the configurations no other one beats on both accuracy and cost."""
+    front = set()
+    for name, result in results.items():
+        cost, accuracy = result["ms_per_frame"]["total"], result["accuracy"]
+        dominated = any(
+            other["ms_per_frame"]["total"] <= cost and other["accuracy"] >= accuracy
+            and (other["ms_per_frame"]["total"] < cost or other["accuracy"] > accuracy)
+            for other_name, other in results.items() if other_name != name)
+        if not dominated:
+            front.add(name)
+    return front
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", action="append", dest="configs",
+                        help="Configuration to evaluate (repeatable); see above")
+    parser.add_argument("--glob", default=CORPUS_GLOB, help="Labeled screenshots to evaluate on")
+    parser.add_argument("--limit", type=int, default=None, help="Use at most this many screenshots")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    samples = build_dataset(args.glob, args.limit)
+    if not samples:
+        print(f"No labeled screenshots found for {args.glob} (run from the repository root)")
+        return 1
+    counts = defaultdict(int)
+    for sample in samples:
+        counts[sample["event_type"]] += 1
+    print(f"Samples: {len(samples)} ({', '.join(f'{kind} {count}' for kind, count in sorted(counts.items()))})")
+    if get_model() is None:
+        print("Phone detection model unavailable: phone scores are left out")
+
+    results = {}
+    for spec in args.configs or DEFAULT_CONFIGS:
+        name, config = parse_config(spec)
+        try:
+            results[name] = dict(evaluate(config, samples), spec=spec)
+        except Exception as e:
+            print(f"Skipping {name}: {str(e)}")
+
+    front = pareto_front(results)
+    print(f"\n  {'config':<16} {'accuracy':>8} {'gaze':>6} {'head':>6} {'phone F1':>8} "
+          f"{'ms/frame':>9} {'landmarks':>9} {'mobile':>7}")
+    for name, result in sorted(results.items(), key=lambda item: item[1]["ms_per_frame"]["total"]):
+        scores, costs = result["scores"], result["ms_per_frame"]
+        cells = [f"{scores[task]:.3f}" if task in scores else "-" for task in ("gaze", "head", "mobile")]
+        print(f"{'*' if name in front else ' '} {name:<16} {result['accuracy']:>8.3f} {cells[0]:>6} {cells[1]:>6} "
+              f"{cells[2]:>8} {costs['total']:>9.2f} {costs['landmarks']:>9.2f} {costs['mobile']:>7.2f}")
+    print("* Pareto-optimal: no other configuration is both as accurate and as cheap")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"samples": dict(counts), "pareto": sorted(front), "configs": results}, f, indent=2)
+        print(f"Results saved to {args.save}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Compares evidence encodings on the stored screenshots (encode time and file
+size per format and quality), and measures how long the capture loop is
+blocked per screenshot: synchronous cv2.imwrite PNG vs EvidenceWriter.save().
+
+Usage (from the repository root):
+    python -m benchmarks.bench_evidence_writer --limit 50
+    python -m benchmarks.bench_evidence_writer --formats jpg:80 jpg:90 webp:80 png
+"""
+import argparse
+import os
+import tempfile
+import time
+import cv2
+import numpy as np
+from evidence_writer import EvidenceWriter, encode_frame
+from benchmarks.corpus import load_frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=50, help="Number of screenshots to encode")
+    parser.add_argument("--formats", nargs="+", default=["png", "jpg:90", "jpg:80", "webp:90", "webp:80"],
+                        help="format[:quality] entries to compare")
+    args = parser.parse_args()
+
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return
+
+    print(f"Screenshots: {len(frames)}")
+    print(f"{'encoding':<10} {'mean ms':>9} {'p95 ms':>9} {'mean KB':>9}")
+    for entry in args.formats:
+        fmt, _, quality = entry.partition(":")
+        quality = int(quality or 90)
+        timings = []
+        sizes = []
+        for frame in frames:
+            start = time.perf_counter()
+            sizes.append(len(encode_frame(frame, fmt, quality)))
+            timings.append((time.perf_counter() - start) * 1000)
+        timings = np.array(timings)
+        print(f"{entry:<10} {timings.mean():>9.2f} {np.percentile(timings, 95):>9.2f} {np.mean(sizes) / 1024:>9.1f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        blocked_sync = []
+        for index, frame in enumerate(frames):
+            start = time.perf_counter()
+            cv2.imwrite(os.path.join(directory, f"sync_{index}.png"), frame)
+            blocked_sync.append((time.perf_counter() - start) * 1000)
+
+        # Replayed screenshots repeat, so deduplication would skip them instead of encoding them
+        writer = EvidenceWriter(directory, dedup="off")
+        blocked_async = []
+        for index, frame in enumerate(frames):
+            start = time.perf_counter()
+            writer.save(frame, f"async_{index}")
+            blocked_async.append((time.perf_counter() - start) * 1000)
+        writer.close(timeout=60)
+        writer_stats = writer.stats()
+
+    print(f"Capture loop blocked per screenshot: imwrite png {np.mean(blocked_sync):.2f} ms, "
+          f"EvidenceWriter.save {np.mean(blocked_async):.3f} ms")
+    print(f"Writer: {writer_stats['written']} written, {writer_stats['dropped']} dropped, "
+          f"max depth {writer_stats['max_depth']}, encode {writer_stats['encode_ms']['mean']:.2f} ms, "
+          f"write {writer_stats['write_ms']['mean']:.2f} ms")
+
+if __name__ == "__main__":
+    main()
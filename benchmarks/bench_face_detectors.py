@@ -0,0 +1,58 @@
+"""
+Compares face detector backends on the stored screenshots: per-frame latency
+and detection recall (share of screenshots in which a face was found; every
+screenshot was taken during an interview, so each should contain one).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_face_detectors --limit 300
+    python -m benchmarks.bench_face_detectors --backends dlib haar --scale 0.5
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from face_detectors import DETECTOR_BACKENDS, create_face_detector
+from face_landmarks import ScaledDetector
+from benchmarks.corpus import load_frames
+
+def evaluate(face_detector, grays):
+    timings = []
+    found = 0
+    for gray in grays:
+        start = time.perf_counter()
+        faces = face_detector(gray)
+        timings.append((time.perf_counter() - start) * 1000)
+        if faces:
+            found += 1
+    return np.array(timings), found / len(grays)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="Number of screenshots to use (default: all)")
+    parser.add_argument("--backends", nargs="+", default=list(DETECTOR_BACKENDS), help="Backends to compare")
+    parser.add_argument("--scale", default="1.0", help='Detection scale, or "auto"')
+    args = parser.parse_args()
+
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return
+    grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames]
+    scale = args.scale if args.scale == "auto" else float(args.scale)
+
+    print(f"Screenshots: {len(grays)}, detection scale: {args.scale}")
+    print(f"{'backend':<8} {'mean ms':>9} {'p95 ms':>9} {'recall':>8}")
+    for backend in args.backends:
+        try:
+            face_detector = create_face_detector(backend)
+        except (FileNotFoundError, IOError) as e:
+            print(f"{backend:<8} skipped: {e}")
+            continue
+        if scale != 1.0:
+            face_detector = ScaledDetector(face_detector, scale)
+
+        face_detector(grays[0])  # Warm-up
+        timings, recall = evaluate(face_detector, grays)
+        print(f"{backend:<8} {timings.mean():>9.2f} {np.percentile(timings, 95):>9.2f} {recall:>8.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares per-frame cost of gaze + head pose with and without the shared
+landmark stage.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_landmarks --limit 200
+    python -m benchmarks.bench_landmarks --scale 0.5
+"""
+import argparse
+import time
+import numpy as np
+from eye_movement import process_eye_movement
+from head_pose import process_head_pose
+from face_landmarks import LandmarkStage
+from benchmarks.corpus import load_frames
+
+# Neutral calibration so head pose runs its full classification path
+CALIBRATED_ANGLES = (0.0, 0.0, 0.0)
+
+def run_separate(frame):
+    # Each analyzer converts, detects and predicts on its own (previous behaviour)
+    process_eye_movement(frame)
+    process_head_pose(frame, CALIBRATED_ANGLES)
+
+def run_shared(frame, stage):
+    context = stage.process(frame)
+    process_eye_movement(frame, context)
+    process_head_pose(frame, CALIBRATED_ANGLES, context)
+
+def time_per_frame(fn, frames, repeat):
+    timings = []
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            fn(frame)
+            timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100, help="Number of screenshots to replay")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--scale", default="1.0", help='Detection scale for the shared stage, or "auto"')
+    args = parser.parse_args()
+
+    stage = LandmarkStage(detection_scale=args.scale if args.scale == "auto" else float(args.scale))
+
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return
+
+    # Warm up both paths so the first frame does not skew the results
+    run_separate(frames[0])
+    run_shared(frames[0], stage)
+
+    separate = time_per_frame(run_separate, frames, args.repeat)
+    shared = time_per_frame(lambda frame: run_shared(frame, stage), frames, args.repeat)
+
+    print(f"Frames: {len(frames)} x {args.repeat}, detection scale: {args.scale}")
+    print(f"Separate detection: mean {separate.mean():.2f} ms, p95 {np.percentile(separate, 95):.2f} ms")
+    print(f"Shared stage:       mean {shared.mean():.2f} ms, p95 {np.percentile(shared, 95):.2f} ms")
+    saving = separate.mean() - shared.mean()
+    print(f"Saving per frame:   {saving:.2f} ms ({100 * saving / separate.mean():.1f}%)")
+
+if __name__ == "__main__":
+    main()
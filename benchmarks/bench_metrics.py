@@ -0,0 +1,89 @@
+"""
+Overhead of the /metrics instrumentation on the vision path: the cost of
+one histogram observation, the number of observations per frame, and the
+per-frame latency of main.py's analyzers with recording on and off.
+
+The check uses the estimated overhead (observations per frame x cost per
+observation, relative to the frame time), which unlike the difference of
+two noisy timings is stable from run to run; the measured difference is
+printed next to it. Exits with status 1 above --max-overhead.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_metrics --limit 100
+    python -m benchmarks.bench_metrics --max-overhead 0.005
+"""
+import argparse
+import sys
+import time
+import timeit
+import numpy as np
+import metrics
+from vision_session import VisionSession
+from benchmarks.corpus import load_frames
+
+# Neutral calibration so head pose runs its full classification path
+CALIBRATED_ANGLES = (0.0, 0.0, 0.0)
+
+def observation_ns(number=200000):
+    histogram = metrics.vision_stage_seconds.labels(stage="benchmark")
+
+    def timed_block():
+        with histogram.time():
+            pass
+    empty = timeit.timeit(lambda: None, number=number)
+    return (timeit.timeit(timed_block, number=number) - empty) / number * 1e9
+
+def observations():
+    return sum(sum(child.counts) for child in metrics.vision_stage_seconds._children.values())
+
+def run_frames(session, frames):
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        context = session.stage.process(frame)
+        session.gaze.process(frame, context)
+        session.head.process(frame, CALIBRATED_ANGLES, context)
+        session.phone.process(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100, help="Number of screenshots to replay")
+    parser.add_argument("--repeat", type=int, default=3, help="Alternating on/off passes over the corpus")
+    parser.add_argument("--max-overhead", type=float, default=0.01, help="Allowed overhead per frame (0.01 = 1%%)")
+    args = parser.parse_args()
+
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return 1
+    session = VisionSession(tracking=False)
+    run_frames(session, frames[:3])  # Warm up models and caches
+
+    enabled_ms = []
+    disabled_ms = []
+    for _ in range(args.repeat):
+        metrics.set_enabled(False)
+        disabled_ms.extend(run_frames(session, frames))
+        metrics.set_enabled(True)
+        before = observations()
+        enabled_ms.extend(run_frames(session, frames))
+        per_frame = (observations() - before) / len(frames)
+
+    cost_ns = observation_ns()
+    frame_ms = float(np.mean(disabled_ms))
+    estimated = per_frame * cost_ns / 1e6 / frame_ms
+    measured = (np.mean(enabled_ms) - frame_ms) / frame_ms
+
+    print(f"Frames: {len(frames)} x {args.repeat}")
+    print(f"Observation: {cost_ns:.0f} ns, {per_frame:.1f} per frame")
+    print(f"Frame time: {frame_ms:.2f} ms without metrics, {np.mean(enabled_ms):.2f} ms with")
+    print(f"Overhead: estimated {estimated:.3%}, measured {measured:+.2%} (max {args.max_overhead:.1%})")
+    if estimated > args.max_overhead:
+        print("METRICS OVERHEAD CHECK FAILED")
+        return 1
+    print("Metrics overhead check passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Checks an exported phone-detection model (ONNX Runtime / OpenVINO) against the
+PyTorch model on the stored screenshots, and compares their throughput.
+
+Both models run with identical arguments (EXPORT_IMGSZ, no augmentation), so
+any difference comes from the export or quantization. Exits with status 1 when
+parity is outside the tolerances.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mobile_backends --backend onnx --limit 200
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from mobile_detection import load_model, inference_args, extract_detections
+from benchmarks.corpus import load_frames
+
+# Parity tolerances (also used by tests/test_mobile_backend_parity.py)
+MIN_AGREEMENT = 0.97    # Share of screenshots with the same phone / no-phone decision
+MIN_IOU = 0.85          # Mean IoU of matched boxes
+MAX_CONF_DIFF = 0.05    # Mean confidence difference of matched boxes
+
+def box_iou(a, b):
+    """IoU between every box in `a` (N, 4) and `b` (M, 4), as an (N, M) array."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+def run(yolo_model, frames, args):
+    detections = []
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        detections.append(extract_detections(yolo_model(frame, **args)))
+        timings.append((time.perf_counter() - start) * 1000)
+    return detections, np.array(timings)
+
+def parity(reference, exported):
+    """
+    Compares per-frame (boxes, confidences) of two models. Returns the decision
+    agreement, the mean IoU of matched boxes and their mean confidence difference.
+    """
+    agreement = 0
+    ious = []
+    conf_diffs = []
+    for (ref_boxes, ref_conf), (exp_boxes, exp_conf) in zip(reference, exported):
+        agreement += (len(ref_boxes) > 0) == (len(exp_boxes) > 0)
+        if len(ref_boxes) and len(exp_boxes):
+            iou = box_iou(ref_boxes, exp_boxes)
+            best = iou.argmax(axis=1)
+            ious.extend(iou[np.arange(len(ref_boxes)), best])
+            conf_diffs.extend(np.abs(ref_conf - exp_conf[best]))
+    agreement /= len(reference)
+    mean_iou = float(np.mean(ious)) if ious else 1.0
+    mean_conf_diff = float(np.mean(conf_diffs)) if conf_diffs else 0.0
+    return agreement, mean_iou, mean_conf_diff
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--limit", type=int, default=200, help="Number of screenshots to compare")
+    parser.add_argument("--min-agreement", type=float, default=MIN_AGREEMENT,
+                        help="Minimum share of screenshots with the same phone / no-phone decision")
+    parser.add_argument("--min-iou", type=float, default=MIN_IOU, help="Minimum mean IoU of matched boxes")
+    parser.add_argument("--max-conf-diff", type=float, default=MAX_CONF_DIFF,
+                        help="Maximum mean confidence difference")
+    args = parser.parse_args()
+
+    reference_model = load_model("torch")
+    exported_model = load_model(args.backend)
+    if reference_model is None or exported_model is None:
+        return 1
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return 1
+
+    call_args = inference_args(backend=args.backend)
+    for yolo_model in (reference_model, exported_model):
+        yolo_model(frames[0], **call_args)  # Warm-up
+
+    reference, reference_ms = run(reference_model, frames, call_args)
+    exported, exported_ms = run(exported_model, frames, call_args)
+
+    agreement, mean_iou, mean_conf_diff = parity(reference, exported)
+
+    print(f"Screenshots: {len(frames)}, imgsz: {call_args['imgsz']}")
+    print(f"{'backend':<10} {'mean ms':>9} {'p95 ms':>9} {'frames/s':>9}")
+    for name, timings in (("torch", reference_ms), (args.backend, exported_ms)):
+        print(f"{name:<10} {timings.mean():>9.2f} {np.percentile(timings, 95):>9.2f} {1000 / timings.mean():>9.1f}")
+    print(f"Decision agreement: {agreement:.1%} (min {args.min_agreement:.1%})")
+    print(f"Mean box IoU:       {mean_iou:.3f} (min {args.min_iou:.3f})")
+    print(f"Mean conf diff:     {mean_conf_diff:.3f} (max {args.max_conf_diff:.3f})")
+
+    if agreement < args.min_agreement or mean_iou < args.min_iou or mean_conf_diff > args.max_conf_diff:
+        print("PARITY CHECK FAILED")
+        return 1
+    print("Parity check passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
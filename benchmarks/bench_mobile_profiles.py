@@ -0,0 +1,44 @@
+"""
+Measures phone-detection latency for each YOLO inference profile on the
+stored screenshots, and how many screenshots each profile flags.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mobile_profiles --limit 100
+"""
+import argparse
+import time
+import numpy as np
+import mobile_detection
+from mobile_detection import INFERENCE_PROFILES, get_model, run_inference
+from benchmarks.corpus import load_frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100, help="Number of screenshots to replay")
+    parser.add_argument("--profiles", nargs="+", default=list(INFERENCE_PROFILES), help="Profiles to measure")
+    args = parser.parse_args()
+
+    if get_model() is None:
+        print("Mobile detection model not loaded; nothing to benchmark")
+        return
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return
+
+    print(f"Screenshots: {len(frames)}, device: {mobile_detection.device}")
+    print(f"{'profile':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'flagged':>8}")
+    for profile in args.profiles:
+        run_inference(frames[0], profile)  # Warm-up
+        timings = []
+        flagged = 0
+        for frame in frames:
+            start = time.perf_counter()
+            boxes, _ = run_inference(frame, profile)
+            timings.append((time.perf_counter() - start) * 1000)
+            flagged += len(boxes) > 0
+        timings = np.array(timings)
+        print(f"{profile:<10} {timings.mean():>9.2f} {np.percentile(timings, 50):>9.2f} "
+              f"{np.percentile(timings, 95):>9.2f} {flagged:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Measures what the shared model registry costs and saves: resident memory
+before and after loading every model, load and warmup time per model, and the
+latency of the first real frames compared with steady state.
+
+Run it once with and once without warmup to see the first-frame spike:
+    python -m benchmarks.bench_model_registry
+    python -m benchmarks.bench_model_registry --no-warmup
+
+With --pool N it instead measures the memory of this process plus a
+VisionWorkerPool of N workers, started with "spawn" (every worker loads every
+model) and with "fork" (the workers share FORK_SHARED_MODELS with the parent).
+RSS counts shared pages once per process; PSS splits them between the
+processes sharing them, so only the PSS total shows the saving (USS is
+reported where PSS is unavailable):
+    python -m benchmarks.bench_model_registry --pool 4
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import numpy as np
+import psutil
+from model_registry import registry
+from vision_pool import VisionWorkerPool
+from vision_session import VisionSession
+from benchmarks.corpus import load_frames
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 2**20
+
+def pool_memory_mb(pool, frame):
+    """
+    Total RSS and PSS in MB of this process and the pool's workers, once
+    every worker has finished loading its models and processed a frame.
+    """
+    for stream_id in range(pool.workers):
+        pool.process(frame, stream_id=stream_id, timeout=None)
+    rss = pss = 0
+    for pid in [os.getpid()] + pool.pids:
+        info = psutil.Process(pid).memory_full_info()
+        rss += info.rss
+        pss += getattr(info, "pss", info.uss)
+    return rss / 2**20, pss / 2**20
+
+def bench_pool(workers, frame):
+    # spawn first: its parent must not hold the models a fork would share
+    for start_method in ("spawn", "fork"):
+        if start_method not in multiprocessing.get_all_start_methods():
+            continue
+        pool = VisionWorkerPool(workers=workers, start_method=start_method, tracking=False).start()
+        try:
+            rss, pss = pool_memory_mb(pool, frame)
+        finally:
+            pool.close()
+        print(f"Pool of {workers} workers ({start_method}): {rss:.0f} MB RSS, {pss:.0f} MB PSS "
+              f"with this process")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=50, help="Number of screenshots to replay")
+    parser.add_argument("--no-warmup", action="store_true", help="Load models without a warmup inference")
+    parser.add_argument("--sessions", type=int, default=4, help="Sessions to create after loading")
+    parser.add_argument("--pool", type=int, default=0,
+                        help="Measure the memory of a worker pool of this size instead")
+    args = parser.parse_args()
+
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return
+    if args.pool:
+        bench_pool(args.pool, frames[0])
+        return
+
+    registry.warmup = not args.no_warmup
+    before = rss_mb()
+    registry.preload()
+    loaded = rss_mb()
+    sessions = [VisionSession(tracking=False) for _ in range(args.sessions)]
+    with_sessions = rss_mb()
+
+    print(f"RSS: {before:.0f} MB before loading, {loaded:.0f} MB after preload, "
+          f"{with_sessions:.0f} MB with {args.sessions} sessions")
+    for name, model_stats in registry.stats().items():
+        warmup = model_stats["warmup_s"]
+        print(f"  {name:<14} loaded: {model_stats['loaded']!s:<5} load {model_stats['load_s'] or 0.0:.2f} s, "
+              f"warmup {'-' if warmup is None else f'{warmup:.2f} s'}")
+
+    session = sessions[0]
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        context = session.stage.process(frame)
+        session.gaze.process(frame, context)
+        session.head.process(frame, (0.0, 0.0, 0.0), context)
+        session.phone.process(frame)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    steady = np.median(timings[len(timings) // 2:])
+    print(f"First frame: {timings[0]:.1f} ms, second: {timings[1] if len(timings) > 1 else float('nan'):.1f} ms, "
+          f"steady-state median: {steady:.1f} ms ({timings[0] / steady:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Replays the stored screenshots as a live camera (at --fps) through the
+pipelined stage graph and through main.py's per-frame barrier, and reports
+how many frames each analyzer kept up with and its capture-to-result latency.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline --limit 150 --fps 30
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from pipeline import StageGraph
+from vision_session import VisionSession
+from benchmarks.corpus import load_frames
+
+def replay_barrier(frames, fps):
+    session = VisionSession()
+    latencies = {"gaze": [], "head": [], "mobile": []}
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        start = time.perf_counter()
+        next_frame = 0
+        while next_frame < len(frames):
+            # Like a camera: the newest frame at this moment, skipping missed ones
+            next_frame = max(next_frame, int((time.perf_counter() - start) * fps))
+            if next_frame >= len(frames):
+                break
+            captured = time.time()
+            frame = frames[next_frame]
+            context = session.stage.process(frame)
+            futures = {
+                "gaze": executor.submit(session.gaze.process, frame, context),
+                "head": executor.submit(session.head.process, frame, (0.0, 0.0, 0.0), context),
+                "mobile": executor.submit(session.phone.process, frame),
+            }
+            for name, future in futures.items():
+                future.result()
+                latencies[name].append((time.time() - captured) * 1000)
+            next_frame += 1
+    return latencies
+
+def replay_pipeline(frames, fps):
+    graph = StageGraph(VisionSession())
+    graph.calibrated_angles = (0.0, 0.0, 0.0)
+    graph.start()
+    start = time.perf_counter()
+    for seq, frame in enumerate(frames, start=1):
+        delay = start + (seq - 1) / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        graph.submit(seq, time.time(), frame)
+    time.sleep(1.0)  # Let the slowest stage finish its last frame
+    graph.stop()
+    return graph.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=150, help="Number of screenshots to replay")
+    parser.add_argument("--fps", type=float, default=30.0, help="Replay frame rate")
+    args = parser.parse_args()
+
+    frames = load_frames(limit=args.limit)
+    if not frames:
+        return
+
+    print(f"Frames: {len(frames)} at {args.fps:.0f} fps")
+    print(f"{'mode':<9} {'stage':<10} {'frames':>7} {'mean ms':>9} {'p95 ms':>9}")
+    for name, samples in replay_barrier(frames, args.fps).items():
+        samples = np.array(samples)
+        print(f"{'barrier':<9} {name:<10} {len(samples):>7} {samples.mean():>9.1f} {np.percentile(samples, 95):>9.1f}")
+    for name, stage_stats in replay_pipeline(frames, args.fps).items():
+        latency = stage_stats["end_to_end_ms"]
+        print(f"{'pipeline':<9} {name:<10} {stage_stats['processed']:>7} {latency['mean']:>9.1f} {latency['p95']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
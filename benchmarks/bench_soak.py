@@ -0,0 +1,355 @@
+"""
+Soak test: hours of simulated interviews through interview_api and the
+vision pipeline in one process, watching for leak-like growth.
+
+Interview sessions are driven through the Flask test client (admin setup,
+start/stop recording for every question, speak_question, results) with the
+speech-to-text, LLM and text-to-speech calls stubbed out and a fake audio
+input device feeding silence, so the real recording threads, handles and
+session dictionaries are exercised without network or sound hardware.
+Meanwhile a capture loop feeds synthetic frames (or the screenshot corpus)
+through the analyzers and raises periodic events into the evidence writer
+and clip recorder, writing into a temporary evidence store.
+
+Every --sample-interval seconds it records RSS, Python and native thread
+counts, open file descriptors, memory traced by tracemalloc, the sizes of
+the API's session dictionaries and the evidence written. After the warmup
+it fits a line to each resource and fails (status 1) when RSS or traced
+memory keeps growing faster than allowed, or threads / descriptors
+accumulate. The largest tracemalloc growth by source line is printed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_soak --duration 14400
+    python -m benchmarks.bench_soak --duration 300 --sample-interval 5 --sessions 8
+    python -m benchmarks.bench_soak --duration 600 --corpus --save soak.json
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+import cv2
+import numpy as np
+import psutil
+
+# --- Stubs for the external services and the audio device --------------------
+
+class StubLLM:
+    """Answers interview_utils' prompts in the formats its parsers expect."""
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, input):
+        time.sleep(self.delay)
+        self.calls += 1
+        if "*Final Feedback:*" in input:
+            content = "*Final Feedback:*\nSolid answers overall.\n*Overall Score:*\n7/10"
+        elif "*Next Question:*" in input:
+            content = ("*Feedback:*\nGood.\n*Score:*\n7\n*Next Question:*\n"
+                       f"Stub follow-up question {self.calls}?\n*Ideal Answer:*\nA stub answer.")
+        else:
+            content = f"*Question:*\nStub question {self.calls}?\n*Ideal Answer:*\nA stub answer."
+        return types.SimpleNamespace(content=content)
+
+class FakeInputStream:
+    """Stands in for sounddevice.InputStream: blocks like a device and returns silence."""
+    def __init__(self, samplerate, channels, dtype):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = dtype
+
+    def start(self):
+        pass
+
+    def read(self, frames):
+        time.sleep(frames / self.samplerate)
+        return np.zeros((frames, self.channels), dtype=self.dtype), False
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+def install_stubs(llm_delay, stt_delay, tts_seconds):
+    """Patches the STT / LLM / TTS calls and the audio device. Returns the interview_api module."""
+    sys.modules["sounddevice"] = types.SimpleNamespace(
+        InputStream=FakeInputStream, play=lambda *args, **kwargs: None, wait=lambda: None)
+    import interview_api
+    import interview_utils
+    interview_utils.llm = StubLLM(llm_delay)
+
+    def transcribe(audio_bytes, expected_lang_code="en"):
+        time.sleep(stt_delay)
+        return interview_api.security.encrypt_text("A stub answer from the candidate.")
+
+    interview_api.transcribe_audio_bytes = transcribe
+    interview_api.text_to_speech_plain = lambda text, lang_code="en": io.BytesIO(b"stub mp3")
+    interview_api.play_audio_from_buffer = lambda audio_buffer: time.sleep(tts_seconds)
+    return interview_api
+
+# --- Drivers ------------------------------------------------------------------
+
+class InterviewDriver:
+    """Runs simulated interviews back to back on one thread through the test client."""
+    def __init__(self, api, index, questions, answer_seconds, stop):
+        self.api = api
+        self.index = index
+        self.questions = questions
+        self.answer_seconds = answer_seconds
+        self.stop = stop
+        self.completed = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name=f"soak-interviews-{index}", daemon=True)
+
+    def _run(self):
+        client = self.api.app.test_client()
+        run = 0
+        while not self.stop.is_set():
+            run += 1
+            try:
+                self._interview(client, f"soak_{self.index}_{run}")
+                self.completed += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Interview driver {self.index}: {str(e)}")
+                time.sleep(1)
+
+    def _interview(self, client, name):
+        def check(response):
+            if response.status_code != 200:
+                raise RuntimeError(f"{response.request.path} -> {response.status_code} {response.get_json()}")
+            return response
+
+        check(client.post("/admin", json={"candidate_name": name, "num_questions": self.questions,
+                                          "admin_instructions": "Soak test", "interview_time": 1}))
+        for _ in range(self.questions):
+            check(client.get("/speak_question", query_string={"candidate_name": name}))
+            check(client.post("/candidate_voice", json={"candidate_name": name, "action": "start"}))
+            time.sleep(self.answer_seconds)
+            check(client.post("/candidate_voice", json={"candidate_name": name, "action": "stop"}))
+        check(client.get("/admin_results", query_string={"candidate_name": name, "result": "true"}))
+        check(client.get("/metrics"))
+
+def synthetic_frames(count=64, size=(480, 640)):
+    """Noisy frames with a moving bright block, so the motion paths stay busy."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for index in range(count):
+        frame = rng.integers(0, 64, size=size + (3,), dtype=np.uint8)
+        x = 40 + (index * 9) % (size[1] - 200)
+        cv2.rectangle(frame, (x, 140), (x + 160, 340), (200, 180, 160), -1)
+        frames.append(frame)
+    return frames
+
+class VisionDriver:
+    """main.py's capture loop on a fixed frame set: analyzers, evidence screenshots and clips."""
+    def __init__(self, frames, fps, event_interval, directory, stop):
+        from concurrent.futures import ThreadPoolExecutor
+        from vision_session import VisionSession
+        from evidence_store import EvidenceStore
+        from evidence_writer import EvidenceWriter
+        from clip_recorder import ClipRecorder
+        self.frames = frames
+        self.fps = fps
+        self.event_interval = event_interval
+        self.stop = stop
+        self.session = VisionSession(tracking=True, detection_scale="auto")
+        self.executor = ThreadPoolExecutor(max_workers=3)
+        self.store = EvidenceStore(directory)
+        self.writer = EvidenceWriter(store=self.store, session="soak")
+        self.clips = ClipRecorder(store=self.store, session="soak")
+        self.processed = 0
+        self.events = 0
+        self.thread = threading.Thread(target=self._run, name="soak-vision", daemon=True)
+
+    def _run(self):
+        next_event = time.time() + self.event_interval
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            frame = self.frames[self.processed % len(self.frames)].copy()
+            timestamp = time.time()
+            self.clips.add(frame, timestamp)
+            context = self.session.stage.process(frame)
+            futures = [
+                self.executor.submit(self.session.gaze.process, frame, context),
+                self.executor.submit(self.session.head.process, frame, (0.0, 0.0, 0.0), context),
+                self.executor.submit(self.session.phone.process, frame),
+            ]
+            layers = [future.result()[0] for future in futures]
+            self.processed += 1
+            if timestamp >= next_event:
+                # Alternate event kinds so dedup keeps some and links others
+                event_type, direction = [("head", "Looking Left"), ("eye", "Looking Right"), ("mobile", None)][self.events % 3]
+                self.writer.save(frame, f"{event_type}_{direction or 'detected'}_{int(timestamp)}", layers,
+                                 timestamp, event_type, direction)
+                self.clips.trigger(event_type, direction, timestamp)
+                self.events += 1
+                next_event = timestamp + self.event_interval
+            delay = 1 / self.fps - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        self.executor.shutdown()
+        self.writer.close()
+        self.clips.close()
+        self.store.close()
+
+# --- Sampling and analysis ----------------------------------------------------
+
+def directory_bytes(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def sample(process, api, directory, started):
+    memory = process.memory_info()
+    return {
+        "t": time.time() - started,
+        "rss_mb": memory.rss / 2**20,
+        "threads": threading.active_count(),
+        "native_threads": process.num_threads(),
+        "fds": process.num_fds() if hasattr(process, "num_fds") else len(process.open_files()),
+        "traced_mb": tracemalloc.get_traced_memory()[0] / 2**20,
+        "candidate_sessions": len(api.candidate_sessions),
+        "completed_interviews": len(api.completed_interviews),
+        "evidence_mb": directory_bytes(directory) / 2**20,
+    }
+
+def growth(samples, key):
+    """(slope per hour, total growth) of `key` over the samples, by least squares."""
+    times = np.array([entry["t"] for entry in samples])
+    values = np.array([entry[key] for entry in samples], dtype=float)
+    if len(samples) < 3 or times[-1] == times[0]:
+        return 0.0, 0.0
+    slope = np.polyfit(times, values, 1)[0]
+    return float(slope * 3600), float(values[-1] - values[0])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3600, help="Seconds to run")
+    parser.add_argument("--sample-interval", type=float, default=30, help="Seconds between resource samples")
+    parser.add_argument("--warmup", type=float, default=0.2, help="Fraction of the run ignored by the checks")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent simulated interviews")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per interview")
+    parser.add_argument("--answer-seconds", type=float, default=1.0, help="Recording length per answer")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="Stub LLM latency in seconds")
+    parser.add_argument("--stt-delay", type=float, default=0.05, help="Stub transcription latency in seconds")
+    parser.add_argument("--tts-seconds", type=float, default=0.2, help="Stub playback length in seconds")
+    parser.add_argument("--no-vision", action="store_true", help="Only drive the interview API")
+    parser.add_argument("--corpus", action="store_true", help="Replay the stored screenshots instead of synthetic frames")
+    parser.add_argument("--fps", type=float, default=15, help="Frame rate of the capture loop")
+    parser.add_argument("--event-interval", type=float, default=5, help="Seconds between evidence events")
+    parser.add_argument("--tracemalloc-frames", type=int, default=1, help="Stack depth kept by tracemalloc")
+    parser.add_argument("--max-rss-mb-per-hour", type=float, default=64, help="Allowed RSS growth rate")
+    parser.add_argument("--max-traced-mb-per-hour", type=float, default=32, help="Allowed traced memory growth rate")
+    parser.add_argument("--max-thread-growth", type=int, default=4, help="Allowed growth in thread count")
+    parser.add_argument("--max-fd-growth", type=int, default=16, help="Allowed growth in open descriptors")
+    parser.add_argument("--save", help="Write the samples and verdict to this JSON file")
+    args = parser.parse_args()
+
+    tracemalloc.start(args.tracemalloc_frames)
+    api = install_stubs(args.llm_delay, args.stt_delay, args.tts_seconds)
+    directory = tempfile.mkdtemp(prefix="soak_evidence_")
+    stop = threading.Event()
+    process = psutil.Process()
+    started = time.time()
+
+    drivers = [InterviewDriver(api, index, args.questions, args.answer_seconds, stop) for index in range(args.sessions)]
+    vision = None
+    if not args.no_vision:
+        from benchmarks.corpus import load_frames
+        frames = (load_frames(limit=64) if args.corpus else None) or synthetic_frames()
+        vision = VisionDriver(frames, args.fps, args.event_interval, directory, stop)
+        vision.thread.start()
+    for driver in drivers:
+        driver.thread.start()
+
+    samples = []
+    baseline_snapshot = None
+    warmup_end = args.duration * args.warmup
+    try:
+        while time.time() - started < args.duration:
+            time.sleep(min(args.sample_interval, max(0.0, args.duration - (time.time() - started))))
+            samples.append(sample(process, api, directory, started))
+            latest = samples[-1]
+            print(f"[{latest['t']:7.0f} s] RSS {latest['rss_mb']:.0f} MB, threads {latest['threads']}"
+                  f"/{latest['native_threads']}, fds {latest['fds']}, traced {latest['traced_mb']:.1f} MB, "
+                  f"completed interviews {latest['completed_interviews']}, evidence {latest['evidence_mb']:.1f} MB")
+            if baseline_snapshot is None and latest["t"] >= warmup_end:
+                baseline_snapshot = tracemalloc.take_snapshot()
+    except KeyboardInterrupt:
+        print("Interrupted; analyzing the samples so far")
+    final_snapshot = tracemalloc.take_snapshot()
+    stop.set()
+    for driver in drivers:
+        driver.thread.join(timeout=30)
+    if vision is not None:
+        vision.thread.join(timeout=30)
+        vision.close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+    steady = [entry for entry in samples if entry["t"] >= warmup_end]
+    limits = {
+        "rss_mb": ("slope", args.max_rss_mb_per_hour),
+        "traced_mb": ("slope", args.max_traced_mb_per_hour),
+        "threads": ("growth", args.max_thread_growth),
+        "native_threads": ("growth", args.max_thread_growth),
+        "fds": ("growth", args.max_fd_growth),
+        "candidate_sessions": (None, None),
+        "completed_interviews": (None, None),
+        "evidence_mb": (None, None),
+    }
+    failures = []
+    print(f"\nAfter warmup ({len(steady)} samples, {steady[-1]['t'] - steady[0]['t'] if steady else 0:.0f} s):")
+    for key, (kind, limit) in limits.items():
+        slope, total = growth(steady, key)
+        verdict = ""
+        if kind == "slope" and slope > limit:
+            verdict = f"LEAK? grows {slope:.1f}/h (max {limit}/h)"
+        elif kind == "growth" and total > limit:
+            verdict = f"LEAK? grew by {total:.0f} (max {limit})"
+        if verdict:
+            failures.append(f"{key}: {verdict}")
+        print(f"  {key:<22} {slope:>+10.2f}/h  total {total:>+9.2f}  {verdict or ('ok' if kind else 'retained by design')}")
+
+    interviews = sum(driver.completed for driver in drivers)
+    driver_errors = sum(driver.errors for driver in drivers)
+    print(f"Interviews completed: {interviews}, driver errors: {driver_errors}")
+    if vision is not None:
+        print(f"Frames processed: {vision.processed}, evidence events: {vision.events}")
+
+    if baseline_snapshot is not None:
+        print("Largest traced memory growth since warmup:")
+        for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+            print(f"  {stat}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"args": vars(args), "samples": samples, "failures": failures,
+                       "interviews": interviews, "driver_errors": driver_errors}, f, indent=2)
+        print(f"Samples saved to {args.save}")
+
+    if failures or driver_errors:
+        print("SOAK TEST FAILED")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("Soak test passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
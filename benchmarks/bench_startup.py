@@ -0,0 +1,72 @@
+"""
+Startup regression check for the interview API: import time of interview_api,
+time until `/` first answers 200, and which heavy integrations were imported
+on the way (none should be; they load on first use).
+
+Each measurement runs in a fresh interpreter so nothing is cached. Exits with
+status 1 when a budget is exceeded or a heavy module was imported eagerly.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --max-import-s 1.5
+"""
+import argparse
+import json
+import subprocess
+import sys
+import numpy as np
+
+# Integrations that must not be imported by `import interview_api`
+HEAVY_MODULES = [
+    "sounddevice", "soundfile", "pydub", "groq", "gtts", "langdetect",
+    "langchain", "langchain_google_genai", "PyPDF2",
+    "torch", "ultralytics", "dlib",
+]
+
+# Runs in the child interpreter and prints one JSON line
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import interview_api
+imported = time.perf_counter()
+response = interview_api.app.test_client().get("/")
+served = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "first_200_s": served - start,
+    "status": response.status_code,
+    "heavy": [name for name in %r if name in sys.modules],
+}))
+"""
+
+def probe():
+    output = subprocess.run([sys.executable, "-c", PROBE % HEAVY_MODULES],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--max-import-s", type=float, default=2.0, help="Budget for the median import time")
+    parser.add_argument("--max-first-200-s", type=float, default=2.5, help="Budget for the median time to first 200")
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.runs)]
+    import_s = np.median([result["import_s"] for result in results])
+    first_200_s = np.median([result["first_200_s"] for result in results])
+    statuses = {result["status"] for result in results}
+    heavy = sorted({name for result in results for name in result["heavy"]})
+
+    print(f"Runs: {args.runs}")
+    print(f"Import interview_api: median {import_s:.3f} s (max {args.max_import_s:.3f} s)")
+    print(f"First 200 on /:       median {first_200_s:.3f} s (max {args.max_first_200_s:.3f} s), statuses {sorted(statuses)}")
+    print(f"Heavy modules imported eagerly: {', '.join(heavy) or 'none'}")
+
+    if import_s > args.max_import_s or first_200_s > args.max_first_200_s or statuses != {200} or heavy:
+        print("STARTUP CHECK FAILED")
+        return 1
+    print("Startup check passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Vision micro-benchmark suite: replays a fixed slice of the screenshot corpus
+through each analyzer on its own and through main.py's per-frame pipeline,
+and reports per case:
+
+    p50 / p95 / p99 latency per frame, frames per second,
+    peak RSS of the process running the case, and Python-level
+    allocations per frame (tracemalloc: peak and retained KB, on a
+    separate pass so tracing does not distort the timings).
+
+Native allocations inside dlib and torch are not visible to tracemalloc;
+numpy arrays and everything allocated from Python are.
+
+Each case runs in a fresh interpreter so peak RSS and model loading are
+attributed to that case alone. Save a run with --save and compare a later
+run against it with --baseline; the check exits with status 1 when a case
+got slower than --tolerance allows.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite --save bench_results.json
+    python -m benchmarks.bench_suite --baseline bench_results.json --tolerance 0.15
+    python -m benchmarks.bench_suite --cases gaze head --limit 50 --repeat 5
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.corpus import load_frames
+
+CASES = ["landmarks", "gaze", "head", "mobile", "pipeline"]
+
+# Neutral calibration so head pose runs its full classification path
+CALIBRATED_ANGLES = (0.0, 0.0, 0.0)
+
+# Metrics compared against the baseline: larger is worse for latencies, smaller for fps
+LATENCY_METRICS = ["p50_ms", "p95_ms"]
+
+def build_case(name):
+    """
+    Returns fn(frame) running one frame through the named case, with main.py's
+    session settings except tracking: the corpus holds unrelated screenshots,
+    so every frame gets a full face detection.
+    """
+    from vision_session import VisionSession
+    session = VisionSession(tracking=False, detection_scale="auto")
+
+    if name == "landmarks":
+        return lambda frame: session.stage.process(frame).landmarks
+    if name == "gaze":
+        return lambda frame: session.gaze.process(frame)
+    if name == "head":
+        return lambda frame: session.head.process(frame, CALIBRATED_ANGLES)
+    if name == "mobile":
+        return lambda frame: session.phone.process(frame)
+    if name == "pipeline":
+        # main.py's "threads" mode: shared landmark stage, the three analyzers
+        # on a thread pool, and the annotated frame composited for display
+        from overlay import compose
+        executor = ThreadPoolExecutor(max_workers=3)
+
+        def pipeline(frame):
+            context = session.stage.process(frame)
+            futures = [
+                executor.submit(session.gaze.process, frame, context),
+                executor.submit(session.head.process, frame, CALIBRATED_ANGLES, context),
+                executor.submit(session.phone.process, frame),
+            ]
+            layers = [future.result()[0] for future in futures]
+            return compose(frame, *layers)
+        return pipeline
+    raise ValueError(f"Unknown case '{name}'. Choose from: {', '.join(CASES)}")
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows has no resource module; psutil reports the peak working set there
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def run_case(name, limit, repeat):
+    """Measures one case in this process. Returns its result dict."""
+    frames = load_frames(limit=limit)
+    if not frames:
+        raise SystemExit(1)
+    fn = build_case(name)
+    for frame in frames[:3]:
+        fn(frame)  # Warm up models and caches
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            fn(frame)
+            timings.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+    timings = np.array(timings)
+
+    tracemalloc.start()
+    peaks = []
+    baseline, _ = tracemalloc.get_traced_memory()
+    for frame in frames:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "frames": len(timings),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "mean_ms": float(timings.mean()),
+        "fps": len(timings) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "alloc_peak_kb_per_frame": float(np.mean(peaks)) / 1024,
+        "retained_kb_per_frame": (retained - baseline) / len(frames) / 1024,
+    }
+
+def run_case_isolated(name, limit, repeat):
+    command = [sys.executable, "-m", "benchmarks.bench_suite", "--child", name,
+               "--limit", str(limit), "--repeat", str(repeat)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages of `results` against `baseline`."""
+    regressions = []
+    for name, case in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if case[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {previous[metric]:.2f} -> {case[metric]:.2f}")
+        if case["fps"] < previous["fps"] * (1 - tolerance):
+            regressions.append(f"{name} fps: {previous['fps']:.1f} -> {case['fps']:.1f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES, help="Cases to run")
+    parser.add_argument("--limit", type=int, default=100, help="Number of screenshots to replay")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to check against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown against the baseline (0.10 = 10%%)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(args.child, args.limit, args.repeat)))
+        return 0
+
+    results = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "limit": args.limit,
+        "repeat": args.repeat,
+        "cases": {},
+    }
+    print(f"{'case':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fps':>7} {'peak RSS':>9} "
+          f"{'alloc KB':>9} {'kept KB':>8}")
+    for name in args.cases:
+        case = run_case_isolated(name, args.limit, args.repeat)
+        results["cases"][name] = case
+        print(f"{name:<10} {case['p50_ms']:>8.2f} {case['p95_ms']:>8.2f} {case['p99_ms']:>8.2f} "
+              f"{case['fps']:>7.1f} {case['peak_rss_mb']:>7.0f}MB {case['alloc_peak_kb_per_frame']:>9.1f} "
+              f"{case['retained_kb_per_frame']:>8.2f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"REGRESSION against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regression against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Frames per second of the vision analyzers (landmarks, gaze, head pose, phone)
+against the number of cores used: a thread pool (main.py's default mode) and
+the process pool with the shared-memory frame ring, for 1..N workers.
+
+The stored screenshots are replayed as `--streams` independent candidate
+streams, since one stream's temporal state is pinned to one worker per
+analyzer group.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_vision_pool --limit 100 --streams 8
+    python -m benchmarks.bench_vision_pool --workers 1 2 4 8 --no-phone
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from vision_pool import VisionWorkerPool
+from vision_session import VisionSession
+from benchmarks.corpus import load_frames
+
+FRAME_SIZE = (640, 480)
+
+def run_threads(frames, streams, workers, analyzers):
+    sessions = [VisionSession(tracking=False) for _ in range(streams)]
+
+    def analyze(stream_id, frame):
+        session = sessions[stream_id]
+        if "mobile" in analyzers:
+            session.phone.process(frame)
+        context = session.stage.process(frame)
+        session.gaze.process(frame, context)
+        session.head.process(frame, (0.0, 0.0, 0.0), context)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        futures = [executor.submit(analyze, index % streams, frame) for index, frame in enumerate(frames)]
+        for future in futures:
+            future.result()
+        return len(frames) / (time.perf_counter() - start)
+
+def run_processes(frames, streams, workers, analyzers):
+    # This process already ran the thread pool and torch, so forking it is unsafe
+    pool = VisionWorkerPool(workers=workers, start_method="spawn", tracking=False)
+    try:
+        # Start the workers and load their models outside the timed region
+        for stream_id in range(streams):
+            pool.process(frames[0], analyzers, stream_id, (0.0, 0.0, 0.0), timeout=None)
+
+        start = time.perf_counter()
+        done = 0
+        for index, frame in enumerate(frames):
+            while pool.submit(frame, analyzers, index % streams, (0.0, 0.0, 0.0)) is None:
+                done += pool.get_result() is not None  # Ring full: wait for a slot
+        while done < len(frames):
+            done += pool.get_result() is not None
+        return len(frames) / (time.perf_counter() - start)
+    finally:
+        pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cores = os.cpu_count() or 1
+    parser.add_argument("--limit", type=int, default=100, help="Number of screenshots to replay")
+    parser.add_argument("--repeat", type=int, default=2, help="Passes over the corpus")
+    parser.add_argument("--streams", type=int, default=cores, help="Simulated candidate streams")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, max(1, cores // 2), cores}), help="Worker counts to measure")
+    parser.add_argument("--no-phone", action="store_true", help="Skip phone detection (dlib path only)")
+    args = parser.parse_args()
+
+    frames = [cv2.resize(frame, FRAME_SIZE) for frame in load_frames(limit=args.limit)] * args.repeat
+    if not frames:
+        return
+    analyzers = ("gaze", "head") if args.no_phone else ("gaze", "head", "mobile")
+
+    print(f"Frames: {len(frames)}, streams: {args.streams}, cores: {cores}, analyzers: {', '.join(analyzers)}")
+    print(f"{'workers':>7} {'threads fps':>12} {'processes fps':>14} {'speedup':>8}")
+    for workers in args.workers:
+        threads_fps = run_threads(frames, args.streams, workers, analyzers)
+        processes_fps = run_processes(frames, args.streams, workers, analyzers)
+        print(f"{workers:>7} {threads_fps:>12.1f} {processes_fps:>14.1f} {processes_fps / threads_fps:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import glob
+import cv2
+
+# Screenshot directories written by main.py (log/, log_Devam/, log_Raj/, ...)
+CORPUS_GLOB = "log*/*"
+CORPUS_EXTENSIONS = (".png", ".jpg", ".webp")
+
+def list_corpus(pattern=CORPUS_GLOB, limit=None):
+    """
+    Returns the sorted screenshot paths matching `pattern`, at most `limit` of them.
+    """
+    paths = sorted(path for path in glob.glob(pattern) if path.lower().endswith(CORPUS_EXTENSIONS))
+    if limit is not None:
+        paths = paths[:limit]
+    return paths
+
+def load_frames(pattern=CORPUS_GLOB, limit=None):
+    """
+    Loads the stored screenshots as BGR frames, skipping unreadable files.
+    """
+    frames = []
+    for path in list_corpus(pattern, limit):
+        frame = cv2.imread(path)
+        if frame is not None:
+            frames.append(frame)
+    if not frames:
+        print(f"WARNING: No frames found for {pattern} (run from the repository root)")
+    return frames
@@ -0,0 +1,266 @@
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+from evidence_writer import encode_frame
+
+CLIP_SECONDS_BEFORE = 5.0       # Seconds of video kept before an event
+CLIP_SECONDS_AFTER = 5.0        # Seconds recorded after an event
+CLIP_MAX_SECONDS = 60.0         # Longest clip that triggers inside its window are merged into
+CLIP_QUALITY = 70               # JPEG quality of frames in the ring
+CLIP_RING_MAX_BYTES = 64 * 2**20  # Hard cap on the encoded frames held in memory
+CLIP_ENCODE_QUEUE_SIZE = 4      # Raw frames waiting for the encoder; the oldest is dropped beyond this
+CLIP_WRITE_QUEUE_SIZE = 8       # Finished clips waiting to be written
+
+class ClipRecorder:
+    """
+    Keeps the last few seconds of video as JPEG bytes in memory and turns
+    events into short clips covering CLIP_SECONDS_BEFORE seconds before and
+    CLIP_SECONDS_AFTER seconds after the event. A trigger that falls inside
+    the window of a clip of the same event type and direction still recording
+    extends that clip instead of starting an overlapping one (up to
+    CLIP_MAX_SECONDS), so a sustained violation that fires every few seconds
+    yields one continuous clip. Other events always get a clip of their own.
+
+    add() and trigger() never block frame processing: frames are handed to an
+    encoder thread through a small drop-oldest queue, and finished clips are
+    written (MJPG .avi, or into an EvidenceStore) by a separate writer thread.
+    The ring and the clips still recording hold at most `max_bytes` of
+    encoded frames together; the oldest ring frames are evicted first.
+    """
+    def __init__(self, directory="clips", seconds_before=CLIP_SECONDS_BEFORE, seconds_after=CLIP_SECONDS_AFTER,
+                 quality=CLIP_QUALITY, max_bytes=CLIP_RING_MAX_BYTES, store=None, session=None,
+                 max_seconds=CLIP_MAX_SECONDS):
+        self.directory = directory
+        self.seconds_before = seconds_before
+        self.seconds_after = seconds_after
+        self.max_seconds = max_seconds
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.store = store
+        self.session = session
+        if store is None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._ring = deque()            # (timestamp, jpeg bytes)
+        self._ring_bytes = 0
+        self._pending = []              # Clips still collecting post-event frames
+        self._frames = deque(maxlen=CLIP_ENCODE_QUEUE_SIZE)
+        self._events = deque()          # Events are never dropped, unlike frames
+        self._memory_bytes = 0
+        self._clips = deque(maxlen=CLIP_WRITE_QUEUE_SIZE)
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        # Counters
+        self.encoded = 0
+        self.dropped_frames = 0
+        self.evicted_frames = 0
+        self.clips_written = 0
+        self.clips_dropped = 0
+        self.clips_failed = 0
+        self.merged_triggers = 0
+        self.peak_bytes = 0
+
+        self._encoder = threading.Thread(target=self._encode_loop, name="clip-encoder", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="clip-writer", daemon=True)
+        self._encoder.start()
+        self._writer.start()
+
+    def add(self, frame, timestamp=None):
+        """Queues a captured frame for the ring. `frame` must not be modified afterwards."""
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped_frames += 1
+            self._frames.append((frame, time.time() if timestamp is None else timestamp))
+            self._cond.notify_all()
+
+    def trigger(self, event_type, direction=None, timestamp=None):
+        """
+        Starts a clip around an event at `timestamp` (capture time of the
+        triggering frame), or extends the pending clip whose window covers it.
+        """
+        with self._cond:
+            self._events.append((event_type, direction, time.time() if timestamp is None else timestamp))
+            self._cond.notify_all()
+
+    def _encode_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._frames or self._events or self._stopped)
+                if self._events:
+                    self._start_clip(*self._events.popleft())
+                    continue
+                if not self._frames:
+                    break
+                frame, timestamp = self._frames.popleft()
+            try:
+                data = encode_frame(frame, "jpg", self.quality)
+            except Exception as e:
+                print(f"Error encoding clip frame: {str(e)}")
+                continue
+            self.encoded += 1
+            self._append(timestamp, data)
+        # Stopping: write whatever the pending clips collected so far
+        for clip in self._pending:
+            self._finish_clip(clip)
+        self._pending = []
+
+    def _append(self, timestamp, data):
+        self._ring.append((timestamp, data))
+        self._ring_bytes += len(data)
+        for clip in list(self._pending):
+            if timestamp > clip["end"]:
+                self._pending.remove(clip)
+                self._finish_clip(clip)
+            elif timestamp >= clip["start"]:
+                clip["frames"].append((timestamp, data))
+
+        # Keep only what a new clip could need
+        while self._ring and self._ring[0][0] < timestamp - self.seconds_before:
+            self._pop_ring()
+        # Enforce the memory cap over the ring and the pending clips together:
+        # evict the oldest ring frames first, then cut the oldest clip short
+        self._memory_bytes = self._count_memory()
+        while self._memory_bytes > self.max_bytes and (self._ring or self._pending):
+            if self._ring:
+                self._pop_ring()
+                self.evicted_frames += 1
+            else:
+                self._finish_clip(self._pending.pop(0))
+            self._memory_bytes = self._count_memory()
+        self.peak_bytes = max(self.peak_bytes, self._memory_bytes)
+
+    def _pop_ring(self):
+        _, old = self._ring.popleft()
+        self._ring_bytes -= len(old)
+
+    def _count_memory(self):
+        # Clips share the bytes objects of the ring, so each frame counts once
+        seen = {id(data) for _, data in self._ring}
+        total = self._ring_bytes
+        for clip in self._pending:
+            for _, data in clip["frames"]:
+                if id(data) not in seen:
+                    seen.add(id(data))
+                    total += len(data)
+        return total
+
+    def _start_clip(self, event_type, direction, timestamp):
+        start = timestamp - self.seconds_before
+        end = timestamp + self.seconds_after
+        for clip in self._pending:
+            same_event = clip["event_type"] == event_type and clip["direction"] == direction
+            if same_event and clip["start"] <= timestamp <= clip["end"]:
+                if end - clip["start"] <= self.max_seconds:
+                    # Inside a clip still recording: record on instead of packing the same frames twice
+                    clip["end"] = max(clip["end"], end)
+                    self.merged_triggers += 1
+                    return
+                # That clip is at its maximum length: continue where it ends
+                start = max(start, clip["end"])
+        self._pending.append({
+            "event_type": event_type,
+            "direction": direction,
+            "timestamp": timestamp,
+            "start": start,
+            "end": end,
+            # The ring holds bytes objects, so this shares them instead of copying
+            "frames": [(frame_time, data) for frame_time, data in self._ring if frame_time >= start],
+        })
+
+    def _finish_clip(self, clip):
+        with self._cond:
+            if len(self._clips) == self._clips.maxlen:
+                self.clips_dropped += 1
+            self._clips.append(clip)
+            self._cond.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._clips or (self._stopped and not self._encoder.is_alive()))
+                if not self._clips:
+                    return
+                clip = self._clips.popleft()
+            try:
+                location = self._write_clip(clip)
+                self.clips_written += 1
+                print(f"Clip saved: {location}")
+            except Exception as e:
+                self.clips_failed += 1
+                print(f"Error writing clip: {str(e)}")
+
+    def _write_clip(self, clip):
+        frames = clip["frames"]
+        if not frames:
+            raise ValueError("no frames recorded around the event")
+        duration = frames[-1][0] - frames[0][0]
+        fps = max(1.0, (len(frames) - 1) / duration) if duration > 0 else 15.0
+        name = f"{clip['event_type']}_{clip['direction'] or 'detected'}_{int(clip['timestamp'])}.avi"
+
+        if self.store is None:
+            path = os.path.join(self.directory, name)
+            self._encode_avi(path, frames, fps)
+            return path
+
+        handle, path = tempfile.mkstemp(suffix=".avi")
+        os.close(handle)
+        try:
+            self._encode_avi(path, frames, fps)
+            with open(path, "rb") as f:
+                data = f.read()
+        finally:
+            os.remove(path)
+        event_id = self.store.add_event(self.session, f"{clip['event_type']}_clip", clip["direction"],
+                                        clip["timestamp"], data, "avi")
+        return f"evidence event {event_id} ({self.session}, {clip['event_type']}_clip, {clip['direction']})"
+
+    def _encode_avi(self, path, frames, fps):
+        writer = None
+        try:
+            for _, data in frames:
+                image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if writer is None:
+                    height, width = image.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+                writer.write(image)
+        finally:
+            if writer is not None:
+                writer.release()
+
+    @property
+    def memory_bytes(self):
+        """Encoded bytes held by the ring and the pending clips, as of the last encoded frame."""
+        return self._memory_bytes
+
+    def close(self, timeout=10.0):
+        """Finishes pending clips with the frames recorded so far and stops both threads."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._encoder.join(timeout)
+        with self._cond:
+            self._cond.notify_all()
+        self._writer.join(timeout)
+
+    def stats(self):
+        return {
+            "ring_frames": len(self._ring),
+            "ring_bytes": self._ring_bytes,
+            "memory_bytes": self.memory_bytes,
+            "peak_bytes": self.peak_bytes,
+            "max_bytes": self.max_bytes,
+            "encoded": self.encoded,
+            "dropped_frames": self.dropped_frames,
+            "evicted_frames": self.evicted_frames,
+            "pending_clips": len(self._pending),
+            "queued_frames": len(self._frames),
+            "clips_written": self.clips_written,
+            "clips_dropped": self.clips_dropped,
+            "clips_failed": self.clips_failed,
+            "merged_triggers": self.merged_triggers,
+        }
@@ -13,10 +13,85 @@ def log_error(message):
     except:
         pass  # If logging fails, silently continue
 
+class FrameSequence:
+    """
+    Latest-frame slot shared between a capture thread and one consumer.
+
+    Every published frame gets an increasing sequence number and a capture
+    timestamp. read_next() blocks on a condition variable until a frame newer
+    than the last one handed out exists, so consumers never busy-loop or
+    process the same frame twice. Frames replaced before anyone read them are
+    counted as dropped; frames handed out again by read() count as duplicated.
+    """
+    def __init__(self, frame=None):
+        self._cond = threading.Condition()
+        self.frame = frame
+        self.seq = 0
+        self.timestamp = None
+        self.closed = False
+        self._consumed_seq = 0
+
+        # Counters
+        self.captured = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.duplicated = 0
+
+    def publish(self, frame, timestamp=None):
+        with self._cond:
+            self.frame = frame
+            self.seq += 1
+            self.timestamp = time.time() if timestamp is None else timestamp
+            self.captured += 1
+            self._cond.notify_all()
+
+    def _consume(self):
+        if self.seq == self._consumed_seq:
+            self.duplicated += 1
+        else:
+            self.consumed += 1
+            # Sequence numbers start at 1, so frames replaced before the first read count too
+            self.dropped += self.seq - self._consumed_seq - 1
+        self._consumed_seq = self.seq
+        return self.seq, self.timestamp, self.frame
+
+    def read(self):
+        """Returns (seq, timestamp, frame) for the latest frame without waiting."""
+        with self._cond:
+            return self._consume()
+
+    def read_next(self, timeout=None):
+        """
+        Waits until a frame newer than the last one returned exists and returns
+        (seq, timestamp, frame). Returns None on timeout or once closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.seq > self._consumed_seq or self.closed, timeout):
+                return None
+            if self.seq <= self._consumed_seq:
+                return None
+            return self._consume()
+
+    def close(self):
+        """Wakes up any reader blocked in read_next()."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "captured": self.captured,
+                "consumed": self.consumed,
+                "dropped": self.dropped,
+                "duplicated": self.duplicated,
+            }
+
 # Threaded video capture class
 class VideoStream:
     def __init__(self, src=0):
         # Create a dummy frame as fallback
+        self.frames = FrameSequence()
         self.frame = self._create_dummy_frame()
         self.camera_initialized = False
         self.stopped = False
@@ -53,6 +128,7 @@ class VideoStream:
             threading.Thread(target=self.update, daemon=True).start()
         else:
             self.stopped = True
+            self.frames.close()
             error_msg = "WARNING: Could not initialize any camera. Using dummy frames."
             print(error_msg)
             log_error(error_msg)
@@ -145,6 +221,8 @@ class VideoStream:
                         restart_attempts = 0
                 else:
                     print("Warning: Failed to read frame from camera")
+                    # Back off briefly so a failing camera does not spin this loop
+                    time.sleep(0.03)
                     
                     # Only attempt restart if we haven't reached max attempts
                     current_time = time.time()
@@ -183,16 +261,36 @@ class VideoStream:
                 log_error(error_msg)
                 self.camera_initialized = False
                 self.frame = self._create_dummy_frame()
-                
-            # Small sleep to prevent excessive CPU usage
-            time.sleep(0.03)  
+            # No sleep on success: cap.read() blocks until the camera delivers
+            # the next frame, so the camera's frame rate paces this loop
+
+    @property
+    def frame(self):
+        return self.frames.frame
+
+    @frame.setter
+    def frame(self, frame):
+        # Every new frame (camera or dummy) gets a sequence number and timestamp
+        self.frames.publish(frame)
 
     def read(self):
         """Return the current frame"""
-        return self.frame
+        return self.frames.read()[2]
+
+    def read_next(self, timeout=None):
+        """
+        Block until a frame newer than the last one read exists.
+        Returns (seq, timestamp, frame), or None on timeout or after stop().
+        """
+        return self.frames.read_next(timeout)
+
+    def stats(self):
+        """Captured, consumed, dropped and duplicated frame counts"""
+        return self.frames.stats()
 
     def stop(self):
         """Stop the video capture thread"""
         self.stopped = True
+        self.frames.close()
         if hasattr(self, 'cap') and self.camera_initialized:
-            self.cap.release() 
\ No newline at end of file
+            self.cap.release()
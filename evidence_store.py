@@ -0,0 +1,259 @@
+"""
+Evidence store: screenshots as content-addressed blobs in append-only pack
+files, indexed in SQLite by session, event type, direction and timestamp.
+
+One-shot import of the existing log directories (from the repository root):
+    python evidence_store.py import log log_Devam log_Raj log_Sai log_Vishal log_Dhiraj
+    python evidence_store.py sessions
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+# Location of the index and pack files
+EVIDENCE_ROOT = os.getenv("EVIDENCE_ROOT", "evidence")
+PACK_SIZE_LIMIT = 256 * 2**20   # Start a new pack file beyond this many bytes
+
+MIMETYPES = {"png": "image/png", "jpg": "image/jpeg", "webp": "image/webp", "avi": "video/x-msvideo"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    pack TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    format TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    direction TEXT,
+    timestamp REAL NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs(digest),
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS events_session_time ON events(session, timestamp);
+CREATE INDEX IF NOT EXISTS events_type_direction ON events(event_type, direction, timestamp);
+CREATE UNIQUE INDEX IF NOT EXISTS events_source ON events(source) WHERE source IS NOT NULL;
+"""
+
+# Screenshot names written by main.py: head_<direction>_<ts>, eye_<direction>_<ts>,
+# mobile_detected_<ts>. Older head screenshots taken during calibration carry the
+# stringified angle tuple "(np.float64(..), ...)" instead of a direction.
+EVIDENCE_NAME = re.compile(r"^(?P<type>head|eye|mobile)_(?P<direction>.*?)_?(?P<timestamp>\d+(\.\d+)?)$")
+
+def parse_evidence_name(filename):
+    """
+    Returns (event_type, direction, timestamp) for a screenshot file name, or
+    None if it does not follow main.py's naming. Calibration-angle names map
+    to event type "calibration" without a direction.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = EVIDENCE_NAME.match(stem)
+    if match is None:
+        return None
+    event_type = match.group("type")
+    direction = match.group("direction") or None
+    if event_type == "mobile":
+        direction = None
+    elif direction is not None and direction.startswith("("):
+        event_type, direction = "calibration", None
+    return event_type, direction, float(match.group("timestamp"))
+
+class EvidenceStore:
+    """
+    SQLite-indexed, content-addressed evidence storage.
+
+    Each screenshot's bytes are stored once, keyed by their SHA-256, at an
+    offset in an append-only pack file (so identical frames are stored once and
+    the file system holds a few large files instead of thousands of small
+    ones). Events reference blobs and are queried through the index rather
+    than by scanning directories. Safe to share between threads.
+    """
+    def __init__(self, root=EVIDENCE_ROOT, pack_size_limit=PACK_SIZE_LIMIT):
+        self.root = root
+        self.pack_size_limit = pack_size_limit
+        os.makedirs(os.path.join(root, "packs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pack = self._current_pack()
+
+    def _current_pack(self):
+        packs = sorted(glob.glob(os.path.join(self.root, "packs", "pack-*.bin")))
+        if packs and os.path.getsize(packs[-1]) < self.pack_size_limit:
+            return os.path.basename(packs[-1])
+        return f"pack-{len(packs):05d}.bin"
+
+    def _pack_path(self, pack):
+        return os.path.join(self.root, "packs", pack)
+
+    def put_blob(self, data, fmt):
+        """Stores `data` unless an identical blob exists. Returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                return digest
+            path = self._pack_path(self._pack)
+            if os.path.exists(path) and os.path.getsize(path) >= self.pack_size_limit:
+                self._pack = self._current_pack()
+                path = self._pack_path(self._pack)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            with self._db:
+                self._db.execute("INSERT INTO blobs (digest, pack, offset, length, format) VALUES (?, ?, ?, ?, ?)",
+                                 (digest, self._pack, offset, len(data), fmt))
+        return digest
+
+    def add_event(self, session, event_type, direction, timestamp, data, fmt, source=None):
+        """
+        Stores one screenshot and indexes it. Returns the event id, or None if
+        `source` was already imported.
+        """
+        return self.link_event(session, event_type, direction, timestamp, self.put_blob(data, fmt), source)
+
+    def link_event(self, session, event_type, direction, timestamp, digest, source=None):
+        """
+        Indexes an event whose screenshot is the already stored blob `digest`
+        (e.g. a near-duplicate of an earlier one). Returns the event id, or None
+        if `source` was already imported.
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO events (session, event_type, direction, timestamp, digest, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session, event_type, direction, timestamp, digest, source))
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def read_blob(self, digest):
+        """Returns (bytes, format) of a stored blob, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT pack, offset, length, format FROM blobs WHERE digest = ?",
+                                   (digest,)).fetchone()
+        if row is None:
+            return None
+        with open(self._pack_path(row["pack"]), "rb") as f:
+            f.seek(row["offset"])
+            return f.read(row["length"]), row["format"]
+
+    def get_event(self, event_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def read_event(self, event_id):
+        """Returns (bytes, format) of an event's screenshot, or None."""
+        event = self.get_event(event_id)
+        return self.read_blob(event["digest"]) if event is not None else None
+
+    def query(self, session=None, event_type=None, direction=None, since=None, until=None, limit=100, offset=0):
+        """Events matching every given filter, oldest first, as dicts."""
+        conditions = []
+        params = []
+        for column, value in (("session", session), ("event_type", event_type), ("direction", direction)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, session, event_type, direction, timestamp, digest FROM events {where} "
+                "ORDER BY timestamp, id LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def sessions(self):
+        """Every session with its event count and time range."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session, COUNT(*) AS events, MIN(timestamp) AS first, MAX(timestamp) AS last "
+                "FROM events GROUP BY session ORDER BY last DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def summary(self, session):
+        """Event counts of `session` by event type and direction."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT event_type, direction, COUNT(*) AS count FROM events WHERE session = ? "
+                "GROUP BY event_type, direction ORDER BY event_type, direction", (session,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            blobs, stored = self._db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM blobs").fetchone()
+            events = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return {"events": events, "blobs": blobs, "bytes": stored}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def session_for_directory(directory):
+    """log_Devam -> "Devam"; any other directory keeps its own name."""
+    name = os.path.basename(os.path.normpath(directory))
+    return name[len("log_"):] if name.startswith("log_") else name
+
+def import_directory(store, directory, session=None):
+    """
+    Imports the screenshots of one log directory into `store` unchanged.
+    Files already imported are skipped. Returns (imported, skipped, unrecognized).
+    """
+    session = session or session_for_directory(directory)
+    imported = skipped = unrecognized = 0
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        fmt = os.path.splitext(path)[1].lower().lstrip(".").replace("jpeg", "jpg")
+        parsed = parse_evidence_name(path)
+        if fmt not in MIMETYPES or parsed is None:
+            unrecognized += 1
+            continue
+        event_type, direction, timestamp = parsed
+        with open(path, "rb") as f:
+            data = f.read()
+        if store.add_event(session, event_type, direction, timestamp, data, fmt, source=os.path.normpath(path)):
+            imported += 1
+        else:
+            skipped += 1
+    return imported, skipped, unrecognized
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=EVIDENCE_ROOT, help="Evidence store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Import log directories (one session per directory)")
+    import_parser.add_argument("directories", nargs="+")
+    commands.add_parser("sessions", help="List sessions in the store")
+    args = parser.parse_args()
+
+    store = EvidenceStore(args.root)
+    try:
+        if args.command == "import":
+            for directory in args.directories:
+                imported, skipped, unrecognized = import_directory(store, directory)
+                print(f"{directory} -> session {session_for_directory(directory)}: {imported} imported, "
+                      f"{skipped} already present, {unrecognized} unrecognized")
+            store_stats = store.stats()
+            print(f"Store: {store_stats['events']} events, {store_stats['blobs']} unique blobs, "
+                  f"{store_stats['bytes'] / 2**20:.1f} MB")
+        else:
+            for session in store.sessions():
+                print(f"{session['session']}: {session['events']} events")
+    finally:
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
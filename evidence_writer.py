@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+from overlay import compose
+from perceptual_hash import DuplicateIndex, dhash
+
+# Encoding of saved evidence frames: "jpg" and "webp" are several times faster
+# to encode than "png" and much smaller on disk
+EVIDENCE_FORMAT = os.getenv("EVIDENCE_FORMAT", "jpg")
+EVIDENCE_QUALITY = int(os.getenv("EVIDENCE_QUALITY", "90"))  # 0-100 for jpg / webp
+EVIDENCE_QUEUE_SIZE = 32        # Frames waiting to be written; the oldest is dropped beyond this
+# Near-duplicate screenshots of the same event within a session: "link" records
+# the event against the earlier screenshot (store only), "skip" drops it, "off" keeps all
+EVIDENCE_DEDUP = os.getenv("EVIDENCE_DEDUP", "link")
+LATENCY_WINDOW = 1000           # Latency samples kept for the statistics
+
+def encode_params(fmt, quality):
+    """cv2.imencode parameters for `fmt` at `quality`."""
+    if fmt == "jpg":
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if fmt == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if fmt == "png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    raise ValueError(f"Unknown evidence format '{fmt}'. Choose from: jpg, webp, png")
+
+def encode_frame(frame, fmt=EVIDENCE_FORMAT, quality=EVIDENCE_QUALITY):
+    """Encodes `frame` to image bytes in `fmt`."""
+    ok, buffer = cv2.imencode(f".{fmt}", frame, encode_params(fmt, quality))
+    if not ok:
+        raise ValueError(f"Could not encode frame as {fmt}")
+    return buffer.tobytes()
+
+class EvidenceWriter:
+    """
+    Saves evidence screenshots on a background thread so the capture loop
+    never waits for encoding or the disk.
+
+    save() only queues the frame and its overlay layers; the writer thread
+    composites the overlays, encodes and writes the file. The queue is
+    bounded: when the disk falls behind, the oldest pending screenshot is
+    dropped (and counted) instead of blocking the caller or growing memory.
+
+    With an EvidenceStore, screenshots are indexed under `session` in the
+    store instead of being written as files into `directory`.
+
+    Before encoding, each frame's perceptual hash is compared with the
+    screenshots already kept for the same event type and direction; near-
+    duplicates are linked to the earlier blob or skipped (see EVIDENCE_DEDUP),
+    so a prolonged event costs one encode and one blob instead of dozens.
+    """
+    def __init__(self, directory="log", fmt=EVIDENCE_FORMAT, quality=EVIDENCE_QUALITY,
+                 queue_size=EVIDENCE_QUEUE_SIZE, store=None, session=None, dedup=EVIDENCE_DEDUP):
+        encode_params(fmt, quality)  # Fail early on an unknown format
+        if dedup not in ("link", "skip", "off"):
+            raise ValueError(f"Unknown dedup policy '{dedup}'. Choose from: link, skip, off")
+        self.directory = directory
+        self.fmt = fmt
+        self.quality = quality
+        self.store = store
+        self.session = session
+        # Files cannot be linked, so without a store duplicates are skipped
+        self.dedup = "skip" if dedup == "link" and store is None else dedup
+        self.duplicates = DuplicateIndex()
+        if store is None:
+            os.makedirs(directory, exist_ok=True)
+        self._queue = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._busy = False
+
+        # Counters and latency samples (milliseconds)
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+        self.max_depth = 0
+        self.encode_ms = deque(maxlen=LATENCY_WINDOW)
+        self.write_ms = deque(maxlen=LATENCY_WINDOW)
+        self.wait_ms = deque(maxlen=LATENCY_WINDOW)
+
+        self._thread = threading.Thread(target=self._run, name="evidence-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, frame, name, layers=(), timestamp=None, event_type=None, direction=None):
+        """
+        Queues `frame` with the annotation `layers` to draw on it, to be written
+        as `<directory>/<name>.<fmt>` (or indexed in the store with `event_type`
+        and `direction`). Returns the path the file will have.
+        `frame` must not be modified afterwards (frames are treated as read-only).
+        """
+        path = os.path.join(self.directory, f"{name}.{self.fmt}")
+        event = (time.time() if timestamp is None else timestamp, event_type, direction)
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append((frame, tuple(layers), path, event, time.perf_counter()))
+            self.queued += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+        return path
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stopped)
+                if not self._queue:
+                    return
+                frame, layers, path, event, queued = self._queue.popleft()
+                self._busy = True
+            try:
+                self._write(frame, layers, path, event, queued)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, frame, layers, path, event, queued):
+        started = time.perf_counter()
+        try:
+            if self.dedup != "off":
+                # Hash the raw frame: the overlays carry counters that change every event
+                value = dhash(frame)
+                key = event[1:]
+                original = self.duplicates.find(key, value)
+                if original is not None:
+                    self._write_duplicate(original, path, event)
+                    return
+            data = encode_frame(compose(frame, *layers) if layers else frame, self.fmt, self.quality)
+            encoded = time.perf_counter()
+            location = self.write_bytes(path, data, event)
+            if self.dedup != "off":
+                self.duplicates.add(key, value, location)
+        except Exception as e:
+            self.failed += 1
+            print(f"Error saving screenshot {path}: {str(e)}")
+            return
+        finished = time.perf_counter()
+        self.written += 1
+        self.bytes_written += len(data)
+        self.wait_ms.append((started - queued) * 1000)
+        self.encode_ms.append((encoded - started) * 1000)
+        self.write_ms.append((finished - encoded) * 1000)
+        print(f"Screenshot saved: {location if self.store is None else f'{self.session}/{event[1]} {location[:12]}'}")
+
+    def write_bytes(self, path, data, event):
+        """
+        Stores one encoded screenshot and returns where it went (the blob digest
+        with a store, else the file path). Runs on the writer thread.
+        """
+        if self.store is not None:
+            timestamp, event_type, direction = event
+            digest = self.store.put_blob(data, self.fmt)
+            self.store.link_event(self.session, event_type, direction, timestamp, digest)
+            return digest
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _write_duplicate(self, original, path, event):
+        self.deduplicated += 1
+        if self.store is None:
+            print(f"Screenshot {path} skipped as a near-duplicate of {original}")
+            return
+        # With a store, `path` is never written; name the event and the blob instead
+        timestamp, event_type, direction = event
+        if self.dedup == "link":
+            self.store.link_event(self.session, event_type, direction, timestamp, original)
+            print(f"Screenshot {self.session}/{event_type} linked to near-duplicate {original[:12]}")
+        else:
+            print(f"Screenshot {self.session}/{event_type} skipped as a near-duplicate of {original[:12]}")
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    def flush(self, timeout=None):
+        """Waits until every queued screenshot is written. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout=5.0):
+        """Writes what is still queued (up to `timeout` seconds) and stops the thread."""
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        def summary(samples):
+            if not samples:
+                return {"mean": 0.0, "p95": 0.0}
+            values = np.array(samples)
+            return {"mean": float(values.mean()), "p95": float(np.percentile(values, 95))}
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "bytes_written": self.bytes_written,
+            "wait_ms": summary(self.wait_ms),
+            "encode_ms": summary(self.encode_ms),
+            "write_ms": summary(self.write_ms),
+        }
@@ -0,0 +1,134 @@
+"""
+Exports the phone detection model for CPU inference.
+
+Examples (from the repository root):
+    python export_mobile_model.py --format onnx --imgsz 480
+    python export_mobile_model.py --format onnx --imgsz 480 --int8
+    python export_mobile_model.py --format openvino --imgsz 480
+
+Set MOBILE_BACKEND=onnx or MOBILE_BACKEND=openvino (and MOBILE_EXPORT_IMGSZ to
+the --imgsz used here) to run mobile_detection with the exported model, then
+check it against PyTorch with `python -m benchmarks.bench_mobile_backends`.
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from mobile_detection import MODEL_PATH, EXPORTED_MODEL_PATHS
+
+# Screenshots used to calibrate INT8 activation ranges
+CALIBRATION_GLOB = "log*/*.png"
+
+def letterbox(frame, imgsz):
+    """
+    Resizes `frame` to fit imgsz x imgsz keeping its aspect ratio and pads with
+    gray (114), the same preprocessing ultralytics applies at inference time.
+    """
+    height, width = frame.shape[:2]
+    ratio = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top = (imgsz - new_h) // 2
+    left = (imgsz - new_w) // 2
+    return cv2.copyMakeBorder(resized, top, imgsz - new_h - top, left, imgsz - new_w - left,
+                              cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+def preprocess(frame, imgsz):
+    """BGR frame -> (1, 3, imgsz, imgsz) float32 RGB tensor in [0, 1]."""
+    image = letterbox(frame, imgsz)[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(image, dtype=np.float32)[None] / 255.0
+
+def export_onnx(imgsz):
+    yolo_model = YOLO(MODEL_PATH)
+    exported = yolo_model.export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+    return str(exported)
+
+def export_openvino(imgsz, half):
+    yolo_model = YOLO(MODEL_PATH)
+    exported = yolo_model.export(format="openvino", imgsz=imgsz, half=half)
+    return str(exported)
+
+def quantize_int8(onnx_path, output_path, imgsz, calibration_glob, calibration_size):
+    """
+    Statically quantizes an ONNX model to INT8 using stored screenshots for calibration.
+    """
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    import onnxruntime
+
+    paths = sorted(glob.glob(calibration_glob))
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found for {calibration_glob}")
+    # Spread the sample across all log directories instead of taking the first N
+    step = max(1, len(paths) // calibration_size)
+    paths = paths[::step][:calibration_size]
+
+    input_name = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class ScreenshotCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(paths)
+
+        def get_next(self):
+            for path in self.paths:
+                frame = cv2.imread(path)
+                if frame is not None:
+                    return {input_name: preprocess(frame, imgsz)}
+            return None
+
+    prepared_path = onnx_path.replace(".onnx", "_prep.onnx")
+    quant_pre_process(onnx_path, prepared_path)
+    try:
+        quantize_static(
+            prepared_path,
+            output_path,
+            ScreenshotCalibrationReader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+    finally:
+        os.remove(prepared_path)
+    print(f"INT8 model calibrated on {len(paths)} screenshots")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--imgsz", type=int, default=480, help="Fixed input size of the exported model")
+    parser.add_argument("--int8", action="store_true", help="Statically quantize the ONNX model to INT8")
+    parser.add_argument("--half", action="store_true", help="FP16 weights (OpenVINO only)")
+    parser.add_argument("--calibration", default=CALIBRATION_GLOB, help="Glob of calibration screenshots")
+    parser.add_argument("--calibration-size", type=int, default=200, help="Number of calibration screenshots")
+    args = parser.parse_args()
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Model file not found at {MODEL_PATH}")
+        return 1
+
+    output_path = EXPORTED_MODEL_PATHS[args.format]
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    if args.format == "onnx":
+        exported = export_onnx(args.imgsz)
+        if args.int8:
+            quantize_int8(exported, output_path, args.imgsz, args.calibration, args.calibration_size)
+        elif os.path.abspath(exported) != os.path.abspath(output_path):
+            shutil.move(exported, output_path)
+    else:
+        if args.int8:
+            print("INT8 is only supported for --format onnx; exporting OpenVINO without quantization")
+        exported = export_openvino(args.imgsz, args.half)
+        if os.path.abspath(exported) != os.path.abspath(output_path):
+            shutil.rmtree(output_path, ignore_errors=True)
+            shutil.move(exported, output_path)
+
+    print(f"Exported {args.format} model to {output_path} (imgsz={args.imgsz})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
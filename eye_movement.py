@@ -1,34 +1,25 @@
 import cv2
-import dlib
-import numpy as np
-import os
+from face_landmarks import default_stage
+from overlay import Annotations
+from metrics import timed, vision_stage_errors, vision_stage_seconds
 
-# Check if model file exists and handle gracefully
-MODEL_PATH = "models/shape_predictor_68_face_landmarks.dat"
-if not os.path.exists(MODEL_PATH):
-    print(f"WARNING: Eye movement detection model file not found at {MODEL_PATH}")
-    print(f"Eye movement detection will be disabled")
-    detector = None
-    predictor = None
-else:
-    # Load dlib's face detector and 68 landmarks model
-    try:
-        detector = dlib.get_frontal_face_detector()
-        predictor = dlib.shape_predictor(MODEL_PATH)
-        print("Eye movement detection initialized successfully")
-    except Exception as e:
-        print(f"Error loading eye movement detection models: {str(e)}")
-        detector = None
-        predictor = None
+# Gaze decision: eye pixels darker than "pupil" (0-255) form the pupil; it is
+# left/right when both pupils sit in the outer 1/"horizontal_parts" of the eye
+# width, up/down when both are above "up" / below "down" of the eye height
+GAZE_THRESHOLDS = {"pupil": 50, "horizontal_parts": 3, "up": 0.3, "down": 0.5}
+
+# Per-call latency reported on /metrics
+GAZE_SECONDS = vision_stage_seconds.labels(stage="gaze")
+GAZE_ERRORS = vision_stage_errors.labels(stage="gaze")
 
-def detect_pupil(eye_region):
+def detect_pupil(eye_region, threshold=GAZE_THRESHOLDS["pupil"]):
     if eye_region is None or eye_region.size == 0:
         return None, None
         
     try:
         gray_eye = cv2.cvtColor(eye_region, cv2.COLOR_BGR2GRAY)
         blurred_eye = cv2.GaussianBlur(gray_eye, (7, 7), 0)
-        _, threshold_eye = cv2.threshold(blurred_eye, 50, 255, cv2.THRESH_BINARY_INV)
+        _, threshold_eye = cv2.threshold(blurred_eye, threshold, 255, cv2.THRESH_BINARY_INV)
         contours, _ = cv2.findContours(threshold_eye, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         if contours:
@@ -39,99 +30,128 @@ def detect_pupil(eye_region):
         pass
     return None, None
 
-def process_eye_movement(frame):
+class GazeAnalyzer:
     """
-    Processes a single frame to detect eye movement/gaze direction.
-    
-    Returns:
-      frame: The output frame with overlaid markings.
-      gaze_direction (str): "Looking Left", "Looking Right", "Looking Up", "Looking Down", or "Looking Center"
+    Gaze analyzer for one candidate stream.
+
+    Gaze is decided per frame, so the analyzer holds no temporal state beyond
+    its landmark stage; the dlib models behind the stage are shared read-only.
     """
-    # Check if models are loaded
-    if detector is None or predictor is None:
-        # Draw text on frame to indicate eye detection is disabled
-        cv2.putText(frame, "Eye Movement Detection Disabled", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        return frame, "Looking Center"  # Default to center as fallback
+    def __init__(self, stage=None, thresholds=None):
+        self.stage = stage if stage is not None else default_stage
+        self.thresholds = dict(GAZE_THRESHOLDS, **(thresholds or {}))
+
+    @timed(GAZE_SECONDS)
+    def process(self, frame, context=None):
+        """
+        Processes a single frame to detect eye movement/gaze direction.
+
+        Args:
+          frame: BGR frame to analyze. It is only read, never drawn on.
+          context: Optional FrameContext shared with other analyzers; landmarks are
+                   computed here when it is not given.
     
-    try:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = detector(gray)
+        Returns:
+          annotations: Annotations (eye boxes, pupils) to draw on the displayed frame.
+          gaze_direction (str): "Looking Left", "Looking Right", "Looking Up", "Looking Down", or "Looking Center"
+        """
+        if context is None:
+            context = self.stage.process(frame)
+        annotations = Annotations()
 
-        for face in faces:
-            try:
-                landmarks = predictor(gray, face)
-                
-                left_eye_points = np.array([(landmarks.part(n).x, landmarks.part(n).y) for n in range(36, 42)])
-                right_eye_points = np.array([(landmarks.part(n).x, landmarks.part(n).y) for n in range(42, 48)])
+        # Check if models are loaded
+        if not context.stage.available:
+            # Indicate on the frame that eye detection is disabled
+            annotations.putText("Eye Movement Detection Disabled", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return annotations, "Looking Center"  # Default to center as fallback
+    
+        try:
+            gaze_direction = "Looking Center"
+
+            for landmarks in context.landmarks:
+                try:
+                    left_eye_points = landmarks[36:42]
+                    right_eye_points = landmarks[42:48]
                 
-                left_eye_rect = cv2.boundingRect(left_eye_points)
-                right_eye_rect = cv2.boundingRect(right_eye_points)
+                    left_eye_rect = cv2.boundingRect(left_eye_points)
+                    right_eye_rect = cv2.boundingRect(right_eye_points)
                 
-                # Make sure the boundaries are within the frame
-                left_x1 = max(0, left_eye_rect[0])
-                left_y1 = max(0, left_eye_rect[1])
-                left_x2 = min(frame.shape[1], left_eye_rect[0] + left_eye_rect[2])
-                left_y2 = min(frame.shape[0], left_eye_rect[1] + left_eye_rect[3])
+                    # Make sure the boundaries are within the frame
+                    left_x1 = max(0, left_eye_rect[0])
+                    left_y1 = max(0, left_eye_rect[1])
+                    left_x2 = min(frame.shape[1], left_eye_rect[0] + left_eye_rect[2])
+                    left_y2 = min(frame.shape[0], left_eye_rect[1] + left_eye_rect[3])
                 
-                right_x1 = max(0, right_eye_rect[0])
-                right_y1 = max(0, right_eye_rect[1])
-                right_x2 = min(frame.shape[1], right_eye_rect[0] + right_eye_rect[2])
-                right_y2 = min(frame.shape[0], right_eye_rect[1] + right_eye_rect[3])
+                    right_x1 = max(0, right_eye_rect[0])
+                    right_y1 = max(0, right_eye_rect[1])
+                    right_x2 = min(frame.shape[1], right_eye_rect[0] + right_eye_rect[2])
+                    right_y2 = min(frame.shape[0], right_eye_rect[1] + right_eye_rect[3])
                 
-                # Extract eye regions with boundary checking
-                if left_x2 > left_x1 and left_y2 > left_y1:
-                    left_eye = frame[left_y1:left_y2, left_x1:left_x2]
-                else:
-                    left_eye = None
+                    # Extract eye regions with boundary checking
+                    if left_x2 > left_x1 and left_y2 > left_y1:
+                        left_eye = frame[left_y1:left_y2, left_x1:left_x2]
+                    else:
+                        left_eye = None
                 
-                if right_x2 > right_x1 and right_y2 > right_y1:
-                    right_eye = frame[right_y1:right_y2, right_x1:right_x2]
-                else:
-                    right_eye = None
+                    if right_x2 > right_x1 and right_y2 > right_y1:
+                        right_eye = frame[right_y1:right_y2, right_x1:right_x2]
+                    else:
+                        right_eye = None
                 
-                left_pupil, left_bbox = detect_pupil(left_eye)
-                right_pupil, right_bbox = detect_pupil(right_eye)
+                    thresholds = self.thresholds
+                    left_pupil, left_bbox = detect_pupil(left_eye, thresholds["pupil"])
+                    right_pupil, right_bbox = detect_pupil(right_eye, thresholds["pupil"])
                 
-                # Draw rectangles around eyes
-                cv2.rectangle(frame, (left_x1, left_y1), (left_x2, left_y2), (0, 255, 0), 2)
-                cv2.rectangle(frame, (right_x1, right_y1), (right_x2, right_y2), (0, 255, 0), 2)
+                    # Draw rectangles around eyes
+                    annotations.rectangle((left_x1, left_y1), (left_x2, left_y2), (0, 255, 0), 2)
+                    annotations.rectangle((right_x1, right_y1), (right_x2, right_y2), (0, 255, 0), 2)
                 
-                if left_pupil and left_eye is not None:
-                    cv2.circle(frame, (left_x1 + left_pupil[0], left_y1 + left_pupil[1]), 5, (0, 0, 255), -1)
-                if right_pupil and right_eye is not None:
-                    cv2.circle(frame, (right_x1 + right_pupil[0], right_y1 + right_pupil[1]), 5, (0, 0, 255), -1)
+                    if left_pupil and left_eye is not None:
+                        annotations.circle((left_x1 + left_pupil[0], left_y1 + left_pupil[1]), 5, (0, 0, 255), -1)
+                    if right_pupil and right_eye is not None:
+                        annotations.circle((right_x1 + right_pupil[0], right_y1 + right_pupil[1]), 5, (0, 0, 255), -1)
                 
-                if left_pupil and right_pupil and left_eye is not None and right_eye is not None:
-                    lx, ly = left_pupil
-                    rx, ry = right_pupil
+                    if left_pupil and right_pupil and left_eye is not None and right_eye is not None:
+                        lx, ly = left_pupil
+                        rx, ry = right_pupil
                     
-                    eye_width = left_eye_rect[2]
-                    eye_height = left_eye_rect[3]
-                    norm_ly, norm_ry = ly / eye_height if eye_height > 0 else 0, ry / eye_height if eye_height > 0 else 0
+                        eye_width = left_eye_rect[2]
+                        eye_height = left_eye_rect[3]
+                        norm_ly, norm_ry = ly / eye_height if eye_height > 0 else 0, ry / eye_height if eye_height > 0 else 0
                     
-                    if lx < eye_width // 3 and rx < eye_width // 3:
-                        gaze_direction = "Looking Left"
-                    elif lx > 2 * eye_width // 3 and rx > 2 * eye_width // 3:
-                        gaze_direction = "Looking Right"
-                    elif norm_ly < 0.3 and norm_ry < 0.3:
-                        gaze_direction = "Looking Up"
-                    elif norm_ly > 0.5 and norm_ry > 0.5:
-                        gaze_direction = "Looking Down"
-                    else:
-                        gaze_direction = "Looking Center"
-            except Exception as landmark_error:
-                # Just continue to next face if error with landmarks
-                continue
+                        parts = thresholds["horizontal_parts"]
+                        if lx < eye_width // parts and rx < eye_width // parts:
+                            gaze_direction = "Looking Left"
+                        elif lx > (parts - 1) * eye_width // parts and rx > (parts - 1) * eye_width // parts:
+                            gaze_direction = "Looking Right"
+                        elif norm_ly < thresholds["up"] and norm_ry < thresholds["up"]:
+                            gaze_direction = "Looking Up"
+                        elif norm_ly > thresholds["down"] and norm_ry > thresholds["down"]:
+                            gaze_direction = "Looking Down"
+                        else:
+                            gaze_direction = "Looking Center"
+                except Exception as landmark_error:
+                    # Just continue to next face if error with landmarks
+                    continue
         
-        # Draw the gaze direction on the frame
-        return frame, gaze_direction
+            return annotations, gaze_direction
         
-    except Exception as e:
-        # On error, return original frame with error text
-        cv2.putText(frame, "Eye Detection Error", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        return frame, "Looking Center"  # Default to center as fallback
+        except Exception as e:
+            GAZE_ERRORS.inc()
+            # On error, return error text for the frame
+            annotations.putText("Eye Detection Error", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return annotations, "Looking Center"  # Default to center as fallback
+
+# Default analyzer behind the module-level function
+default_analyzer = GazeAnalyzer()
+
+def process_eye_movement(frame, context=None):
+    """
+    Processes a single frame with the default GazeAnalyzer. See GazeAnalyzer.process.
+    """
+    return default_analyzer.process(frame, context)
 
 if __name__ == "__main__":
     cap = cv2.VideoCapture(0)
@@ -144,7 +164,8 @@ if __name__ == "__main__":
         if not ret:
             break
 
-        processed_frame, gaze_direction = process_eye_movement(frame)
+        annotations, gaze_direction = process_eye_movement(frame)
+        processed_frame = annotations.draw(frame)
         cv2.putText(processed_frame, gaze_direction, (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
         cv2.imshow("Eye Tracker", processed_frame)
@@ -0,0 +1,119 @@
+import cv2
+import dlib
+import numpy as np
+import os
+
+# Face detector backend used when none is chosen explicitly ("dlib", "haar", "lbp" or "dnn")
+FACE_DETECTOR_BACKEND = os.getenv("FACE_DETECTOR_BACKEND", "dlib")
+# Backend used instead when the chosen one is unknown or its model files are missing
+FALLBACK_BACKEND = "dlib"
+
+# OpenCV cascade files. Haar cascades ship with opencv-python under cv2.data.haarcascades;
+# LBP cascades are looked up there and in models/.
+HAAR_CASCADE_FILE = "haarcascade_frontalface_default.xml"
+LBP_CASCADE_FILE = "lbpcascade_frontalface_improved.xml"
+
+# Optional OpenCV DNN face detector (ResNet-10 SSD, Caffe format)
+DNN_PROTOTXT_PATH = "models/deploy.prototxt"
+DNN_MODEL_PATH = "models/res10_300x300_ssd_iter_140000.caffemodel"
+DNN_CONFIDENCE_THRESHOLD = 0.6
+
+# Every backend is a callable taking a gray image and returning a list of
+# dlib.rectangle in that image's coordinates, so it can be used anywhere
+# dlib.get_frontal_face_detector() was used (LandmarkStage, ScaledDetector,
+# FaceTracker).
+
+class DlibHogDetector:
+    """dlib's HOG frontal face detector. Most accurate boxes for shape_predictor."""
+    name = "dlib"
+
+    def __init__(self, upsample=0):
+        self.detector = dlib.get_frontal_face_detector()
+        self.upsample = upsample
+
+    def __call__(self, gray):
+        return list(self.detector(gray, self.upsample))
+
+class CascadeDetector:
+    """OpenCV Haar/LBP cascade classifier. Fastest backend, no model download needed."""
+    name = "haar"
+
+    def __init__(self, cascade_file=HAAR_CASCADE_FILE, scale_factor=1.1, min_neighbors=5, min_size=(60, 60)):
+        path = self._find_cascade(cascade_file)
+        self.classifier = cv2.CascadeClassifier(path)
+        if self.classifier.empty():
+            raise IOError(f"Could not load cascade classifier from {path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    @staticmethod
+    def _find_cascade(cascade_file):
+        for directory in (cv2.data.haarcascades, "models"):
+            path = os.path.join(directory, cascade_file)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"Cascade file {cascade_file} not found in {cv2.data.haarcascades} or models/")
+
+    def __call__(self, gray):
+        rects = self.classifier.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors, minSize=self.min_size
+        )
+        return [dlib.rectangle(int(x), int(y), int(x + w - 1), int(y + h - 1)) for (x, y, w, h) in rects]
+
+class LbpCascadeDetector(CascadeDetector):
+    name = "lbp"
+
+    def __init__(self, **kwargs):
+        super().__init__(cascade_file=LBP_CASCADE_FILE, **kwargs)
+
+class DnnFaceDetector:
+    """OpenCV DNN SSD face detector. Only available when the model files are present."""
+    name = "dnn"
+
+    def __init__(self, prototxt_path=DNN_PROTOTXT_PATH, model_path=DNN_MODEL_PATH,
+                 confidence_threshold=DNN_CONFIDENCE_THRESHOLD):
+        for path in (prototxt_path, model_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"DNN face detector file not found at {path}")
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.confidence_threshold = confidence_threshold
+
+    def __call__(self, gray):
+        height, width = gray.shape[:2]
+        bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        blob = cv2.dnn.blobFromImage(bgr, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+
+        # Each row: [image_id, label, confidence, x1, y1, x2, y2] with normalized coordinates
+        detections = detections[detections[:, 2] >= self.confidence_threshold]
+        boxes = np.clip(detections[:, 3:7], 0.0, 1.0) * np.array([width - 1, height - 1, width - 1, height - 1])
+        return [dlib.rectangle(int(x1), int(y1), int(x2), int(y2))
+                for x1, y1, x2, y2 in boxes.astype(int) if x2 > x1 and y2 > y1]
+
+DETECTOR_BACKENDS = {
+    "dlib": DlibHogDetector,
+    "haar": CascadeDetector,
+    "lbp": LbpCascadeDetector,
+    "dnn": DnnFaceDetector,
+}
+
+def create_face_detector(backend=FACE_DETECTOR_BACKEND, fallback=None, **kwargs):
+    """
+    Builds the face detector backend named `backend`.
+
+    Raises ValueError for unknown names; backends whose model files are missing
+    raise FileNotFoundError/IOError. With `fallback` (e.g. FALLBACK_BACKEND)
+    those errors print a warning and build the fallback backend instead.
+    """
+    try:
+        if backend not in DETECTOR_BACKENDS:
+            raise ValueError(f"Unknown face detector backend '{backend}'. Choose from: {', '.join(DETECTOR_BACKENDS)}")
+        return DETECTOR_BACKENDS[backend](**kwargs)
+    except (ValueError, FileNotFoundError, IOError) as e:
+        if fallback is None or fallback == backend:
+            raise
+        print(f"WARNING: Face detector backend '{backend}' unavailable: {str(e)}")
+        print(f"Falling back to the '{fallback}' face detector")
+        return DETECTOR_BACKENDS[fallback]()
@@ -0,0 +1,356 @@
+import cv2
+import dlib
+import numpy as np
+import os
+import threading
+from face_detectors import FACE_DETECTOR_BACKEND, FALLBACK_BACKEND, create_face_detector
+from model_registry import registry, model_path
+from metrics import vision_stage_seconds
+
+# Per-call latency of the two dlib stages, reported on /metrics
+DETECTION_SECONDS = vision_stage_seconds.labels(stage="face_detection")
+LANDMARK_SECONDS = vision_stage_seconds.labels(stage="landmarks")
+
+# 68 landmarks model, loaded lazily through the shared model registry
+MODEL_PATH = model_path("landmarks")
+
+def load_predictor():
+    if not os.path.exists(MODEL_PATH):
+        print(f"WARNING: Face landmark model file not found at {MODEL_PATH}")
+        print(f"Eye movement and head pose detection will be disabled")
+        return None
+    landmark_predictor = dlib.shape_predictor(MODEL_PATH)
+    print(f"Face landmark predictor loaded from {MODEL_PATH}")
+    return landmark_predictor
+
+def warmup_predictor(landmark_predictor):
+    gray = np.zeros((480, 640), dtype=np.uint8)
+    landmark_predictor(gray, dlib.rectangle(240, 160, 400, 320))
+
+def load_detector():
+    face_detector = create_face_detector(FACE_DETECTOR_BACKEND, fallback=FALLBACK_BACKEND)
+    print(f"Face detector initialized (backend: {face_detector.name})")
+    return face_detector
+
+def warmup_detector(face_detector):
+    face_detector(np.zeros((480, 640), dtype=np.uint8))
+
+registry.register("landmarks", load_predictor, warmup_predictor)
+registry.register("face_detector", load_detector, warmup_detector)
+
+# Multi-resolution detection: detect on a downscaled gray image, predict landmarks at full resolution
+DETECTION_SCALE = 1.0                       # Fixed scale in (0, 1], or "auto"
+AUTO_SCALE_LEVELS = (0.25, 0.5, 0.75, 1.0)  # Pyramid levels the automatic mode chooses from
+EXPECTED_FACE_SIZE = 160                    # Expected face width in full-resolution pixels (640x480 webcam)
+HOG_MIN_FACE_SIZE = 80                      # dlib's frontal detector misses faces smaller than ~80x80 px
+AUTO_SCALE_MARGIN = 1.2                     # Keep faces this much above HOG_MIN_FACE_SIZE after scaling
+
+# Tracking mode: full detection every N frames, correlation tracker in between
+TRACKING_DETECTION_INTERVAL = 10  # Frames to track before forcing a fresh detection
+TRACKING_MIN_CONFIDENCE = 7.0     # correlation_tracker peak-to-sidelobe ratio; below this the face is re-acquired
+TRACKING_SEARCH_PADDING = 0.5     # Search window padding around the last face, as a fraction of its size
+REACQUIRE_POLICY = "window"       # "window": search around the last face first, "full": always scan the whole frame
+
+def shape_to_np(shape, dtype=np.int32):
+    """
+    Converts a dlib full_object_detection into an (N, 2) array of (x, y) points.
+    """
+    coords = np.empty((shape.num_parts, 2), dtype=dtype)
+    for i in range(shape.num_parts):
+        part = shape.part(i)
+        coords[i] = (part.x, part.y)
+    return coords
+
+def clip_rect(rect, width, height):
+    """
+    Rounds a dlib (d)rectangle to integer pixels and clips it to the frame.
+    """
+    left = max(0, int(round(rect.left())))
+    top = max(0, int(round(rect.top())))
+    right = min(width - 1, int(round(rect.right())))
+    bottom = min(height - 1, int(round(rect.bottom())))
+    return dlib.rectangle(left, top, right, bottom)
+
+def detect_at_scale(face_detector, gray, scale):
+    """
+    Runs `face_detector` on `gray` resized by `scale` and maps the rects back to
+    full-resolution coordinates.
+    """
+    if scale >= 1.0:
+        return list(face_detector(gray))
+
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    inv = 1.0 / scale
+    return [dlib.rectangle(int(rect.left() * inv), int(rect.top() * inv),
+                           int(rect.right() * inv), int(rect.bottom() * inv))
+            for rect in face_detector(small)]
+
+class ScaledDetector:
+    """
+    Face detector wrapper that detects on a downscaled pyramid level.
+
+    With a fixed scale every frame is detected at that scale. With "auto" the
+    wrapper starts at the smallest level that fits EXPECTED_FACE_SIZE, steps
+    up one level per frame while no face is found, and otherwise moves to the
+    smallest level at which the detected face stays above HOG_MIN_FACE_SIZE.
+    """
+    def __init__(self, face_detector, scale=DETECTION_SCALE, levels=AUTO_SCALE_LEVELS,
+                 expected_face_size=EXPECTED_FACE_SIZE, min_face_size=HOG_MIN_FACE_SIZE):
+        self.detector = face_detector
+        self.min_face_size = min_face_size
+        self.auto = scale == "auto"
+        if self.auto:
+            self.levels = sorted(levels)
+            self.level = self._level_for(expected_face_size)
+        else:
+            scale = float(scale)
+            if not 0 < scale <= 1.0:
+                raise ValueError(f"Detection scale must be in (0, 1], got {scale}")
+            self.levels = [scale]
+            self.level = 0
+
+    @property
+    def scale(self):
+        return self.levels[self.level]
+
+    def _level_for(self, face_size):
+        for i, level in enumerate(self.levels):
+            if face_size * level >= self.min_face_size * AUTO_SCALE_MARGIN:
+                return i
+        return len(self.levels) - 1
+
+    def detect_fixed(self, gray):
+        """
+        Detects at the current level without moving it. Used for the window
+        searches around a tracked face: a crop that misses the face says
+        nothing about the scale the full frame needs.
+        """
+        return detect_at_scale(self.detector, gray, self.scale)
+
+    def __call__(self, gray):
+        faces = self.detect_fixed(gray)
+        if self.auto:
+            if faces:
+                self.level = self._level_for(min(min(face.width(), face.height()) for face in faces))
+            elif self.level < len(self.levels) - 1:
+                self.level += 1
+        return faces
+
+class FaceTracker:
+    """
+    Detect-once, track-between face localization for a single video stream.
+
+    A full detection seeds a dlib.correlation_tracker, which then propagates
+    the face box for up to `detection_interval` frames. When the interval
+    runs out or the tracker confidence drops below `min_confidence`, the face
+    is re-acquired, first inside a padded window around the last box (with
+    the "window" policy) and only then on the full frame.
+
+    Only the largest face is tracked. Frames must be fed in capture order, so
+    use one tracker per stream.
+    """
+    def __init__(self, detection_interval=TRACKING_DETECTION_INTERVAL,
+                 min_confidence=TRACKING_MIN_CONFIDENCE,
+                 search_padding=TRACKING_SEARCH_PADDING,
+                 reacquire_policy=REACQUIRE_POLICY):
+        if reacquire_policy not in ("window", "full"):
+            raise ValueError(f"Unknown re-acquire policy: {reacquire_policy}")
+        self.detection_interval = detection_interval
+        self.min_confidence = min_confidence
+        self.search_padding = search_padding
+        self.reacquire_policy = reacquire_policy
+
+        self.tracker = None
+        self.last_face = None
+        self.frames_since_detection = 0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.frames = 0
+        self.tracked_frames = 0
+        self.window_detections = 0
+        self.full_detections = 0
+        self.tracking_losses = 0
+
+    @property
+    def skipped_detections(self):
+        """Frames that did not need a full-frame detection."""
+        return self.frames - self.full_detections
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "tracked_frames": self.tracked_frames,
+            "window_detections": self.window_detections,
+            "full_detections": self.full_detections,
+            "skipped_detections": self.skipped_detections,
+            "tracking_losses": self.tracking_losses,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.tracker = None
+            self.last_face = None
+            self.frames_since_detection = 0
+
+    def detect(self, detector, gray):
+        """Returns the face rects for `gray`, tracking instead of detecting when possible."""
+        with self._lock:
+            self.frames += 1
+            height, width = gray.shape[:2]
+
+            if self.tracker is not None and self.frames_since_detection < self.detection_interval:
+                confidence = self.tracker.update(gray)
+                if confidence >= self.min_confidence:
+                    self.frames_since_detection += 1
+                    self.tracked_frames += 1
+                    self.last_face = clip_rect(self.tracker.get_position(), width, height)
+                    return [self.last_face]
+                self.tracking_losses += 1
+
+            faces = []
+            if self.reacquire_policy == "window" and self.last_face is not None:
+                faces = self._detect_in_window(detector, gray, self.last_face)
+                if faces:
+                    self.window_detections += 1
+            if not faces:
+                faces = list(detector(gray))
+                self.full_detections += 1
+
+            if not faces:
+                self.tracker = None
+                self.last_face = None
+                return []
+
+            face = max(faces, key=lambda rect: rect.area())
+            self.tracker = dlib.correlation_tracker()
+            self.tracker.start_track(gray, face)
+            self.last_face = face
+            self.frames_since_detection = 0
+            return [face]
+
+    def _detect_in_window(self, detector, gray, face):
+        height, width = gray.shape[:2]
+        pad_x = int(face.width() * self.search_padding)
+        pad_y = int(face.height() * self.search_padding)
+        x1 = max(0, face.left() - pad_x)
+        y1 = max(0, face.top() - pad_y)
+        x2 = min(width, face.right() + pad_x)
+        y2 = min(height, face.bottom() + pad_y)
+        if x2 <= x1 or y2 <= y1:
+            return []
+
+        window = np.ascontiguousarray(gray[y1:y2, x1:x2])
+        # Only full-frame detections may move an auto ScaledDetector's pyramid level
+        detect = getattr(detector, "detect_fixed", detector)
+        return [dlib.rectangle(rect.left() + x1, rect.top() + y1, rect.right() + x1, rect.bottom() + y1)
+                for rect in detect(window)]
+
+class FrameContext:
+    """
+    Per-frame cache shared by the gaze and head pose analyzers.
+
+    The gray image, face rects and landmarks are computed lazily on first
+    access and then reused, so each frame pays for detection only once no
+    matter how many analyzers (or threads) read from it.
+    """
+    def __init__(self, frame, stage):
+        self.frame = frame
+        self.stage = stage
+        self._gray = None
+        self._faces = None
+        self._landmarks = None
+        self._lock = threading.RLock()
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            with self._lock:
+                if self._gray is None:
+                    self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def faces(self):
+        """List of dlib.rectangle face boxes in full-frame coordinates."""
+        if self._faces is None:
+            with self._lock:
+                if self._faces is None:
+                    gray = self.gray
+                    with DETECTION_SECONDS.time():
+                        self._faces = self.stage.detect(gray)
+        return self._faces
+
+    @property
+    def landmarks(self):
+        """List of (68, 2) int32 landmark arrays, one per entry in `faces`."""
+        if self._landmarks is None:
+            with self._lock:
+                if self._landmarks is None:
+                    faces = self.faces
+                    with LANDMARK_SECONDS.time():
+                        self._landmarks = [self.stage.predict(self.gray, face) for face in faces]
+        return self._landmarks
+
+class LandmarkStage:
+    """
+    Runs face detection and 68-point landmark prediction for a frame.
+
+    Pass a FaceTracker to enable tracking mode; without one every frame gets
+    a full detection. `detection_scale` below 1.0 (or "auto") detects faces on
+    a downscaled image, while landmarks are always predicted at full resolution.
+    `backend` picks a face detector backend by name for this stage only (see
+    face_detectors.DETECTOR_BACKENDS), e.g. a per-session "haar" fast path.
+    """
+    def __init__(self, face_detector=None, landmark_predictor=None, tracker=None,
+                 detection_scale=DETECTION_SCALE, backend=None):
+        if face_detector is None and backend is not None:
+            face_detector = create_face_detector(backend, fallback=FALLBACK_BACKEND)
+        self.tracker = tracker
+        self.detection_scale = detection_scale
+        self._detector = self._scaled(face_detector)
+        self._predictor = landmark_predictor
+        self._lock = threading.Lock()
+
+    def _scaled(self, face_detector):
+        if face_detector is not None and self.detection_scale != 1.0:
+            return ScaledDetector(face_detector, self.detection_scale)
+        return face_detector
+
+    @property
+    def detector(self):
+        """This stage's face detector; the shared registry detector unless one was given."""
+        if self._detector is None:
+            with self._lock:
+                if self._detector is None:
+                    self._detector = self._scaled(registry.get("face_detector"))
+        return self._detector
+
+    @property
+    def predictor(self):
+        """The landmark predictor; the shared registry model unless one was given."""
+        if self._predictor is None:
+            self._predictor = registry.get("landmarks")
+        return self._predictor
+
+    @property
+    def available(self):
+        return self.detector is not None and self.predictor is not None
+
+    def detect(self, gray):
+        if self.tracker is not None:
+            return self.tracker.detect(self.detector, gray)
+        return list(self.detector(gray))
+
+    def predict(self, gray, face):
+        return shape_to_np(self.predictor(gray, face))
+
+    def process(self, frame):
+        """Returns a FrameContext for `frame`; nothing is computed until it is read."""
+        return FrameContext(frame, self)
+
+# Default stage shared by main.py and the analyzers
+default_stage = LandmarkStage()
+
+def build_frame_context(frame):
+    return default_stage.process(frame)
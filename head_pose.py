@@ -1,28 +1,11 @@
 import cv2
-import dlib
 import numpy as np
 import math
 from collections import deque
 import time
-import os
-
-# Check if model file exists and handle gracefully
-MODEL_PATH = "models/shape_predictor_68_face_landmarks.dat"
-if not os.path.exists(MODEL_PATH):
-    print(f"WARNING: Head pose detection model file not found at {MODEL_PATH}")
-    print(f"Head pose detection will be disabled")
-    detector = None
-    predictor = None
-else:
-    # Load face detector & landmarks predictor
-    try:
-        detector = dlib.get_frontal_face_detector()
-        predictor = dlib.shape_predictor(MODEL_PATH)
-        print("Head pose detection initialized successfully")
-    except Exception as e:
-        print(f"Error loading head pose detection models: {str(e)}")
-        detector = None
-        predictor = None
+from face_landmarks import default_stage
+from overlay import Annotations
+from metrics import timed, vision_stage_errors, vision_stage_seconds
 
 # 3D Model Points (Mapped to Facial Landmarks)
 model_points = np.array([
@@ -34,6 +17,9 @@ model_points = np.array([
     (25.0, -30.0, -10.0)    # Right mouth corner
 ], dtype=np.float64)
 
+# Landmark indices matching model_points, in the same order
+POSE_LANDMARK_INDICES = [30, 8, 36, 45, 48, 54]
+
 # Camera Calibration (Assuming 640x480)
 focal_length = 640
 center = (320, 240)
@@ -49,21 +35,23 @@ dist_coeffs = np.zeros((4, 1))  # Assuming no lens distortion
 CALIBRATION_TIME = 5  # Time to set neutral position
 
 ANGLE_HISTORY_SIZE = 10
-yaw_history = deque(maxlen=ANGLE_HISTORY_SIZE)
-pitch_history = deque(maxlen=ANGLE_HISTORY_SIZE)
-roll_history = deque(maxlen=ANGLE_HISTORY_SIZE)
 
-# Global variables for state management
-previous_state = "Looking at Screen"
-# calibrated_angles will be set during calibration phase
+# Degrees from the calibrated pose: within the "pitch" / "yaw" / "roll" band the
+# candidate is looking at the screen; beyond "turn_yaw" left/right, beyond
+# "turn_pitch" up/down, and beyond "tilt_roll" tilted
+HEAD_THRESHOLDS = {"pitch": 10, "yaw": 15, "roll": 7, "turn_yaw": 20, "turn_pitch": 15, "tilt_roll": 10}
 
-# ... (existing imports, global variables, and function definitions) ...
+# Per-call latency reported on /metrics
+SOLVEPNP_SECONDS = vision_stage_seconds.labels(stage="solvepnp")
+HEAD_POSE_SECONDS = vision_stage_seconds.labels(stage="head_pose")
+HEAD_POSE_ERRORS = vision_stage_errors.labels(stage="head_pose")
 
 def get_head_pose_angles(image_points):
     try:
-        success, rotation_vector, translation_vector = cv2.solvePnP(
-            model_points, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_ITERATIVE
-        )
+        with SOLVEPNP_SECONDS.time():
+            success, rotation_vector, translation_vector = cv2.solvePnP(
+                model_points, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_ITERATIVE
+            )
         if not success:
             return None
 
@@ -88,104 +76,137 @@ def smooth_angle(angle_history, new_angle):
     angle_history.append(new_angle)
     return np.mean(angle_history)
 
-def process_head_pose(frame, calibrated_angles=None):
-    global previous_state
-
-    # Check if models are loaded
-    if detector is None or predictor is None:
-        # Draw text on frame to indicate head pose detection is disabled
-        cv2.putText(frame, "Head Pose Detection Disabled", (10, 60),
-                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        return frame, "Looking at Screen"  # Default to looking at screen as fallback
+class HeadPoseAnalyzer:
+    """
+    Head pose analyzer for one candidate stream.
+
+    Each instance owns its angle smoothing history and last head state, so
+    several streams can be analyzed in one process without sharing temporal
+    state. The dlib models behind the landmark stage are shared read-only.
+    Frames of one stream must be processed in order, one at a time.
+    """
+    def __init__(self, stage=None, history_size=ANGLE_HISTORY_SIZE, thresholds=None):
+        self.stage = stage if stage is not None else default_stage
+        self.thresholds = dict(HEAD_THRESHOLDS, **(thresholds or {}))
+        self.yaw_history = deque(maxlen=history_size)
+        self.pitch_history = deque(maxlen=history_size)
+        self.roll_history = deque(maxlen=history_size)
+        self.previous_state = "Looking at Screen"
+
+    def reset(self):
+        """Clears the smoothing history, e.g. before recalibrating."""
+        self.yaw_history.clear()
+        self.pitch_history.clear()
+        self.roll_history.clear()
+        self.previous_state = "Looking at Screen"
+
+    @timed(HEAD_POSE_SECONDS)
+    def process(self, frame, calibrated_angles=None, context=None):
+        """
+        Processes a single frame to estimate the head direction. The frame is only
+        read, never drawn on.
+
+        Returns:
+          annotations: Annotations (status text) to draw on the displayed frame.
+          head_direction: Direction string, or during calibration (calibrated_angles
+                          is None) the (pitch, yaw, roll) tuple, or None without a face.
+        """
+        if context is None:
+            context = self.stage.process(frame)
+        annotations = Annotations()
+
+        # Check if models are loaded
+        if not context.stage.available:
+            # Indicate on the frame that head pose detection is disabled
+            annotations.putText("Head Pose Detection Disabled", (10, 60),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return annotations, "Looking at Screen"  # Default to looking at screen as fallback
     
-    try:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = detector(gray)
-        
-        # If no face is detected, return early.
-        if len(faces) == 0:
-            cv2.putText(frame, "No face detected", (10, 60),
-                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            if calibrated_angles is None:
-                return frame, None  # Do not update calibration if no face.
-            else:
-                return frame, "Looking at Screen"
-
-        head_direction = "Looking at Screen"
-
-        for face in faces:
-            try:
-                landmarks = predictor(gray, face)
-                image_points = np.array([
-                    (landmarks.part(30).x, landmarks.part(30).y),  # Nose tip
-                    (landmarks.part(8).x, landmarks.part(8).y),    # Chin
-                    (landmarks.part(36).x, landmarks.part(36).y),   # Left eye corner
-                    (landmarks.part(45).x, landmarks.part(45).y),   # Right eye corner
-                    (landmarks.part(48).x, landmarks.part(48).y),   # Left mouth corner
-                    (landmarks.part(54).x, landmarks.part(54).y)    # Right mouth corner
-                ], dtype=np.float64)
-
-                angles = get_head_pose_angles(image_points)
-                if angles is None:
-                    continue
-
-                pitch = smooth_angle(pitch_history, angles[0])
-                yaw = smooth_angle(yaw_history, angles[1])
-                roll = smooth_angle(roll_history, angles[2])
-
-                # If calibrating, return the current angles for calibration.
+        try:
+            # If no face is detected, return early.
+            if len(context.faces) == 0:
+                annotations.putText("No face detected", (10, 60),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
                 if calibrated_angles is None:
-                    # Visualize the current angles on frame during calibration
-                    cv2.putText(frame, f"Calibrating... P:{pitch:.1f} Y:{yaw:.1f} R:{roll:.1f}", (10, 60),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                    return frame, (pitch, yaw, roll)
-
-                pitch_offset, yaw_offset, roll_offset = calibrated_angles
-                PITCH_THRESHOLD = 10    
-                YAW_THRESHOLD = 15
-                ROLL_THRESHOLD = 7
-
-                if (abs(yaw - yaw_offset) <= YAW_THRESHOLD and 
-                    abs(pitch - pitch_offset) <= PITCH_THRESHOLD and 
-                    abs(roll - roll_offset) <= ROLL_THRESHOLD):
-                    current_state = "Looking at Screen"
-                elif yaw < yaw_offset - 20:
-                    current_state = "Looking Left"
-                elif yaw > yaw_offset + 20:
-                    current_state = "Looking Right"
-                elif pitch > pitch_offset + 15:
-                    current_state = "Looking Up"
-                elif pitch < pitch_offset - 15:
-                    current_state = "Looking Down"
-                elif abs(roll - roll_offset) > 10:
-                    current_state = "Tilted"
+                    return annotations, None  # Do not update calibration if no face.
                 else:
-                    current_state = previous_state
-
-                previous_state = current_state
-                head_direction = current_state
+                    return annotations, "Looking at Screen"
+
+            head_direction = "Looking at Screen"
+
+            for landmarks in context.landmarks:
+                try:
+                    image_points = landmarks[POSE_LANDMARK_INDICES].astype(np.float64)
+
+                    angles = get_head_pose_angles(image_points)
+                    if angles is None:
+                        continue
+
+                    pitch = smooth_angle(self.pitch_history, angles[0])
+                    yaw = smooth_angle(self.yaw_history, angles[1])
+                    roll = smooth_angle(self.roll_history, angles[2])
+
+                    # If calibrating, return the current angles for calibration.
+                    if calibrated_angles is None:
+                        # Visualize the current angles on frame during calibration
+                        annotations.putText(f"Calibrating... P:{pitch:.1f} Y:{yaw:.1f} R:{roll:.1f}", (10, 60),
+                                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                        return annotations, (pitch, yaw, roll)
+
+                    pitch_offset, yaw_offset, roll_offset = calibrated_angles
+                    thresholds = self.thresholds
+
+                    if (abs(yaw - yaw_offset) <= thresholds["yaw"] and 
+                        abs(pitch - pitch_offset) <= thresholds["pitch"] and 
+                        abs(roll - roll_offset) <= thresholds["roll"]):
+                        current_state = "Looking at Screen"
+                    elif yaw < yaw_offset - thresholds["turn_yaw"]:
+                        current_state = "Looking Left"
+                    elif yaw > yaw_offset + thresholds["turn_yaw"]:
+                        current_state = "Looking Right"
+                    elif pitch > pitch_offset + thresholds["turn_pitch"]:
+                        current_state = "Looking Up"
+                    elif pitch < pitch_offset - thresholds["turn_pitch"]:
+                        current_state = "Looking Down"
+                    elif abs(roll - roll_offset) > thresholds["tilt_roll"]:
+                        current_state = "Tilted"
+                    else:
+                        current_state = self.previous_state
+
+                    self.previous_state = current_state
+                    head_direction = current_state
                 
-                # Visualize the current head direction on frame
-                cv2.putText(frame, f"Head: {head_direction}", (10, 60),
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(frame, f"P:{pitch-pitch_offset:.1f} Y:{yaw-yaw_offset:.1f} R:{roll-roll_offset:.1f}", 
-                          (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-                # Process only one detected face and return.
-                return frame, head_direction
-            except Exception as landmark_error:
-                # Just continue to next face if error with landmarks
-                print(f"Error processing landmarks: {str(landmark_error)}")
-                continue
-
-        # Fallback in case no valid face was processed.
-        return frame, "Looking at Screen"
+                    # Visualize the current head direction on frame
+                    annotations.putText(f"Head: {head_direction}", (10, 60),
+                                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    annotations.putText(f"P:{pitch-pitch_offset:.1f} Y:{yaw-yaw_offset:.1f} R:{roll-roll_offset:.1f}", 
+                                        (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+                    # Process only one detected face and return.
+                    return annotations, head_direction
+                except Exception as landmark_error:
+                    # Just continue to next face if error with landmarks
+                    print(f"Error processing landmarks: {str(landmark_error)}")
+                    continue
+
+            # Fallback in case no valid face was processed.
+            return annotations, "Looking at Screen"
     
-    except Exception as e:
-        # On error, return original frame with error text
-        cv2.putText(frame, "Head Pose Detection Error", (10, 60),
-                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        return frame, "Looking at Screen"  # Default to looking at screen as fallback
+        except Exception as e:
+            HEAD_POSE_ERRORS.inc()
+            # On error, return error text for the frame
+            annotations.putText("Head Pose Detection Error", (10, 60),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return annotations, "Looking at Screen"  # Default to looking at screen as fallback
+
+# Default analyzer behind the module-level function
+default_analyzer = HeadPoseAnalyzer()
+
+def process_head_pose(frame, calibrated_angles=None, context=None):
+    """
+    Processes a single frame with the default HeadPoseAnalyzer. See HeadPoseAnalyzer.process.
+    """
+    return default_analyzer.process(frame, calibrated_angles, context)
 
 if __name__ == '__main__':
     # This main block will start the webcam and display a window with head pose feedback.
@@ -204,7 +225,8 @@ if __name__ == '__main__':
         
         # During calibration phase (no calibrated_angles yet), try to get calibration data.
         if calibrated_angles is None:
-            processed_frame, output = process_head_pose(frame, None)
+            annotations, output = process_head_pose(frame, None)
+            processed_frame = annotations.draw(frame)
             # If valid calibration angles are obtained (tuple with 3 values)
             if output is not None and isinstance(output, tuple) and len(output) == 3:
                 calibrated_angles = output
@@ -214,7 +236,8 @@ if __name__ == '__main__':
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
         else:
             # Use the calibrated angles to detect head pose.
-            processed_frame, head_direction = process_head_pose(frame, calibrated_angles)
+            annotations, head_direction = process_head_pose(frame, calibrated_angles)
+            processed_frame = annotations.draw(frame)
             cv2.putText(processed_frame, head_direction, (20, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
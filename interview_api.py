@@ -2,7 +2,7 @@ import sys
 import traceback
 import threading
 import time
-from flask import Flask, request, jsonify, send_file, Response, send_from_directory
+from flask import Flask, request, jsonify, send_file, Response, send_from_directory, g
 from flask_cors import CORS
 import interview_utils
 import os
@@ -14,6 +14,13 @@ from audio_utils import (
     text_to_speech_plain,
     play_audio_from_buffer
 )
+from providers import LazyProvider
+from evidence_store import EvidenceStore, MIMETYPES
+import metrics
+import sampling_profiler
+import hmac
+import io
+import json
 
 # Custom excepthook to print full tracebacks on unhandled exceptions.
 def my_excepthook(exc_type, exc_value, exc_tb):
@@ -31,6 +38,30 @@ CORS(app)
 candidate_sessions = {}
 completed_interviews = {}
 
+# Screenshot evidence index, opened on the first admin query
+evidence_store = LazyProvider("evidence_store", EvidenceStore)
+
+# Request latency and session gauges, served with the stage metrics on /metrics
+http_request_seconds = metrics.registry.histogram(
+    "http_request_seconds", "Latency of API requests by endpoint.", ["endpoint"])
+metrics.active_sessions.labels(kind="interview").set_function(lambda: len(candidate_sessions))
+metrics.active_sessions.labels(kind="recording").set_function(
+    lambda: sum("recording_handle" in session for session in list(candidate_sessions.values())))
+metrics.active_sessions.labels(kind="completed").set_function(lambda: len(completed_interviews))
+metrics.active_sessions.labels(kind="speaking").set_function(
+    lambda: sum(thread.name == "speak-question" for thread in threading.enumerate()))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    started = g.get("request_started")
+    if started is not None and request.endpoint != "metrics_endpoint":
+        http_request_seconds.labels(endpoint=request.endpoint or "unknown").observe(time.perf_counter() - started)
+    return response
+
 # Function to speak the question in a separate thread
 def speak_question_async(question):
     try:
@@ -41,6 +72,19 @@ def speak_question_async(question):
     except Exception as e:
         print(f"Failed to speak question: {str(e)}")
 
+# Shared secret for the admin-only evidence and diagnostics endpoints
+# (/admin/evidence*, /admin/profile); they are disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def is_admin_request():
+    # Header only: a query-string token would end up in access logs and browser history
+    token = request.headers.get("X-Admin-Token") or ""
+    return ADMIN_TOKEN is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
 # Serve static files
 @app.route('/')
 def serve_root():
@@ -92,7 +136,7 @@ Format exactly:
 *Ideal Answer:*
 <A concise summary, 1-3 sentences>
 """
-        response = interview_utils.llm.invoke(input=first_prompt)
+        response = interview_utils.invoke_llm(first_prompt)
         content = response.content.strip() if hasattr(response, "content") else ""
         qa = interview_utils.parse_open_ended_question(content)
         session["current_question"] = qa["question"]
@@ -189,7 +233,8 @@ def candidate_voice_interview():
             }
             
             # Speak the new question
-            threading.Thread(target=speak_question_async, args=(session["current_question"],)).start()
+            threading.Thread(target=speak_question_async, args=(session["current_question"],),
+                             name="speak-question").start()
             
             return jsonify(response_data), 200
                 
@@ -217,7 +262,7 @@ def speak_question():
     }
     
     # Speak the question after sending the response
-    threading.Thread(target=speak_question_async, args=(question,)).start()
+    threading.Thread(target=speak_question_async, args=(question,), name="speak-question").start()
     
     return jsonify(response_data), 200
 
@@ -240,5 +285,81 @@ def admin_results_endpoint():
         else:
             return jsonify({"error": "No results found for this candidate"}), 404
 
+@app.route('/admin/evidence/sessions', methods=['GET'])
+def admin_evidence_sessions_endpoint():
+    if not is_admin_request():
+        return jsonify({"error": "Invalid admin token"}), 403
+    return jsonify({"sessions": evidence_store.sessions()}), 200
+
+@app.route('/admin/evidence', methods=['GET'])
+def admin_evidence_endpoint():
+    if not is_admin_request():
+        return jsonify({"error": "Invalid admin token"}), 403
+    session_name = request.args.get("session")
+    try:
+        since = request.args.get("since", type=float)
+        until = request.args.get("until", type=float)
+        limit = min(int(request.args.get("limit", 100)), 1000)
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "Parameters 'limit' and 'offset' must be integers"}), 400
+
+    events = evidence_store.query(
+        session=session_name,
+        event_type=request.args.get("event_type"),
+        direction=request.args.get("direction"),
+        since=since,
+        until=until,
+        limit=limit,
+        offset=offset
+    )
+    response_data = {"events": events}
+    if session_name:
+        response_data["summary"] = evidence_store.summary(session_name)
+    return jsonify(response_data), 200
+
+@app.route('/admin/evidence/<int:event_id>/image', methods=['GET'])
+@app.route('/admin/evidence/<int:event_id>/file', methods=['GET'])
+def admin_evidence_image_endpoint(event_id):
+    if not is_admin_request():
+        return jsonify({"error": "Invalid admin token"}), 403
+    stored = evidence_store.read_event(event_id)
+    if stored is None:
+        return jsonify({"error": "Evidence not found"}), 404
+    data, fmt = stored
+    return send_file(io.BytesIO(data), mimetype=MIMETYPES[fmt])
+
+@app.route('/admin/profile', methods=['GET'])
+def admin_profile_endpoint():
+    if ADMIN_TOKEN is None:
+        return jsonify({"error": "Profiling is disabled; set ADMIN_TOKEN to enable it"}), 403
+    if not is_admin_request():
+        return jsonify({"error": "Invalid admin token"}), 403
+    try:
+        seconds = float(request.args.get("seconds", 10))
+        interval = float(request.args.get("interval", sampling_profiler.PROFILE_INTERVAL))
+    except ValueError:
+        return jsonify({"error": "Parameters 'seconds' and 'interval' must be numbers"}), 400
+    if not 0 < seconds <= sampling_profiler.PROFILE_MAX_SECONDS or not 0.001 <= interval <= 1:
+        return jsonify({"error": f"Parameter 'seconds' must be in (0, {sampling_profiler.PROFILE_MAX_SECONDS}] "
+                                 "and 'interval' in [0.001, 1]"}), 400
+    fmt = request.args.get("format", "collapsed")
+    if fmt not in ("collapsed", "speedscope"):
+        return jsonify({"error": "Parameter 'format' must be 'collapsed' or 'speedscope'"}), 400
+
+    # Samples every other thread of this process while this request waits
+    try:
+        result = sampling_profiler.profile(seconds, interval)
+    except sampling_profiler.ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    name = time.strftime("profile_%Y%m%d_%H%M%S", time.localtime(result.started))
+    if fmt == "speedscope":
+        return Response(json.dumps(result.speedscope(name)), mimetype="application/json",
+                        headers={"Content-Disposition": f"attachment; filename={name}.speedscope.json"})
+    return Response(result.collapsed(), mimetype="text/plain",
+                    headers={"Content-Disposition": f"attachment; filename={name}.collapsed.txt"})
+
 if __name__ == '__main__':
+    # kill -USR2 <pid> writes a profile of every thread into PROFILE_DIR
+    sampling_profiler.install_signal_handler()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
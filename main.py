@@ -1,9 +1,19 @@
 import cv2
 import time
 import os
-from eye_movement import process_eye_movement
-from head_pose import process_head_pose
-from mobile_detection import process_mobile_detection
+from vision_session import VisionSession
+from model_registry import registry
+from scheduler import DetectorScheduler
+from motion_gate import MotionGate
+from cv_utils import FrameSequence
+from overlay import Annotations, compose
+from vision_pool import VisionWorkerPool, POOL_RESULT_TIMEOUT
+from pipeline import StageGraph
+from evidence_writer import EvidenceWriter
+from evidence_store import EvidenceStore
+from clip_recorder import ClipRecorder
+import metrics
+import sampling_profiler
 import threading
 from concurrent.futures import ThreadPoolExecutor
 
@@ -16,31 +26,65 @@ class VideoStream:
         # Set resolution for speed
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.ret, self.frame = self.cap.read()
+        # Sequenced latest-frame slot so the loop below only sees new frames
+        self.frames = FrameSequence()
+        self.ret, frame = self.cap.read()
+        if self.ret:
+            self.frames.publish(frame)
         self.stopped = False
         threading.Thread(target=self.update, daemon=True).start()
 
     def update(self):
+        # cap.read() blocks until the camera delivers a frame, pacing this loop
         while not self.stopped:
             ret, frame = self.cap.read()
             if ret:
-                self.frame = frame
+                self.frames.publish(frame)
             else:
                 self.stop()
 
     def read(self):
-        return self.frame
+        return self.frames.read()[2]
+
+    def read_next(self, timeout=None):
+        return self.frames.read_next(timeout)
+
+    def stats(self):
+        return self.frames.stats()
 
     def stop(self):
         self.stopped = True
+        self.frames.close()
         self.cap.release()
 
+# "threads" runs the analyzers on a thread pool in this process; "processes"
+# runs them in worker processes fed through a shared-memory frame ring, which
+# scales across cores because dlib holds the GIL; "pipeline" runs each stage
+# in its own thread at its own pace, so gaze never waits for phone detection
+EXECUTION_MODE = os.getenv("VISION_EXECUTION_MODE", "threads")
+
+# Worker processes are forked first, before any thread starts or torch loads;
+# they share the landmark predictor with this process and load the rest
+# themselves, so this process loads no other model
+vision_pool = VisionWorkerPool(workers=2, detection_scale="auto").start() if EXECUTION_MODE == "processes" else None
+
+# Load and warm up the shared models before the first frame arrives
+if vision_pool is None:
+    registry.preload()
+for name, model_stats in registry.stats().items():
+    if model_stats["loaded"]:
+        print(f"Model {name}: loaded in {model_stats['load_s']:.2f} s, warmup {model_stats['warmup_s'] or 0.0:.2f} s")
+
 # Initialize threaded video capture
 vs = VideoStream(src=0)
 
-# Create a log directory for screenshots
-log_dir = "log"
-os.makedirs(log_dir, exist_ok=True)
+# Screenshots are written in the background into the evidence store, indexed
+# under this session (set EVIDENCE_SESSION to the candidate's name)
+SESSION_NAME = os.getenv("EVIDENCE_SESSION", time.strftime("session_%Y%m%d_%H%M%S"))
+evidence_store = EvidenceStore()
+evidence_writer = EvidenceWriter(store=evidence_store, session=SESSION_NAME)
+# Short clips around each event, from an in-memory ring of recent frames
+clip_recorder = ClipRecorder(store=evidence_store, session=SESSION_NAME)
 
 # Calibration for head pose
 calibrated_angles = None
@@ -62,42 +106,116 @@ eye_movement_counter = {"Looking Left": 0, "Looking Right": 0, "Looking Up": 0,
 previous_head_direction = "Looking at Screen"
 previous_gaze_direction = "Looking Center"
 
+# Per-candidate analyzer state. The landmark stage runs in tracking mode: full
+# face detection only every few frames, correlation tracking in between. Faces
+# are detected on the smallest pyramid level that still finds them; landmarks
+# stay at full resolution. Models are shared by every session in the process.
+session = VisionSession(tracking=True, detection_scale="auto")
+
+# Each detector runs at its own rate; results are carried forward between runs
+DETECTOR_RATES = {"gaze": 15.0, "head": 10.0, "mobile": 2.0}
+scheduler = DetectorScheduler(
+    DETECTOR_RATES,
+    defaults={"gaze": "Looking Center", "head": "Looking at Screen", "mobile": False}
+)
+
+# Skip the detectors entirely while the frame is (nearly) unchanged
+motion_gate = MotionGate()
+
+# Show the annotated frame in a window; when False, overlays are only
+# composited for saved screenshots
+SHOW_WINDOW = True
+
+# Latest phone boxes, carried forward between mobile detection runs
+mobile_annotations = Annotations()
+
 # Create a ThreadPoolExecutor for concurrent processing
 executor = ThreadPoolExecutor(max_workers=3)
+vision_graph = StageGraph(session).start() if EXECUTION_MODE == "pipeline" else None
+
+# Stage latencies and queue depths in Prometheus format on
+# http://<host>:METRICS_PORT/metrics (off when unset)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+metrics.queue_depth.labels(queue="evidence_writer").set_function(lambda: evidence_writer.depth)
+metrics.queue_depth.labels(queue="clip_encoder").set_function(lambda: clip_recorder.stats()["queued_frames"])
+if vision_pool is not None:
+    metrics.queue_depth.labels(queue="frame_ring").set_function(lambda: vision_pool.stats()["slots_in_use"])
+if vision_graph is not None:
+    for stage in vision_graph.stages:
+        metrics.queue_depth.labels(queue=f"stage_{stage.name}").set_function(lambda stage=stage: len(stage.queue))
+metrics.active_sessions.labels(kind="vision").set(1)
+if METRICS_PORT:
+    metrics.serve(METRICS_PORT)
+    print(f"Metrics on http://localhost:{METRICS_PORT}/metrics")
+
+# kill -USR2 <pid> writes a profile of the capture, analyzer and writer threads into PROFILE_DIR
+sampling_profiler.install_signal_handler()
 
 try:
     while True:
-        frame = vs.read()
-        if frame is None:
+        # Block until the capture thread has a frame we have not processed yet
+        packet = vs.read_next(timeout=1.0)
+        if packet is None:
+            if vs.stopped:
+                break
             continue
+        frame_seq, frame_time, frame = packet
+        clip_recorder.add(frame, frame_time)
 
-        # Duplicate frames for independent processing
-        frame_eye = frame.copy()
-        frame_head = frame.copy()
-        frame_mobile = frame.copy()
+        now = time.monotonic()
 
-        # Submit detection tasks concurrently
-        future_eye = executor.submit(process_eye_movement, frame_eye)
-        if time.time() - start_time <= 5:  # Calibration period for head pose
-            future_head = executor.submit(process_head_pose, frame_head, None)
-        else:
-            future_head = executor.submit(process_head_pose, frame_head, calibrated_angles)
-        future_mobile = executor.submit(process_mobile_detection, frame_mobile)
+        # Run only the detectors that are due. They all read the same frame
+        # buffer and return annotations instead of drawing, so no copies are needed.
+        # Unchanged frames reuse the previous results without running anything.
+        results = {}
+        if vision_graph is not None:
+            # Stages run at their own pace; their results are paired on the newest
+            # frame every stage has finished, so gaze, head and phone describe one moment
+            if motion_gate.should_process(frame, now):
+                vision_graph.submit(frame_seq, frame_time, frame)
+            results = vision_graph.collect()
+        elif motion_gate.should_process(frame, now):
+            due = [name for name in ("gaze", "head", "mobile") if scheduler.due(name, now)]
+            head_angles = calibrated_angles if time.time() - start_time > 5 else None  # Calibration period for head pose
+            if vision_pool is not None:
+                if due:
+                    # Bounded wait: a frame that takes too long is skipped, a dead worker raises
+                    results = vision_pool.process(frame, due, calibrated_angles=head_angles,
+                                                  timeout=POOL_RESULT_TIMEOUT)
+            else:
+                # Shared landmark stage: gaze and head pose read the same detection
+                context = session.stage.process(frame)
+                futures = {}
+                if "gaze" in due:
+                    futures["gaze"] = executor.submit(session.gaze.process, frame, context)
+                if "head" in due:
+                    futures["head"] = executor.submit(session.head.process, frame, head_angles, context)
+                if "mobile" in due:
+                    futures["mobile"] = executor.submit(session.phone.process, frame)
+                results = {name: future.result() for name, future in futures.items()}
 
-        # Retrieve results from tasks
-        _, gaze_direction = future_eye.result()
-        _, head_direction = future_head.result()
-        _, mobile_detected = future_mobile.result()
+        # Record fresh results, carrying forward the last ones for skipped detectors
+        for name, (annotations, result) in results.items():
+            scheduler.record(name, result, now)
+        if "mobile" in results:
+            mobile_annotations = results["mobile"][0]
+        gaze_direction = scheduler.last("gaze")
+        head_direction = scheduler.last("head")
+        mobile_detected = scheduler.last("mobile")
 
         # During calibration, set the calibrated head pose values once
         # During calibration, update the calibration data only if valid.
-        if calibrated_angles is None and time.time() - start_time > 5:
-            _, cal_data = process_head_pose(frame.copy(), None)
+        # Until then head pose returns raw angles, so a fresh head result is the calibration data.
+        if calibrated_angles is None and time.time() - start_time > 5 and "head" in results:
+            _, cal_data = results["head"]
             if cal_data is not None and isinstance(cal_data, tuple) and len(cal_data) == 3:
                 calibrated_angles = cal_data
+                scheduler.force("head")
+                if vision_graph is not None:
+                    vision_graph.calibrated_angles = cal_data
 
-        # Update metrics counters
-        if mobile_detected:
+        # Update metrics counters (mobile detections count fresh runs only)
+        if "mobile" in results and mobile_detected:
             mobile_detection_counter += 1
 
         if head_direction != "Looking at Screen" and previous_head_direction == "Looking at Screen":
@@ -110,49 +228,49 @@ try:
                 eye_movement_counter[gaze_direction] += 1
         previous_gaze_direction = gaze_direction
 
-        # Use the mobile processed frame for display (has drawn boxes, etc.)
-        display_frame = frame_mobile.copy()
-
-        # Overlay detection results
-        cv2.putText(display_frame, f"Gaze Direction: {gaze_direction}", (20, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        # Overlay detection results (drawn later, only if the frame is shown or saved)
+        status_overlay = Annotations()
+        status_overlay.putText(f"Gaze Direction: {gaze_direction}", (20, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         if time.time() - start_time > 5:
-            cv2.putText(display_frame, f"Head Direction: {head_direction}", (20, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            status_overlay.putText(f"Head Direction: {head_direction}", (20, 60),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         else:
-            cv2.putText(display_frame, "Calibrating... Keep your head straight", (50, 200),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-        cv2.putText(display_frame, f"Mobile Detected: {mobile_detected}", (20, 90),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            status_overlay.putText("Calibrating... Keep your head straight", (50, 200),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        status_overlay.putText(f"Mobile Detected: {mobile_detected}", (20, 90),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
         # Overlay metrics counters
-        cv2.putText(display_frame, f"Mobile Detections: {mobile_detection_counter}", (20, 120),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
+        status_overlay.putText(f"Mobile Detections: {mobile_detection_counter}", (20, 120),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
 
-        cv2.putText(display_frame, "Head Pose Events:", (20, 150),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
+        status_overlay.putText("Head Pose Events:", (20, 150),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
         head_y = 180
         for direction, count in head_pose_counter.items():
-            cv2.putText(display_frame, f"{direction}: {count}", (20, head_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
+            status_overlay.putText(f"{direction}: {count}", (20, head_y),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
             head_y += 30
 
-        cv2.putText(display_frame, "Eye Movement Events:", (320, 150),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
+        status_overlay.putText("Eye Movement Events:", (320, 150),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
         eye_y = 180
         for direction, count in eye_movement_counter.items():
-            cv2.putText(display_frame, f"{direction}: {count}", (320, eye_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
+            status_overlay.putText(f"{direction}: {count}", (320, eye_y),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 200, 50), 2)
             eye_y += 30
 
-        # Check for head misalignment and save screenshot if misaligned for 3+ seconds
-        if head_direction != "Looking at Screen":
+        # Screenshots to save this frame
+        screenshots = []
+
+        # Check for head misalignment and save screenshot if misaligned for 3+ seconds.
+        # During calibration head pose returns raw angles, which are not events.
+        if isinstance(head_direction, str) and head_direction != "Looking at Screen":
             if head_misalignment_start_time is None:
                 head_misalignment_start_time = time.time()
             elif time.time() - head_misalignment_start_time >= 3:
-                filename = os.path.join(log_dir, f"head_{head_direction}_{int(time.time())}.png")
-                cv2.imwrite(filename, display_frame)
-                print(f"Screenshot saved: {filename}")
+                screenshots.append(("head", head_direction))
                 head_misalignment_start_time = None
         else:
             head_misalignment_start_time = None
@@ -162,9 +280,7 @@ try:
             if eye_misalignment_start_time is None:
                 eye_misalignment_start_time = time.time()
             elif time.time() - eye_misalignment_start_time >= 3:
-                filename = os.path.join(log_dir, f"eye_{gaze_direction}_{int(time.time())}.png")
-                cv2.imwrite(filename, display_frame)
-                print(f"Screenshot saved: {filename}")
+                screenshots.append(("eye", gaze_direction))
                 eye_misalignment_start_time = None
         else:
             eye_misalignment_start_time = None
@@ -174,20 +290,34 @@ try:
             if mobile_detection_start_time is None:
                 mobile_detection_start_time = time.time()
             elif time.time() - mobile_detection_start_time >= 3:
-                filename = os.path.join(log_dir, f"mobile_detected_{int(time.time())}.png")
-                cv2.imwrite(filename, display_frame)
-                print(f"Screenshot saved: {filename}")
+                screenshots.append(("mobile", None))
                 mobile_detection_start_time = None
         else:
             mobile_detection_start_time = None
 
-        cv2.imshow("Combined Detection", display_frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+        # Screenshots are composited, encoded and written on the writer thread
+        for event_type, direction in screenshots:
+            name = f"{event_type}_{direction or 'detected'}_{int(time.time())}"
+            evidence_writer.save(frame, name, (mobile_annotations, status_overlay), frame_time, event_type, direction)
+            clip_recorder.trigger(event_type, direction, frame_time)
+
+        # Composite the overlays for display only when the window is shown
+        if SHOW_WINDOW:
+            display_frame = compose(frame, mobile_annotations, status_overlay)
+            cv2.imshow("Combined Detection", display_frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
 
 finally:
     vs.stop()
     executor.shutdown()
+    if vision_pool is not None:
+        vision_pool.close()
+    if vision_graph is not None:
+        vision_graph.stop()
+    evidence_writer.close()
+    clip_recorder.close()
+    evidence_store.close()
     cv2.destroyAllWindows()
     
     # Print final metrics to terminal
@@ -198,4 +328,39 @@ finally:
         print(f"  {direction}: {count}")
     print("Eye Movement Events:")
     for direction, count in eye_movement_counter.items():
-        print(f"  {direction}: {count}")
\ No newline at end of file
+        print(f"  {direction}: {count}")
+    # In processes mode the face tracker runs in a worker; close() collected its stats
+    tracking_stats = vision_pool.tracking_stats.get(0) if vision_pool is not None else session.tracker.stats()
+    if tracking_stats is not None:
+        print(f"Face detection: {tracking_stats['full_detections']} full, "
+              f"{tracking_stats['skipped_detections']} skipped of {tracking_stats['frames']} frames")
+    stream_stats = vs.stats()
+    print(f"Frames: {stream_stats['captured']} captured, {stream_stats['consumed']} processed, "
+          f"{stream_stats['dropped']} dropped, {stream_stats['duplicated']} duplicated")
+    gate_stats = motion_gate.stats()
+    print(f"Motion gate: {gate_stats['hits']}/{gate_stats['frames']} frames reused ({gate_stats['hit_rate']:.1%}), "
+          f"{gate_stats['duplicates']} duplicates, {gate_stats['forced_refreshes']} forced refreshes")
+    if vision_pool is not None:
+        pool_stats = vision_pool.stats()
+        print(f"Vision pool: {pool_stats['workers']} workers, {pool_stats['completed']} frames, "
+              f"{pool_stats['rejected']} rejected, {pool_stats['timed_out']} timed out, "
+              f"{pool_stats['mean_worker_ms']:.1f} ms worker time per frame")
+    if vision_graph is not None:
+        print("Pipeline Stages:")
+        for name, stage_stats in vision_graph.stats().items():
+            print(f"  {name}: {stage_stats['processed']} processed, {stage_stats['dropped']} dropped, "
+                  f"{stage_stats['process_ms']['mean']:.1f} ms per frame, "
+                  f"end-to-end p95 {stage_stats['end_to_end_ms']['p95']:.1f} ms")
+    writer_stats = evidence_writer.stats()
+    print(f"Evidence: {writer_stats['written']} written, {writer_stats['deduplicated']} near-duplicates, "
+          f"{writer_stats['dropped']} dropped, "
+          f"max queue depth {writer_stats['max_depth']}, encode {writer_stats['encode_ms']['mean']:.1f} ms, "
+          f"write {writer_stats['write_ms']['mean']:.1f} ms")
+    clip_stats = clip_recorder.stats()
+    print(f"Clips: {clip_stats['clips_written']} written, {clip_stats['clips_dropped']} dropped, "
+          f"ring peak {clip_stats['peak_bytes'] / 2**20:.1f}/{clip_stats['max_bytes'] / 2**20:.0f} MB, "
+          f"{clip_stats['dropped_frames']} frames skipped by the encoder")
+    print("Detector Schedule:")
+    for name, detector_stats in scheduler.stats().items():
+        print(f"  {name}: {detector_stats['effective_hz']:.1f}/{detector_stats['target_hz']:.1f} Hz, "
+              f"{detector_stats['runs']} runs, {detector_stats['skipped']} skipped")
\ No newline at end of file
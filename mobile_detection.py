@@ -1,102 +1,241 @@
 import cv2
+import numpy as np
 import torch
 from ultralytics import YOLO
 import os
+import threading
+from collections import deque
+from overlay import Annotations
+from model_registry import registry, model_path
+from metrics import vision_stage_errors, vision_stage_seconds
 
-# Model configuration
-MODEL_PATH = r"C:\Interview portal\Cheating-Surveillance-System\models\best_yolov12.pt"
+# Model configuration (MOBILE_MODEL_PATH / MODEL_DIR, see model_registry.py)
+MODEL_PATH = model_path("mobile")
 
-# Try to load model with error handling
-try:
-    if not os.path.exists(MODEL_PATH):
-        print(f"WARNING: Mobile detection model file not found at {MODEL_PATH}")
-        print(f"Mobile detection will be disabled")
-        model = None
+# Inference backend: "torch" runs MODEL_PATH with PyTorch; "onnx" (ONNX Runtime)
+# and "openvino" run the CPU model built by export_mobile_model.py
+MOBILE_BACKEND = os.getenv("MOBILE_BACKEND", "torch")
+EXPORTED_MODEL_PATHS = {
+    "onnx": os.getenv("MOBILE_ONNX_PATH", "models/best_yolov12.onnx"),
+    "openvino": os.getenv("MOBILE_OPENVINO_PATH", "models/best_yolov12_openvino_model"),
+}
+# Exported models have a fixed input size; it must match the --imgsz used at export time
+EXPORT_IMGSZ = int(os.getenv("MOBILE_EXPORT_IMGSZ", "480"))
+
+device = "cuda" if torch.cuda.is_available() else "cpu"
+
+def load_model(backend=MOBILE_BACKEND):
+    """
+    Loads the phone detection model for `backend`. Returns None when its file is missing.
+    """
+    if backend == "torch":
+        path = MODEL_PATH
+    elif backend in EXPORTED_MODEL_PATHS:
+        path = EXPORTED_MODEL_PATHS[backend]
     else:
-        model = YOLO(MODEL_PATH)
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model.to(device)
-        print(f"Mobile Detection using device: {device}")
-except Exception as e:
-    print(f"Error loading mobile detection model: {str(e)}")
-    model = None
+        raise ValueError(f"Unknown mobile detection backend '{backend}'. Choose from: torch, {', '.join(EXPORTED_MODEL_PATHS)}")
+
+    if not os.path.exists(path):
+        print(f"WARNING: Mobile detection model file not found at {path}")
+        return None
+
+    if backend == "torch":
+        yolo_model = YOLO(path)
+        yolo_model.to(device)
+    else:
+        # ultralytics dispatches .onnx files to ONNX Runtime and *_openvino_model dirs to OpenVINO
+        yolo_model = YOLO(path, task="detect")
+    return yolo_model
 
 # Detection parameters: Increase confidence threshold to reduce false positives
 CONFIDENCE_THRESHOLD = 0.85   # Slightly lowered to catch more potential detections
-AUGMENT_DETECTION = True     # Enable augmentation for better detection across conditions
 IOU_THRESHOLD = 0.5          # For non-maximum suppression
 TEMPORAL_FILTER_SIZE = 5     # Number of frames to consider for temporal filtering
+MOBILE_CLASS_ID = 0          # Mobile class index in the trained model
+
+# Inference profiles: test-time augmentation multiplies inference cost, and a
+# smaller input size cuts it roughly quadratically. "half" only applies on CUDA.
+# Measure each profile on your hardware with benchmarks/bench_mobile_profiles.py
+# and its accuracy cost with benchmarks/bench_accuracy.py before switching.
+INFERENCE_PROFILES = {
+    "fast": {"augment": False, "imgsz": 320, "half": True},
+    "balanced": {"augment": False, "imgsz": 480, "half": True},
+    "accurate": {"augment": True, "imgsz": 640, "half": False},
+}
+# "accurate" matches the original detection settings (augment=True at 640)
+INFERENCE_PROFILE = os.getenv("MOBILE_INFERENCE_PROFILE", "accurate")
 
-# Initialize history for temporal filtering
-mobile_detection_history = []
+# ultralytics predictors keep per-call state, so calls into the shared model are serialized
+model_lock = threading.Lock()
 
-def process_mobile_detection(frame):
+# Per-call latency of the model (without waiting for model_lock), reported on /metrics
+YOLO_SECONDS = vision_stage_seconds.labels(stage="yolo")
+YOLO_BATCH_SECONDS = vision_stage_seconds.labels(stage="yolo_batch")
+MOBILE_ERRORS = vision_stage_errors.labels(stage="mobile")
+
+def inference_args(profile=None, backend=MOBILE_BACKEND, confidence=None):
     """
-    Processes a single video frame to detect mobile devices.
-    
-    Returns:
-      frame: The frame with drawn bounding boxes.
-      mobile_detected (bool): True if a mobile is detected, otherwise False.
+    Returns the YOLO call arguments for the named inference profile
+    (`confidence` overrides CONFIDENCE_THRESHOLD).
+
+    Exported backends ignore the profile's augmentation, input size and half
+    precision: they run at EXPORT_IMGSZ with the precision chosen at export.
+    """
+    profile = profile or INFERENCE_PROFILE
+    if profile not in INFERENCE_PROFILES:
+        raise ValueError(f"Unknown inference profile '{profile}'. Choose from: {', '.join(INFERENCE_PROFILES)}")
+    settings = INFERENCE_PROFILES[profile]
+    exported = backend != "torch"
+    return {
+        "verbose": False,
+        "augment": settings["augment"] and not exported,
+        "imgsz": EXPORT_IMGSZ if exported else settings["imgsz"],
+        "half": settings["half"] and device == "cuda" and not exported,
+        # Filtering by class and confidence inside the model leaves the boxes unchanged:
+        # NMS is per class and a lower-confidence box never suppresses a higher one.
+        # NMS itself keeps ultralytics' default IoU, as the original call did.
+        "classes": [MOBILE_CLASS_ID],
+        "conf": CONFIDENCE_THRESHOLD if confidence is None else confidence,
+    }
+
+def extract_detections(results, confidence=None):
+    """
+    Returns an (N, 4) float array of xyxy boxes and an (N,) array of confidences
+    for the mobile class at or above `confidence` (default CONFIDENCE_THRESHOLD).
+    """
+    confidence = CONFIDENCE_THRESHOLD if confidence is None else confidence
+    all_boxes = []
+    all_confidences = []
+    for result in results:
+        # One device-to-host copy per result; columns are x1, y1, x2, y2, [track id,] conf, cls
+        data = result.boxes.data.cpu().numpy()
+        keep = (data[:, -2] >= confidence) & (data[:, -1] == MOBILE_CLASS_ID)
+        all_boxes.append(data[keep, :4])
+        all_confidences.append(data[keep, -2])
+
+    if not all_boxes:
+        return np.empty((0, 4), dtype=np.float32), np.empty((0,), dtype=np.float32)
+    return np.concatenate(all_boxes), np.concatenate(all_confidences)
+
+def load_default_model():
+    yolo_model = load_model(MOBILE_BACKEND)
+    if yolo_model is None:
+        print(f"Mobile detection will be disabled")
+    else:
+        print(f"Mobile Detection using backend: {MOBILE_BACKEND}, device: {device if MOBILE_BACKEND == 'torch' else 'cpu'}")
+    return yolo_model
+
+def warmup_model(yolo_model):
+    # The first call builds the predictor and, on CUDA, initializes kernels
+    yolo_model(np.zeros((480, 640, 3), dtype=np.uint8), **inference_args())
+
+registry.register("mobile", load_default_model, warmup_model)
+
+def get_model():
+    """The shared phone detection model, loaded on first use. None if unavailable."""
+    return registry.get("mobile")
+
+def run_inference(frame, profile=None, confidence=None):
+    """
+    Runs the loaded model on `frame` with the settings of the named inference profile.
+    """
+    yolo_model = get_model()
+    with model_lock, YOLO_SECONDS.time():
+        results = yolo_model(frame, **inference_args(profile, confidence=confidence))
+    return extract_detections(results, confidence)
+
+def run_inference_batch(frames, profile=None):
+    """
+    Runs the loaded model on a list of frames in one call. Returns one
+    (boxes, confidences) pair per frame, as run_inference() does for one.
+    """
+    frames = list(frames)
+    if MOBILE_BACKEND != "torch":
+        # Exported models have a fixed batch size of 1 (export_mobile_model.py)
+        return [run_inference(frame, profile) for frame in frames]
+    yolo_model = get_model()
+    with model_lock, YOLO_BATCH_SECONDS.time():
+        results = yolo_model(frames, **inference_args(profile))
+    return [extract_detections([result]) for result in results]
+
+class PhoneDetector:
+    """
+    Phone detector for one candidate stream.
+
+    Each instance owns its temporal filtering history and inference profile;
+    the YOLO model is loaded once per process and shared by all instances.
     """
-    global mobile_detection_history
+    def __init__(self, profile=None, history_size=TEMPORAL_FILTER_SIZE):
+        self.profile = profile
+        self.history = deque(maxlen=history_size)
+
+    def update(self, current_frame_detection):
+        """
+        Adds one frame's raw detection to the temporal filter and returns the
+        filtered decision: positive only if the majority of recent frames had a detection.
+        """
+        self.history.append(current_frame_detection)
+        return sum(self.history) > (self.history.maxlen // 2)
+
+    def process(self, frame, profile=None):
+        """
+        Processes a single video frame to detect mobile devices.
+
+        Args:
+          frame: BGR frame to analyze. It is only read, never drawn on.
+          profile: Inference profile name from INFERENCE_PROFILES (defaults to the detector's profile).
     
-    # Check if model is loaded
-    if model is None:
-        # Draw text on frame to indicate mobile detection is disabled
-        cv2.putText(frame, "Mobile Detection Disabled", (10, 90),
-                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        return frame, False  # Default to no mobile detected
+        Returns:
+          annotations: Annotations (bounding boxes, confidence) to draw on the displayed frame.
+          mobile_detected (bool): True if a mobile is detected, otherwise False.
+        """
+        annotations = Annotations()
     
-    try:
-        # Run model with augmentation and multi-scale inference
-        results = model(frame, verbose=False, augment=AUGMENT_DETECTION)
-        current_frame_detection = False
-
-        for result in results:
-            # Apply non-maximum suppression to remove overlapping detections
-            boxes = []
-            confidences = []
-            
-            for box in result.boxes:
-                conf = box.conf[0].item()  # Confidence score
-                cls = int(box.cls[0].item())  # Expect mobile class index = 0
-
-                if conf < CONFIDENCE_THRESHOLD or cls != 0:
-                    continue
-                
-                boxes.append(box.xyxy[0].cpu().numpy())
-                confidences.append(conf)
-                current_frame_detection = True
-            
-            # Draw and update for detections after filtering
-            for i, box in enumerate(boxes):
-                x1, y1, x2, y2 = map(int, box)
-                label = f"Mobile ({confidences[i]:.2f})"
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 3)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX,
-                            0.6, (0, 255, 0), 2)
-        
-        # Update temporal filtering history
-        mobile_detection_history.append(current_frame_detection)
-        if len(mobile_detection_history) > TEMPORAL_FILTER_SIZE:
-            mobile_detection_history.pop(0)
+        # Check if model is loaded
+        if get_model() is None:
+            # Indicate on the frame that mobile detection is disabled
+            annotations.putText("Mobile Detection Disabled", (10, 90),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return annotations, False  # Default to no mobile detected
+    
+        try:
+            # Class filter, confidence threshold and NMS all run inside the model call
+            boxes, confidences = run_inference(frame, profile or self.profile)
+            current_frame_detection = len(boxes) > 0
+
+            # Draw detections after filtering
+            for (x1, y1, x2, y2), conf in zip(boxes.astype(int).tolist(), confidences.tolist()):
+                label = f"Mobile ({conf:.2f})"
+                annotations.rectangle((x1, y1), (x2, y2), (0, 255, 0), 3)
+                annotations.putText(label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX,
+                                    0.6, (0, 255, 0), 2)
         
-        # Apply temporal filtering - only return positive if majority of recent frames had detection
-        mobile_detected = sum(mobile_detection_history) > (TEMPORAL_FILTER_SIZE // 2)
+            # Update temporal filtering history and apply it
+            mobile_detected = self.update(current_frame_detection)
         
-        # Add confidence indicator
-        confidence_level = sum(mobile_detection_history) / len(mobile_detection_history)
-        cv2.putText(frame, f"Detection confidence: {confidence_level:.2f}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            # Add confidence indicator
+            confidence_level = sum(self.history) / len(self.history)
+            annotations.putText(f"Detection confidence: {confidence_level:.2f}", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
 
-        return frame, mobile_detected
+            return annotations, mobile_detected
     
-    except Exception as e:
-        # If error occurs during detection, log it and return no detection
-        print(f"Error in mobile detection: {str(e)}")
-        cv2.putText(frame, "Mobile Detection Error", (10, 90),
-                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        return frame, False
+        except Exception as e:
+            MOBILE_ERRORS.inc()
+            # If error occurs during detection, log it and return no detection
+            print(f"Error in mobile detection: {str(e)}")
+            annotations.putText("Mobile Detection Error", (10, 90),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return annotations, False
+
+# Default detector behind the module-level function
+default_detector = PhoneDetector()
+
+def process_mobile_detection(frame, profile=None):
+    """
+    Processes a single video frame with the default PhoneDetector. See PhoneDetector.process.
+    """
+    return default_detector.process(frame, profile)
 
 if __name__ == "__main__":
     cap = cv2.VideoCapture(0)
@@ -110,7 +249,8 @@ if __name__ == "__main__":
             print("Failed to grab frame. Exiting...")
             break
 
-        processed_frame, mobile_detected = process_mobile_detection(frame)
+        annotations, mobile_detected = process_mobile_detection(frame)
+        processed_frame = annotations.draw(frame)
         if mobile_detected:
             print("Mobile detected in current frame.")
 
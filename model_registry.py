@@ -0,0 +1,114 @@
+import gc
+import os
+import threading
+import time
+
+# Model files, resolved relative to MODEL_DIR unless overridden one by one
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_PATHS = {
+    "landmarks": os.getenv("LANDMARK_MODEL_PATH", os.path.join(MODEL_DIR, "shape_predictor_68_face_landmarks.dat")),
+    "mobile": os.getenv("MOBILE_MODEL_PATH", os.path.join(MODEL_DIR, "best_yolov12.pt")),
+}
+# Run one dummy inference right after loading each model
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") != "0"
+
+def model_path(name):
+    """Configured file path of the model `name`."""
+    return MODEL_PATHS[name]
+
+class ModelRegistry:
+    """
+    One shared instance of every model per process, loaded on first use.
+
+    Modules register a loader (and optionally a warmup function) at import,
+    which costs nothing; the model is loaded the first time get() is called.
+    The warmup runs one dummy inference right after loading so the first real
+    frame does not pay for lazy initialization inside the model libraries.
+
+    A loader that fails or returns None (e.g. the file is missing) is recorded
+    as unavailable and not retried, so callers can simply check for None.
+
+    For pre-fork servers and worker pools, preload() the models whose
+    libraries start no threads (dlib) in the parent before forking: the
+    workers then share their memory copy-on-write instead of each loading
+    their own copy. torch and OpenCV DNN models must be loaded after the fork,
+    in each worker (see FORK_SHARED_MODELS in vision_pool.py).
+    benchmarks/bench_model_registry.py --pool measures the difference.
+    """
+    def __init__(self, warmup=MODEL_WARMUP):
+        self.warmup = warmup
+        self._loaders = {}
+        self._warmups = {}
+        self._models = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+        self.load_times = {}
+        self.warmup_times = {}
+
+    def register(self, name, loader, warmup=None):
+        """Registers `loader()` (and `warmup(model)`) for `name` without loading anything."""
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._warmups[name] = warmup
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """Returns the shared model `name`, loading and warming it up on first use. None if unavailable."""
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"No model registered as '{name}'. Registered: {', '.join(self._loaders)}")
+        with self._locks[name]:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+        return self._models[name]
+
+    def _load(self, name):
+        start = time.perf_counter()
+        try:
+            model = self._loaders[name]()
+        except Exception as e:
+            print(f"Error loading model '{name}': {str(e)}")
+            return None
+        self.load_times[name] = time.perf_counter() - start
+        if model is None:
+            return None
+
+        warmup = self._warmups[name]
+        if warmup is not None and self.warmup:
+            start = time.perf_counter()
+            try:
+                warmup(model)
+            except Exception as e:
+                print(f"Warmup of model '{name}' failed: {str(e)}")
+            self.warmup_times[name] = time.perf_counter() - start
+        return model
+
+    def is_loaded(self, name):
+        return self._models.get(name) is not None
+
+    def preload(self, names=None):
+        """
+        Loads and warms up `names` (default: every registered model) now.
+
+        Afterwards the objects allocated so far are moved out of the garbage
+        collector's reach (gc.freeze), so collections in forked workers do not
+        touch, and therefore copy, the pages holding the models.
+        """
+        for name in names or list(self._loaders):
+            self.get(name)
+        gc.freeze()
+        return {name: self.is_loaded(name) for name in names or self._loaders}
+
+    def stats(self):
+        return {
+            name: {
+                "loaded": self.is_loaded(name),
+                "load_s": self.load_times.get(name),
+                "warmup_s": self.warmup_times.get(name),
+            }
+            for name in self._loaders
+        }
+
+# Process-wide registry used by face_landmarks and mobile_detection
+registry = ModelRegistry()
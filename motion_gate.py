@@ -0,0 +1,81 @@
+import cv2
+import threading
+import time
+
+# Frames are compared on a small gray thumbnail; differences are mean absolute
+# pixel differences on a 0-255 scale
+GATE_SIZE = (64, 48)
+MOTION_THRESHOLD = 3.0          # Below this the frame counts as unchanged
+FORCED_REFRESH_INTERVAL = 1.0   # Seconds after which a frame is processed regardless
+
+class MotionGate:
+    """
+    Cheap frame-difference gate in front of the detectors.
+
+    Each frame is shrunk to a GATE_SIZE gray thumbnail and compared with the
+    thumbnail of the last frame that was actually processed. If the mean
+    absolute difference stays below `threshold`, the caller should reuse its
+    previous results. The exact same array object (the capture thread has not
+    produced a new frame) is always a hit. A frame is processed at least every
+    `refresh_interval` seconds so results never go stale.
+    """
+    def __init__(self, threshold=MOTION_THRESHOLD, refresh_interval=FORCED_REFRESH_INTERVAL, size=GATE_SIZE):
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self._reference = None
+        self._last_frame = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.frames = 0
+        self.hits = 0
+        self.duplicates = 0
+        self.forced_refreshes = 0
+        self.last_difference = 0.0
+
+    def should_process(self, frame, now=None):
+        """Returns True if `frame` differs enough (or is due a refresh) to run the detectors."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.frames += 1
+            if frame is self._last_frame and now - self._last_refresh < self.refresh_interval:
+                self.hits += 1
+                self.duplicates += 1
+                return False
+            self._last_frame = frame
+
+            thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), self.size, interpolation=cv2.INTER_AREA)
+            if self._reference is None:
+                self._refresh(thumbnail, now)
+                return True
+
+            self.last_difference = float(cv2.absdiff(thumbnail, self._reference).mean())
+            if self.last_difference >= self.threshold:
+                self._refresh(thumbnail, now)
+                return True
+            if now - self._last_refresh >= self.refresh_interval:
+                self.forced_refreshes += 1
+                self._refresh(thumbnail, now)
+                return True
+
+            self.hits += 1
+            return False
+
+    def _refresh(self, thumbnail, now):
+        self._reference = thumbnail
+        self._last_refresh = now
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.frames if self.frames else 0.0
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "hits": self.hits,
+            "duplicates": self.duplicates,
+            "forced_refreshes": self.forced_refreshes,
+            "hit_rate": self.hit_rate,
+        }
@@ -0,0 +1,48 @@
+import cv2
+
+class Annotations:
+    """
+    Drawing commands recorded as data instead of being drawn on a frame.
+
+    Analyzers treat their input frame as read-only and return an Annotations
+    object; the caller composites everything onto a single copy of the frame,
+    and only when that frame is actually displayed or saved. The methods
+    mirror the cv2 drawing functions without the image argument.
+    """
+    def __init__(self):
+        self.items = []
+
+    def rectangle(self, pt1, pt2, color, thickness=1):
+        self.items.append(("rectangle", (pt1, pt2, color, thickness)))
+
+    def circle(self, center, radius, color, thickness=1):
+        self.items.append(("circle", (center, radius, color, thickness)))
+
+    def putText(self, text, org, fontFace, fontScale, color, thickness=1):
+        self.items.append(("putText", (text, org, fontFace, fontScale, color, thickness)))
+
+    def extend(self, other):
+        """Appends the items of another Annotations (or None) after these."""
+        if other is not None:
+            self.items.extend(other.items)
+        return self
+
+    def draw(self, frame):
+        """Draws every recorded item onto `frame` in place and returns it."""
+        for name, args in self.items:
+            getattr(cv2, name)(frame, *args)
+        return frame
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+def compose(frame, *layers):
+    """Returns one copy of `frame` with all annotation layers drawn in order."""
+    output = frame.copy()
+    for layer in layers:
+        if layer is not None:
+            layer.draw(output)
+    return output
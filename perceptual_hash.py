@@ -0,0 +1,130 @@
+"""
+Perceptual hashing (dHash) of evidence screenshots, and a batch tool that
+finds near-duplicate screenshots in the existing log directories.
+
+Examples (from the repository root):
+    python perceptual_hash.py log_Devam                    # report only
+    python perceptual_hash.py log log_Devam --move-to duplicates
+    python perceptual_hash.py log_Raj --threshold 4 --delete
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+from collections import deque
+import cv2
+import numpy as np
+
+HASH_SIZE = 8           # 8x8 gradient bits -> 64-bit hash
+DEDUP_THRESHOLD = 6     # Max differing bits (of 64) for two frames to count as near-duplicates
+DEDUP_WINDOW = 64       # Kept hashes per event kind compared against each new frame
+
+# Number of set bits in every byte value, for Hamming distances without np.bitwise_count
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+def dhash(frame, hash_size=HASH_SIZE):
+    """
+    Difference hash of a BGR or gray image: shrink to (hash_size + 1) x hash_size
+    gray pixels and record whether each pixel is brighter than its right
+    neighbour. Returns a Python int with hash_size**2 bits.
+    """
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming_distances(hashes, value):
+    """Differing bits between `value` and each 64-bit hash in `hashes` (array of uint64)."""
+    differences = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(value))
+    return _POPCOUNT[differences.view(np.uint8)].reshape(len(differences), 8).sum(axis=1)
+
+class DuplicateIndex:
+    """
+    Remembers the hashes of recently kept screenshots per event kind and
+    tells whether a new one is a near-duplicate of any of them.
+
+    find() returns the reference (whatever was passed to add(), e.g. a blob
+    digest or path) of the closest earlier screenshot within `threshold`
+    bits, or None if the new screenshot should be kept.
+    """
+    def __init__(self, threshold=DEDUP_THRESHOLD, window=DEDUP_WINDOW):
+        self.threshold = threshold
+        self.window = window
+        self._kept = {}
+
+    def find(self, key, value):
+        kept = self._kept.get(key)
+        if not kept:
+            return None
+        distances = hamming_distances([entry[0] for entry in kept], value)
+        closest = int(distances.argmin())
+        return kept[closest][1] if distances[closest] <= self.threshold else None
+
+    def add(self, key, value, reference):
+        self._kept.setdefault(key, deque(maxlen=self.window)).append((value, reference))
+
+def find_duplicates(paths, threshold=DEDUP_THRESHOLD, window=DEDUP_WINDOW, key=None):
+    """
+    Walks `paths` in order and returns {duplicate path: kept path it duplicates}.
+    `key(path)` groups screenshots that may be compared (default: all together).
+    """
+    index = DuplicateIndex(threshold, window)
+    duplicates = {}
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            continue
+        value = dhash(image)
+        group = key(path) if key is not None else None
+        original = index.find(group, value)
+        if original is None:
+            index.add(group, value, path)
+        else:
+            duplicates[path] = original
+    return duplicates
+
+def event_key(path):
+    """Screenshots are only compared with others of the same event type and direction."""
+    from evidence_store import parse_evidence_name
+    parsed = parse_evidence_name(path)
+    return parsed[:2] if parsed is not None else None
+
+def event_order(path):
+    from evidence_store import parse_evidence_name
+    parsed = parse_evidence_name(path)
+    return (parsed[2] if parsed is not None else 0.0, path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directories", nargs="+", help="Log directories to deduplicate (each on its own)")
+    parser.add_argument("--threshold", type=int, default=DEDUP_THRESHOLD, help="Max differing hash bits")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--move-to", help="Move duplicates into this directory (one subdirectory per log directory)")
+    action.add_argument("--delete", action="store_true", help="Delete duplicates")
+    args = parser.parse_args()
+
+    total_files = total_duplicates = total_bytes = 0
+    for directory in args.directories:
+        paths = sorted(glob.glob(os.path.join(directory, "*.*")), key=event_order)
+        duplicates = find_duplicates(paths, args.threshold, key=event_key)
+        duplicate_bytes = sum(os.path.getsize(path) for path in duplicates)
+        print(f"{directory}: {len(duplicates)} of {len(paths)} screenshots are near-duplicates "
+              f"({duplicate_bytes / 2**20:.1f} MB)")
+        for path in duplicates:
+            if args.delete:
+                os.remove(path)
+            elif args.move_to:
+                target = os.path.join(args.move_to, os.path.basename(os.path.normpath(directory)))
+                os.makedirs(target, exist_ok=True)
+                shutil.move(path, os.path.join(target, os.path.basename(path)))
+        total_files += len(paths)
+        total_duplicates += len(duplicates)
+        total_bytes += duplicate_bytes
+
+    verb = "Deleted" if args.delete else "Moved" if args.move_to else "Would remove"
+    print(f"{verb} {total_duplicates} of {total_files} screenshots, {total_bytes / 2**20:.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
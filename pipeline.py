@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import deque, namedtuple
+import numpy as np
+
+# Items waiting in front of each stage. With 1, a stage always works on the
+# newest frame it can get; older frames are dropped instead of queueing up.
+STAGE_QUEUE_SIZE = 1
+# Latency samples kept per stage for the statistics
+LATENCY_WINDOW = 1000
+# Results kept per stage for joining by timestamp
+FUSION_HISTORY = 64
+
+# One output of a stage for one frame. `timestamp` is the capture time of the
+# frame; `finished` is when the stage produced the result (both time.time()).
+StageResult = namedtuple("StageResult", ["stage", "seq", "timestamp", "value", "finished"])
+
+class BoundedQueue:
+    """
+    Small FIFO that never blocks the producer: when full, the oldest item is
+    dropped to make room, so a slow stage falls behind by skipping frames
+    rather than by accumulating latency.
+    """
+    def __init__(self, maxsize=STAGE_QUEUE_SIZE):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Oldest queued item, or None on timeout or once closed."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self.closed, timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+class Fusion:
+    """
+    Joins the stages' outputs on the capture time of their frames. Keeps the
+    recent results of every stage so the consumer can look up what each stage
+    had produced for the frame captured at (or just before) a given time, and
+    collect() pairs the stages on the newest frame all of them have reached.
+    """
+    def __init__(self, history=FUSION_HISTORY):
+        self._results = {}
+        self._collected = {}
+        self._history = history
+        self._lock = threading.Lock()
+
+    def update(self, result):
+        with self._lock:
+            self._results.setdefault(result.stage, deque(maxlen=self._history)).append(result)
+
+    def latest(self, stage):
+        with self._lock:
+            results = self._results.get(stage)
+            return results[-1] if results else None
+
+    def at(self, timestamp):
+        """Per stage, the result for the newest frame captured at or before `timestamp`."""
+        joined = {}
+        with self._lock:
+            for stage, results in self._results.items():
+                for result in reversed(results):
+                    if result.timestamp <= timestamp:
+                        joined[stage] = result
+                        break
+        return joined
+
+    def horizon(self):
+        """Capture time of the newest frame every stage has a result for, or None before any result."""
+        with self._lock:
+            latest = [results[-1].timestamp for results in self._results.values() if results]
+        return min(latest) if latest else None
+
+    def collect(self):
+        """
+        Results paired on capture time: at(horizon()), i.e. per stage its
+        result for the newest frame at or before the one the slowest stage
+        has reached. Only stages whose paired result moved forward since the
+        last collect() are returned.
+        """
+        horizon = self.horizon()
+        if horizon is None:
+            return {}
+        fresh = {}
+        joined = self.at(horizon)
+        with self._lock:
+            for stage, result in joined.items():
+                previous = self._collected.get(stage)
+                if previous is None or result.seq > previous:
+                    fresh[stage] = result
+                    self._collected[stage] = result.seq
+        return fresh
+
+class PipelineStage:
+    """
+    One stage of the graph: a thread that takes (seq, timestamp, payload) items
+    from its BoundedQueue, runs `fn(payload)` and hands (seq, timestamp, value)
+    to its downstream stages and to the fusion.
+
+    Records how long items wait in the queue, how long `fn` takes, and the
+    end-to-end latency from frame capture to the stage's result.
+    """
+    def __init__(self, name, fn, fusion=None, queue_size=STAGE_QUEUE_SIZE, publish=True):
+        self.name = name
+        self.fn = fn
+        self.fusion = fusion
+        self.publish = publish
+        self.queue = BoundedQueue(queue_size)
+        self.downstream = []
+        self._thread = None
+        self._stopped = False
+
+        # Counters and latency samples (milliseconds)
+        self.processed = 0
+        self.errors = 0
+        self.wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self.process_ms = deque(maxlen=LATENCY_WINDOW)
+        self.end_to_end_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def connect(self, stage):
+        self.downstream.append(stage)
+        return stage
+
+    def put(self, seq, timestamp, payload):
+        self.queue.put((seq, timestamp, payload, time.perf_counter()))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self.queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stopped:
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            seq, timestamp, payload, queued = item
+            started = time.perf_counter()
+            try:
+                value = self.fn(payload)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in pipeline stage {self.name}: {str(e)}")
+                continue
+            finished = time.perf_counter()
+            self.processed += 1
+            self.wait_ms.append((started - queued) * 1000)
+            self.process_ms.append((finished - started) * 1000)
+            self.end_to_end_ms.append((time.time() - timestamp) * 1000)
+
+            for stage in self.downstream:
+                stage.put(seq, timestamp, value)
+            if self.publish and self.fusion is not None:
+                self.fusion.update(StageResult(self.name, seq, timestamp, value, time.time()))
+
+    def stats(self):
+        def summary(samples):
+            if not samples:
+                return {"mean": 0.0, "p95": 0.0}
+            values = np.array(samples)
+            return {"mean": float(values.mean()), "p95": float(np.percentile(values, 95))}
+        return {
+            "processed": self.processed,
+            "dropped": self.queue.dropped,
+            "errors": self.errors,
+            "queue_depth": len(self.queue),
+            "wait_ms": summary(self.wait_ms),
+            "process_ms": summary(self.process_ms),
+            "end_to_end_ms": summary(self.end_to_end_ms),
+        }
+
+class StageGraph:
+    """
+    The vision analyzers as a pipelined graph instead of a per-frame barrier:
+
+        frame -> landmarks -> gaze
+                           -> head
+        frame -> mobile
+
+    Every stage runs in its own thread at its own pace, with a bounded queue
+    in front of it, so gaze keeps up with the camera while phone detection
+    lags behind on older frames. Results meet in `fusion`, keyed by the
+    capture timestamp of the frame they were computed on, and are handed out
+    paired on the newest frame every stage has reached: the stages never wait
+    for each other, the fused view advances at the pace of the slowest one.
+    """
+    def __init__(self, session, queue_size=STAGE_QUEUE_SIZE):
+        self.session = session
+        self.calibrated_angles = None
+        self.fusion = Fusion()
+
+        self.landmarks = PipelineStage("landmarks", self._landmarks, self.fusion, queue_size, publish=False)
+        self.landmarks.connect(PipelineStage("gaze", self._gaze, self.fusion, queue_size))
+        self.landmarks.connect(PipelineStage("head", self._head, self.fusion, queue_size))
+        self.mobile = PipelineStage("mobile", session.phone.process, self.fusion, queue_size)
+        self.stages = [self.landmarks] + self.landmarks.downstream + [self.mobile]
+
+    def _landmarks(self, frame):
+        context = self.session.stage.process(frame)
+        context.landmarks  # Computed here so gaze and head only read them
+        return context
+
+    def _gaze(self, context):
+        return self.session.gaze.process(context.frame, context)
+
+    def _head(self, context):
+        return self.session.head.process(context.frame, self.calibrated_angles, context)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def submit(self, seq, timestamp, frame):
+        """Feeds a captured frame to the source stages. Never blocks."""
+        self.landmarks.put(seq, timestamp, frame)
+        self.mobile.put(seq, timestamp, frame)
+
+    def collect(self):
+        """
+        {stage: (annotations, value)} paired on capture time (see Fusion.collect),
+        for every analyzer whose paired result is new since the last call.
+        """
+        return {stage: result.value for stage, result in self.fusion.collect().items()}
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
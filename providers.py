@@ -0,0 +1,55 @@
+import threading
+
+class LazyProvider:
+    """
+    Builds an external integration (LLM client, speech API client, ...) the
+    first time it is used instead of at import.
+
+    `factory` is called once, under a lock, on first attribute access; the
+    provider then forwards every attribute to the built client, so
+    `provider.invoke(...)` works exactly like `client.invoke(...)`. Heavy
+    third-party imports belong inside the factory.
+    """
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the client, building it on first call."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @property
+    def loaded(self):
+        return self._client is not None
+
+    def __getattr__(self, attribute):
+        # Only called for attributes not found on the provider itself. Private
+        # names are never forwarded (avoids recursion before __init__ ran, e.g. in copy)
+        if attribute.startswith("_"):
+            raise AttributeError(attribute)
+        return getattr(self.get(), attribute)
+
+    def __repr__(self):
+        return f"LazyProvider({self.name!r}, loaded={self.loaded})"
+
+class LazyPromptTemplate:
+    """
+    Drop-in stand-in for langchain's PromptTemplate that only imports langchain
+    the first time format() is called.
+    """
+    def __init__(self, input_variables, template):
+        self.input_variables = input_variables
+        self.template = template
+        self._prompt = None
+
+    def format(self, **kwargs):
+        if self._prompt is None:
+            from langchain.prompts import PromptTemplate
+            self._prompt = PromptTemplate(input_variables=self.input_variables, template=self.template)
+        return self._prompt.format(**kwargs)
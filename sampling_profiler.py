@@ -0,0 +1,160 @@
+"""
+On-demand sampling profiler for every thread of the process.
+
+The sampler reads sys._current_frames() at a fixed interval for a
+given number of seconds and counts the stacks it sees, per thread (Flask
+request threads, recording, TTS, vision stages, writers...). Nothing is
+hooked into the interpreter, so the cost is one short stack walk per
+thread per sample while a profile runs, and zero otherwise.
+
+Output is collapsed stacks ("thread;outer;...;inner count" lines, for
+flamegraph.pl / speedscope / inferno) or a speedscope JSON file.
+
+interview_api exposes it as /admin/profile; a process that installed the
+signal handler writes a profile into PROFILE_DIR on SIGUSR2:
+    kill -USR2 <pid>
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_INTERVAL = 0.005        # Seconds between samples (200 Hz)
+PROFILE_MAX_SECONDS = 120       # Longest profile one request may ask for
+PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# Only one profile runs at a time per process
+_running = threading.Lock()
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+class Profile:
+    """Stack samples of one profiling run: {(thread name, frames root first): count}."""
+    def __init__(self, samples, interval, started, duration):
+        self.samples = samples
+        self.interval = interval
+        self.started = started
+        self.duration = duration
+
+    @property
+    def sample_count(self):
+        return sum(self.samples.values())
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format, one "thread;frame;...;frame count" line per stack."""
+        lines = []
+        for (thread, frames), count in sorted(self.samples.items()):
+            names = [thread] + [f"{function} ({filename}:{line})" for filename, function, line in frames]
+            lines.append(f"{';'.join(name.replace(';', ':') for name in names)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name="profile"):
+        """The profile as a speedscope file (one sampled profile per thread), as a dict."""
+        frame_index = {}
+        shared_frames = []
+        profiles = {}
+        for (thread, frames), count in sorted(self.samples.items()):
+            stack = []
+            for frame in frames:
+                if frame not in frame_index:
+                    frame_index[frame] = len(shared_frames)
+                    filename, function, line = frame
+                    shared_frames.append({"name": function, "file": filename, "line": line})
+                stack.append(frame_index[frame])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "seconds",
+                "startValue": 0, "endValue": self.duration, "samples": [], "weights": [],
+            })
+            profile["samples"].append(stack)
+            profile["weights"].append(count * self.interval)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "sampling_profiler.py",
+            "activeProfileIndex": 0,
+            "shared": {"frames": shared_frames},
+            "profiles": list(profiles.values()),
+        }
+
+def _stack(frame):
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        # Aggregate by function: the line the function starts at, not the current line
+        frames.append((os.path.basename(code.co_filename), code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+def profile(seconds, interval=PROFILE_INTERVAL):
+    """
+    Samples every thread except the caller for `seconds`. Blocks for that
+    long and returns a Profile. Raises ProfilerBusy if one is already running.
+    """
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        own = threading.get_ident()
+        samples = Counter()
+        started = time.time()
+        deadline = time.perf_counter() + seconds
+        next_sample = time.perf_counter()
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    samples[(names.get(ident, f"thread-{ident}"), _stack(frame))] += 1
+            next_sample += interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_sample = time.perf_counter()  # Fell behind: skip missed samples instead of bursting
+        return Profile(samples, interval, started, time.time() - started)
+    finally:
+        _running.release()
+
+def write_profile(result, directory=PROFILE_DIR, fmt="collapsed"):
+    """Writes a Profile into `directory` and returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, time.strftime("profile_%Y%m%d_%H%M%S", time.localtime(result.started)))
+    if fmt == "speedscope":
+        path = f"{stem}.speedscope.json"
+        with open(path, "w") as f:
+            json.dump(result.speedscope(os.path.basename(stem)), f)
+    else:
+        path = f"{stem}.collapsed.txt"
+        with open(path, "w") as f:
+            f.write(result.collapsed())
+    return path
+
+def install_signal_handler(signum=getattr(signal, "SIGUSR2", None), seconds=PROFILE_SIGNAL_SECONDS,
+                           directory=PROFILE_DIR, fmt="collapsed"):
+    """
+    Profiles the process for `seconds` on `signum` (SIGUSR2) and writes the
+    result into `directory`. Returns False where the signal is unavailable
+    (Windows) or when not called from the main thread.
+    """
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def run():
+        try:
+            path = write_profile(profile(seconds), directory, fmt)
+            print(f"Profile written to {path}")
+        except ProfilerBusy:
+            print("Profile request ignored: a profile is already running")
+
+    def handler(received, frame):
+        # Sample from a thread of its own: the handler runs on the main thread
+        threading.Thread(target=run, name="sampling-profiler", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
@@ -0,0 +1,88 @@
+import threading
+import time
+
+# Default target rates in Hz. Phone presence changes far more slowly than gaze.
+DEFAULT_RATES = {"gaze": 15.0, "head": 10.0, "mobile": 2.0}
+BOOST_RATE = 30.0      # Rate used right after a detector's result changes state
+BOOST_DURATION = 1.0   # Seconds a detector stays boosted after a state change
+
+class DetectorScheduler:
+    """
+    Decides which detectors run on each frame so that every detector runs at
+    its own target rate instead of in lockstep with the capture loop.
+
+    Between runs the last result is carried forward. When a detector's result
+    changes (e.g. "Looking at Screen" -> "Looking Left") it is boosted to
+    BOOST_RATE for BOOST_DURATION seconds, so a new event is confirmed or
+    dismissed quickly while steady state stays cheap.
+
+    Usage per frame:
+        if scheduler.due("mobile"):
+            scheduler.record("mobile", process_mobile_detection(frame)[1])
+        mobile_detected = scheduler.last("mobile")
+    """
+    def __init__(self, rates=None, boost_rate=BOOST_RATE, boost_duration=BOOST_DURATION, defaults=None):
+        self.rates = dict(rates or DEFAULT_RATES)
+        self.boost_rate = boost_rate
+        self.boost_duration = boost_duration
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last_run = {name: None for name in self.rates}
+        self._boost_until = {name: 0.0 for name in self.rates}
+        self._results = dict(defaults or {})
+        self.runs = {name: 0 for name in self.rates}
+        self.skipped = {name: 0 for name in self.rates}
+        self.state_changes = {name: 0 for name in self.rates}
+
+    def current_rate(self, name, now=None):
+        now = time.monotonic() if now is None else now
+        if now < self._boost_until[name]:
+            return max(self.rates[name], self.boost_rate)
+        return self.rates[name]
+
+    def due(self, name, now=None):
+        """
+        Returns True if `name` should run now, and counts the decision. A
+        detector that has never produced a result is always due.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            last_run = self._last_run[name]
+            if last_run is None or now - last_run >= 1.0 / self.current_rate(name, now):
+                self._last_run[name] = now
+                self.runs[name] += 1
+                return True
+            self.skipped[name] += 1
+            return False
+
+    def record(self, name, result, now=None):
+        """Stores a fresh result for `name`, boosting it if the result changed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if name in self._results and self._results[name] != result:
+                self.state_changes[name] += 1
+                self._boost_until[name] = now + self.boost_duration
+            self._results[name] = result
+
+    def last(self, name, default=None):
+        """Last recorded result for `name` (carried forward between runs)."""
+        return self._results.get(name, default)
+
+    def force(self, name):
+        """Makes `name` due on the next call to due(), e.g. after recalibration."""
+        with self._lock:
+            self._last_run[name] = None
+
+    def stats(self):
+        """Per-detector target rate, achieved rate, and run/skip counts."""
+        elapsed = max(time.monotonic() - self._start, 1e-9)
+        return {
+            name: {
+                "target_hz": self.rates[name],
+                "effective_hz": self.runs[name] / elapsed,
+                "runs": self.runs[name],
+                "skipped": self.skipped[name],
+                "state_changes": self.state_changes[name],
+            }
+            for name in self.rates
+        }
@@ -0,0 +1,66 @@
+"""
+The admin evidence endpoints serve candidate screenshots and clips, and
+/admin/profile exposes the process internals, so they must refuse every
+request that does not carry ADMIN_TOKEN in the X-Admin-Token header.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("numpy")
+pytest.importorskip("cryptography")
+pytest.importorskip("dotenv")
+
+import interview_api
+from evidence_store import EvidenceStore
+
+TOKEN = "test-admin-token"
+
+EVIDENCE_ROUTES = [
+    "/admin/evidence/sessions",
+    "/admin/evidence",
+    "/admin/evidence?session=candidate&event_type=head",
+    "/admin/evidence/1/image",
+    "/admin/evidence/1/file",
+]
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = EvidenceStore(root=str(tmp_path))
+    monkeypatch.setattr(interview_api, "evidence_store", store)
+    monkeypatch.setattr(interview_api, "ADMIN_TOKEN", TOKEN)
+    yield interview_api.app.test_client()
+    store.close()
+
+@pytest.mark.parametrize("route", EVIDENCE_ROUTES)
+def test_evidence_refused_without_token(client, route):
+    assert client.get(route).status_code == 403
+
+@pytest.mark.parametrize("route", EVIDENCE_ROUTES)
+def test_evidence_refused_with_wrong_token(client, route):
+    assert client.get(route, headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+@pytest.mark.parametrize("route", EVIDENCE_ROUTES)
+def test_evidence_refused_when_token_unset(client, monkeypatch, route):
+    monkeypatch.setattr(interview_api, "ADMIN_TOKEN", None)
+    assert client.get(route, headers={"X-Admin-Token": TOKEN}).status_code == 403
+
+def test_evidence_served_with_token(client):
+    headers = {"X-Admin-Token": TOKEN}
+    response = client.get("/admin/evidence/sessions", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {"sessions": []}
+    assert client.get("/admin/evidence", headers=headers).status_code == 200
+    assert client.get("/admin/evidence/1/image", headers=headers).status_code == 404
+
+@pytest.mark.parametrize("route", EVIDENCE_ROUTES + ["/admin/profile?seconds=0.01"])
+def test_token_in_query_string_refused(client, route):
+    separator = "&" if "?" in route else "?"
+    assert client.get(f"{route}{separator}token={TOKEN}").status_code == 403
+
+def test_profile_served_with_token(client):
+    response = client.get("/admin/profile?seconds=0.01", headers={"X-Admin-Token": TOKEN})
+    assert response.status_code == 200
@@ -0,0 +1,46 @@
+"""
+Output parity of the exported phone-detection models (ONNX Runtime,
+OpenVINO) with the PyTorch model on the stored screenshots, with the
+tolerances of benchmarks/bench_mobile_backends.py. Skipped when ultralytics
+or a model file is unavailable (build them with export_mobile_model.py).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from mobile_detection import load_model, inference_args
+from benchmarks.bench_mobile_backends import MAX_CONF_DIFF, MIN_AGREEMENT, MIN_IOU, parity, run
+from benchmarks.corpus import load_frames
+
+PARITY_FRAMES = 50
+
+@pytest.fixture(scope="module")
+def frames():
+    frames = load_frames(limit=PARITY_FRAMES)
+    if not frames:
+        pytest.skip("No stored screenshots to compare on")
+    return frames
+
+@pytest.fixture(scope="module")
+def reference_model():
+    yolo_model = load_model("torch")
+    if yolo_model is None:
+        pytest.skip("PyTorch phone model not found")
+    return yolo_model
+
+@pytest.mark.parametrize("backend", ["onnx", "openvino"])
+def test_exported_model_matches_torch(backend, frames, reference_model):
+    exported_model = load_model(backend)
+    if exported_model is None:
+        pytest.skip(f"No exported {backend} model")
+    call_args = inference_args(backend=backend)
+    reference, _ = run(reference_model, frames, call_args)
+    exported, _ = run(exported_model, frames, call_args)
+
+    agreement, mean_iou, mean_conf_diff = parity(reference, exported)
+    assert agreement >= MIN_AGREEMENT
+    assert mean_iou >= MIN_IOU
+    assert mean_conf_diff <= MAX_CONF_DIFF
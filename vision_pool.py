@@ -0,0 +1,385 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from model_registry import registry
+
+# Number of worker processes ("0" = one per CPU core)
+POOL_WORKERS = int(os.getenv("VISION_POOL_WORKERS", "0")) or os.cpu_count() or 1
+# "fork" is only safe before the parent starts threads or initializes torch,
+# so call start() early (main.py does it before loading models or opening the
+# camera); "spawn" is required where fork is unavailable
+POOL_START_METHOD = os.getenv("VISION_POOL_START_METHOD", "fork" if sys.platform.startswith("linux") else "spawn")
+# Longest wait for one frame's results before process() gives up on it
+POOL_RESULT_TIMEOUT = 2.0
+# How often a waiting caller checks that the workers are still alive
+WORKER_CHECK_INTERVAL = 0.25
+# Longest wait for the workers to report their stats and exit on close()
+WORKER_STOP_TIMEOUT = 5.0
+# Models the parent loads before forking, so the workers share their memory
+# copy-on-write. Only plain dlib models qualify: they start no thread pools,
+# whereas torch and OpenCV DNN do, so each worker loads YOLO and the face
+# detector itself after the fork. With "spawn" every worker loads everything.
+FORK_SHARED_MODELS = ("landmarks",)
+
+# Analyzers are grouped by what they share: gaze and head pose read the same
+# landmarks, so they always run together in one worker
+ANALYZER_GROUPS = {"gaze": "face", "head": "face", "mobile": "phone"}
+
+class FrameRing:
+    """
+    Fixed number of frame slots in one multiprocessing.shared_memory block.
+
+    The parent copies each frame into a free slot once; workers map the same
+    block and receive only the slot index, so no frame is ever pickled. A slot
+    is reused only after every worker it was sent to has reported back.
+    """
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.array = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        self._pending = [0] * slots
+        self._next = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, frame, readers=1):
+        """
+        Copies `frame` into a free slot reserved for `readers` workers and
+        returns the slot index, or None if every slot is still in use.
+        """
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the ring's {self.shape}")
+        for offset in range(self.slots):
+            slot = (self._next + offset) % self.slots
+            if self._pending[slot] == 0:
+                self.array[slot] = frame
+                self._pending[slot] = readers
+                self._next = (slot + 1) % self.slots
+                return slot
+        return None
+
+    def release(self, slot):
+        """Called once per reader when it is done with `slot`."""
+        self._pending[slot] -= 1
+
+    def view(self, slot):
+        """Read-only view of the frame in `slot` (no copy)."""
+        frame = self.array[slot]
+        frame.flags.writeable = False
+        return frame
+
+    def in_use(self):
+        return sum(1 for pending in self._pending if pending)
+
+    def close(self):
+        del self.array
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _limit_threads():
+    # One busy thread per worker process; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+def _worker_main(tasks, results, session_options):
+    """
+    Worker process loop. Keeps one VisionSession per stream, so the temporal
+    state of each stream's analyzers stays consistent across frames. The
+    frame ring is attached on the first task, once the parent created it.
+    On shutdown the sessions' stats are sent back as ("stats", {stream_id: stats}).
+    """
+    from vision_session import VisionSession
+
+    _limit_threads()
+    # Load the models not inherited from the parent (FORK_SHARED_MODELS) while
+    # the parent is still starting up, not on the first frame
+    registry.preload()
+    ring = None
+    sessions = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                results.put(("stats", {stream_id: session.stats() for stream_id, session in sessions.items()}))
+                break
+            seq, stream_id, ring_name, slots, shape, slot, analyzers, calibrated_angles, submitted = task
+            if ring is None:
+                ring = FrameRing(slots, shape, name=ring_name)
+            started = time.perf_counter()
+            output = {}
+            frame = context = None
+            try:
+                session = sessions.get(stream_id)
+                if session is None:
+                    session = sessions[stream_id] = VisionSession(**session_options)
+                frame = ring.view(slot)
+                if "mobile" in analyzers:
+                    output["mobile"] = session.phone.process(frame)
+                if "gaze" in analyzers or "head" in analyzers:
+                    context = session.stage.process(frame)
+                    if "gaze" in analyzers:
+                        output["gaze"] = session.gaze.process(frame, context)
+                    if "head" in analyzers:
+                        output["head"] = session.head.process(frame, calibrated_angles, context)
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            # Drop every view of the slot before reporting it free
+            frame = context = None
+            results.put((seq, stream_id, slot, output, error, submitted, time.perf_counter() - started))
+    finally:
+        if ring is not None:
+            ring.close()
+
+class VisionWorkerPool:
+    """
+    Runs the vision analyzers in worker processes instead of threads, so dlib
+    and the Python glue around it are not serialized by the GIL.
+
+    Frames go through a FrameRing; tasks and results are small tuples on
+    multiprocessing queues. Every (stream, analyzer group) pair is pinned to
+    one worker so per-stream temporal state (face tracker, angle smoothing,
+    phone temporal filter) lives in exactly one place. A single stream
+    therefore uses up to two workers (landmarks/gaze/head and phone); many
+    streams spread across all of them.
+
+    Call start() before the process starts other threads or loads models
+    (see POOL_START_METHOD); otherwise workers start on the first submitted
+    frame. When forking, start() first loads FORK_SHARED_MODELS so the workers
+    share them; the parent needs no other model. The frame ring is created on the first frame, when its shape is
+    known. A worker that dies raises RuntimeError in the waiting caller
+    instead of blocking it.
+    """
+    def __init__(self, workers=POOL_WORKERS, slots=None, start_method=POOL_START_METHOD, **session_options):
+        self.workers = workers
+        self.slots = slots or 2 * workers + 2
+        self.start_method = start_method
+        self.session_options = session_options
+        self.ring = None
+        self._processes = []
+        self._tasks = []
+        self._results = None
+        self._seq = 0
+        self._ready = {}
+        self._stream_index = {}
+        self._lock = threading.Lock()
+        # Face tracking stats per stream, summed over the workers by close()
+        self.tracking_stats = {}
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.timed_out = 0
+        self.worker_seconds = 0.0
+
+    def start(self):
+        """Starts the worker processes (once). Returns the pool."""
+        with self._lock:
+            if self._processes:
+                return self
+            if self.start_method == "fork" and threading.active_count() > 1:
+                print("WARNING: Forking vision workers while other threads run; call start() earlier "
+                      "or set VISION_POOL_START_METHOD=spawn")
+            if self.start_method == "fork":
+                import face_landmarks  # Registers the landmark predictor
+                registry.preload(FORK_SHARED_MODELS)
+            context = multiprocessing.get_context(self.start_method)
+            self._results = context.Queue()
+            for _ in range(self.workers):
+                tasks = context.Queue()
+                process = context.Process(
+                    target=_worker_main,
+                    args=(tasks, self._results, self.session_options),
+                    daemon=True,
+                )
+                process.start()
+                self._tasks.append(tasks)
+                self._processes.append(process)
+        return self
+
+    @property
+    def pids(self):
+        return [process.pid for process in self._processes]
+
+    def _check_workers(self):
+        for index, process in enumerate(self._processes):
+            if process.exitcode is not None:
+                raise RuntimeError(f"Vision worker {index} exited with code {process.exitcode}")
+
+    def _worker_for(self, stream_id, group):
+        # Consecutive pairs go to consecutive workers, so one stream's face and
+        # phone groups never share a worker while there are two or more
+        stream_index = self._stream_index.setdefault(stream_id, len(self._stream_index))
+        group_index = list(dict.fromkeys(ANALYZER_GROUPS.values())).index(group)
+        return (stream_index * 2 + group_index) % self.workers
+
+    def submit(self, frame, analyzers=("gaze", "head", "mobile"), stream_id=0, calibrated_angles=None):
+        """
+        Writes `frame` into the ring and queues it for `analyzers`. Returns the
+        frame's sequence number, or None if all slots are busy (frame dropped).
+        """
+        groups = {}
+        for name in analyzers:
+            groups.setdefault(ANALYZER_GROUPS[name], []).append(name)
+        if not groups:
+            return None
+        self.start()
+        with self._lock:
+            if self.ring is None:
+                self.ring = FrameRing(self.slots, frame.shape)
+            slot = self.ring.write(frame, readers=len(groups))
+            if slot is None:
+                self.rejected += 1
+                return None
+            self._seq += 1
+            seq = self._seq
+            self._ready[seq] = {"pending": len(groups), "results": {}, "errors": []}
+            self.submitted += 1
+        submitted = time.time()
+        for group, names in groups.items():
+            self._tasks[self._worker_for(stream_id, group)].put(
+                (seq, stream_id, self.ring.name, self.slots, self.ring.shape, slot, tuple(names),
+                 calibrated_angles, submitted))
+        return seq
+
+    def _collect(self, timeout):
+        """
+        Receives one worker result. Returns its seq, or None on timeout.
+        Raises RuntimeError if a worker died while waiting.
+        """
+        if self._results is None:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = WORKER_CHECK_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            try:
+                seq, stream_id, slot, output, error, submitted, worker_seconds = self._results.get(timeout=wait)
+                break
+            except queue.Empty:
+                self._check_workers()
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+        with self._lock:
+            self.ring.release(slot)
+            self.worker_seconds += worker_seconds
+            entry = self._ready.get(seq)
+            if entry is None:
+                return seq  # Late result of a frame process() gave up on; only its slot is freed
+            entry["pending"] -= 1
+            entry["results"].update(output)
+            entry["stream_id"] = stream_id
+            entry["latency"] = time.time() - submitted
+            if error is not None:
+                self.errors += 1
+                entry["errors"].append(error)
+                print(f"Error in vision worker: {error}")
+        return seq
+
+    def get_result(self, timeout=None):
+        """
+        Returns the next completed frame as (seq, stream_id, results, latency),
+        where results maps analyzer name to its (annotations, value). None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                for seq, entry in self._ready.items():
+                    if entry["pending"] == 0:
+                        del self._ready[seq]
+                        self.completed += 1
+                        return seq, entry["stream_id"], entry["results"], entry["latency"]
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._collect(remaining) is None:
+                return None
+
+    def process(self, frame, analyzers=("gaze", "head", "mobile"), stream_id=0, calibrated_angles=None,
+                timeout=POOL_RESULT_TIMEOUT):
+        """
+        Synchronous helper for a single stream: submits `frame` and waits for
+        its results. Returns {analyzer: (annotations, value)}, or {} if the
+        frame was dropped or timed out; results arriving after the timeout
+        are discarded.
+        """
+        seq = self.submit(frame, analyzers, stream_id, calibrated_angles)
+        if seq is None:
+            return {}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                entry = self._ready.get(seq)
+                if entry is not None and entry["pending"] == 0:
+                    del self._ready[seq]
+                    self.completed += 1
+                    return entry["results"]
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._collect(remaining) is None:
+                with self._lock:
+                    self._ready.pop(seq, None)
+                    self.timed_out += 1
+                return {}
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "timed_out": self.timed_out,
+            "slots_in_use": self.ring.in_use() if self.ring is not None else 0,
+            "mean_worker_ms": 1000 * self.worker_seconds / self.completed if self.completed else 0.0,
+        }
+
+    def _merge_stats(self, worker_stats):
+        for stream_id, session_stats in worker_stats.items():
+            tracking = session_stats["face_tracking"]
+            if tracking is None:
+                continue
+            totals = self.tracking_stats.setdefault(stream_id, dict.fromkeys(tracking, 0))
+            for key, value in tracking.items():
+                totals[key] += value
+
+    def close(self):
+        """
+        Stops the workers. Their per-stream face tracking stats are collected
+        into tracking_stats first; results still in flight are discarded.
+        """
+        for tasks in self._tasks:
+            tasks.put(None)
+        pending = sum(1 for process in self._processes if process.exitcode is None)
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+        while pending:
+            try:
+                message = self._results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if message[0] == "stats":
+                pending -= 1
+                self._merge_stats(message[1])
+        for process in self._processes:
+            process.join(timeout=WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self._processes = []
+        self._tasks = []
@@ -0,0 +1,26 @@
+from face_detectors import FACE_DETECTOR_BACKEND
+from face_landmarks import LandmarkStage, FaceTracker
+from eye_movement import GazeAnalyzer
+from head_pose import HeadPoseAnalyzer
+from mobile_detection import PhoneDetector
+
+class VisionSession:
+    """
+    Everything that holds per-candidate state in the vision pipeline.
+
+    One process can serve many candidate streams by creating one session per
+    stream: each session gets its own face tracker, face detector (cheap),
+    angle smoothing and phone temporal filter, while the landmark predictor and
+    the YOLO model are loaded once per process and shared read-only.
+    """
+    def __init__(self, tracking=True, detection_scale="auto", detector_backend=FACE_DETECTOR_BACKEND,
+                 inference_profile=None):
+        self.tracker = FaceTracker() if tracking else None
+        self.stage = LandmarkStage(tracker=self.tracker, detection_scale=detection_scale,
+                                   backend=detector_backend)
+        self.gaze = GazeAnalyzer(self.stage)
+        self.head = HeadPoseAnalyzer(self.stage)
+        self.phone = PhoneDetector(inference_profile)
+
+    def stats(self):
+        return {"face_tracking": self.tracker.stats() if self.tracker is not None else None}